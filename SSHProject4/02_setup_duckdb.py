@@ -10,48 +10,72 @@ from pathlib import Path
 import configparser
 import time
 
-def create_database(parquet_directory, duckdb_path):
-    """Create database with summary tables only"""
-    
-    print("="*70)
-    print("DuckDB Setup - Summary Tables Only")
-    print("No view creation - avoids file limit issues!")
-    print("="*70)
-    
-    parquet_dir = Path(parquet_directory)
-    
-    # Find all files
-    all_files = sorted(parquet_dir.glob("year=*/month=*/*.parquet"))
-    print(f"\n📂 Found {len(all_files)} Parquet files")
-    
-    estimated_mins = (len(all_files) * 0.5) / 60
-    print(f"⏱️  Estimated time: ~{estimated_mins:.0f} minutes")
-    
-    response = input("\nProceed? (y/n): ").strip().lower()
-    if response != 'y':
-        print("Cancelled")
-        return
-    
-    # Connect to database
-    print(f"\n📂 Creating database: {duckdb_path}")
-    conn = duckdb.connect(str(duckdb_path))
-    conn.execute("SET threads TO 4")
-    conn.execute("SET memory_limit = '4GB'")
-    print("✅ Database created")
+from utils.daily_tables import create_daily_tables, insert_daily_rows, merge_daily_tables
+from utils.hll import hll_estimate_sql, hll_registers_sql
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+
+# Written by every scan alongside the tables below (create_all_daily_tables.py builds them too)
+DAILY_STATS_TABLES = ['daily_sketches', 'daily_stats']
+
+# Tables only this script builds
+SUMMARY_TABLES = ['country_stats', 'top_ips', 'username_stats', 'hourly_patterns']
+
+# Distinct counts that cannot be summed across scans: (table, key, column, counted column, key SQL)
+# Each scan adds HyperLogLog registers per key; keys seen in several scans get the merged estimate
+STAT_SKETCHES = [
+    ('country_stats', 'country', 'unique_ips', 'IP', 'country'),
+    ('country_stats', 'country', 'unique_usernames', 'Username', 'country'),
+    ('top_ips', 'IP', 'unique_usernames', 'Username', 'IP'),
+    ('username_stats', 'Username', 'unique_ips', 'IP', 'Username'),
+    ('username_stats', 'Username', 'unique_countries', 'country', 'Username'),
+    ('hourly_patterns', 'hour', 'unique_ips', 'IP', 'EXTRACT(HOUR FROM datetime)::VARCHAR'),
+]
+
+
+def stat_sketches_sql(source):
+    """Registers of every STAT_SKETCHES count from one scan of source"""
+    return '\n        UNION ALL\n'.join(
+        f"SELECT '{table}' as stat, '{column}' as count_column, key, bucket, rho FROM ("
+        f"{hll_registers_sql(f'(SELECT {key_sql}::VARCHAR as key, {counted} FROM {source}) stat_rows', counted, ['key'])})"
+        for table, _, column, counted, key_sql in STAT_SKETCHES
+    )
+
+
+def merge_sketch_counts(conn, table):
+    """
+    {table}_final's summed distinct counts -> sketch estimates, for keys with rows from several scans
+    (a key aggregated in one scan keeps its exact COUNT(DISTINCT))
+    """
+    for stat, key, column, _, _ in STAT_SKETCHES:
+        if stat != table:
+            continue
+        registers = f"""(
+            SELECT key, bucket, rho FROM stat_sketches
+            WHERE stat = '{table}' AND count_column = '{column}'
+              AND key IN (SELECT {key}::VARCHAR FROM {table} GROUP BY {key} HAVING COUNT(*) > 1)
+              AND key IN (SELECT {key}::VARCHAR FROM {table}_final)
+        ) s"""
+        conn.execute(f"""
+            UPDATE {table}_final
+            SET {column} = estimates.estimate
+            FROM ({hll_estimate_sql(registers, keys=['key'])}) estimates
+            WHERE {table}_final.{key}::VARCHAR = estimates.key
+        """)
+
+
+def build_summary_tables(conn, file_groups, parquet_dir, with_daily=True):
+    """
+    Scan every file group of parquet_dir into country_stats, top_ips, username_stats and hourly_patterns
+    (plus daily_sketches and daily_stats with_daily); returns (scans that succeeded, seconds)
+    """
+    layout = output_layout(parquet_dir)
     
     # Create empty summary tables
     print("\n🔨 Creating empty summary tables...")
     
-    conn.execute("DROP TABLE IF EXISTS daily_stats")
-    conn.execute("""
-        CREATE TABLE daily_stats (
-            date DATE,
-            total_attacks BIGINT,
-            unique_ips BIGINT,
-            unique_countries BIGINT,
-            unique_usernames BIGINT
-        )
-    """)
+    if with_daily:
+        create_daily_tables(conn, DAILY_STATS_TABLES)
     
     conn.execute("DROP TABLE IF EXISTS country_stats")
     conn.execute("""
@@ -104,37 +128,38 @@ def create_database(parquet_directory, duckdb_path):
         )
     """)
     
+    conn.execute("""
+        CREATE OR REPLACE TEMP TABLE stat_sketches (
+            stat VARCHAR,
+            count_column VARCHAR,
+            key VARCHAR,
+            bucket SMALLINT,
+            rho TINYINT
+        )
+    """)
+    
     print("✅ Empty tables created")
     
-    # Process files one by one
-    print(f"\n🔄 Processing {len(all_files)} files...")
+    # Process scans one by one
+    print(f"\n🔄 Processing {len(file_groups)} scans...")
     
     overall_start = time.time()
     success_count = 0
     
-    for i, parquet_file in enumerate(all_files, 1):
+    for i, (partition, files) in enumerate(file_groups, 1):
         
-        if i == 1 or i % 100 == 0 or i == len(all_files):
+        if i == 1 or i % 100 == 0 or i == len(file_groups):
             elapsed = time.time() - overall_start
             rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(all_files) - i) / rate if rate > 0 else 0
-            print(f"   [{i}/{len(all_files)}] Processing... ({rate:.1f} files/sec, ~{remaining/60:.1f}min left)")
+            remaining = (len(file_groups) - i) / rate if rate > 0 else 0
+            print(f"   [{i}/{len(file_groups)}] Processing... ({rate:.1f} scans/sec, ~{remaining/60:.1f}min left)")
         
         try:
-            file_str = str(parquet_file)
+            source = standard_source_sql(files, parquet_dir, layout)
             
-            # Daily stats
-            conn.execute(f"""
-                INSERT INTO daily_stats
-                SELECT 
-                    datetime::DATE as date,
-                    COUNT(*) as total_attacks,
-                    COUNT(DISTINCT IP) as unique_ips,
-                    COUNT(DISTINCT country) as unique_countries,
-                    COUNT(DISTINCT Username) as unique_usernames
-                FROM read_parquet('{file_str}')
-                GROUP BY date
-            """)
+            # Daily stats (and the sketches that merge its distinct counts)
+            if with_daily:
+                insert_daily_rows(conn, source, DAILY_STATS_TABLES)
             
             # Country stats
             conn.execute(f"""
@@ -150,7 +175,7 @@ def create_database(parquet_directory, duckdb_path):
                     MAX(datetime) as last_seen,
                     AVG(latitude) as avg_latitude,
                     AVG(longitude) as avg_longitude
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 WHERE country IS NOT NULL
                 GROUP BY country, country_code, continent
             """)
@@ -167,7 +192,7 @@ def create_database(parquet_directory, duckdb_path):
                     COUNT(DISTINCT Username) as unique_usernames,
                     MIN(datetime) as first_seen,
                     MAX(datetime) as last_seen
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 GROUP BY IP, country, asn, asn_name
             """)
             
@@ -181,7 +206,7 @@ def create_database(parquet_directory, duckdb_path):
                     COUNT(DISTINCT country) as unique_countries,
                     MIN(datetime) as first_seen,
                     MAX(datetime) as last_seen
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 GROUP BY Username
             """)
             
@@ -192,37 +217,28 @@ def create_database(parquet_directory, duckdb_path):
                     EXTRACT(HOUR FROM datetime) as hour,
                     COUNT(*) as attack_count,
                     COUNT(DISTINCT IP) as unique_ips
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 GROUP BY hour
             """)
             
+            # Sketches for the distinct counts below
+            conn.execute(f"INSERT INTO stat_sketches {stat_sketches_sql(source)}")
+            
             success_count += 1
             
         except Exception as e:
-            print(f"   ❌ Error on {parquet_file.name}: {e}")
+            print(f"   ❌ Error on {partition}: {e}")
             continue
     
     total_elapsed = time.time() - overall_start
-    print(f"\n✅ Processed {success_count}/{len(all_files)} files ({total_elapsed/60:.1f} minutes)")
+    print(f"\n✅ Processed {success_count}/{len(file_groups)} scans ({total_elapsed/60:.1f} minutes)")
     
     # Aggregate results
     print("\n🔄 Aggregating results...")
     
-    print("   - daily_stats")
-    conn.execute("""
-        CREATE TABLE daily_stats_final AS
-        SELECT 
-            date,
-            SUM(total_attacks) as total_attacks,
-            MAX(unique_ips) as unique_ips,
-            MAX(unique_countries) as unique_countries,
-            MAX(unique_usernames) as unique_usernames
-        FROM daily_stats
-        GROUP BY date
-        ORDER BY date
-    """)
-    conn.execute("DROP TABLE daily_stats")
-    conn.execute("ALTER TABLE daily_stats_final RENAME TO daily_stats")
+    if with_daily:
+        print("   - daily_sketches, daily_stats")
+        merge_daily_tables(conn, DAILY_STATS_TABLES)
     
     print("   - country_stats")
     conn.execute("""
@@ -242,6 +258,7 @@ def create_database(parquet_directory, duckdb_path):
         GROUP BY country
         ORDER BY total_attacks DESC
     """)
+    merge_sketch_counts(conn, 'country_stats')
     conn.execute("DROP TABLE country_stats")
     conn.execute("ALTER TABLE country_stats_final RENAME TO country_stats")
     
@@ -262,6 +279,7 @@ def create_database(parquet_directory, duckdb_path):
         ORDER BY attack_count DESC
         LIMIT 10000
     """)
+    merge_sketch_counts(conn, 'top_ips')
     conn.execute("DROP TABLE top_ips")
     conn.execute("ALTER TABLE top_ips_final RENAME TO top_ips")
     
@@ -280,6 +298,7 @@ def create_database(parquet_directory, duckdb_path):
         ORDER BY attempt_count DESC
         LIMIT 10000
     """)
+    merge_sketch_counts(conn, 'username_stats')
     conn.execute("DROP TABLE username_stats")
     conn.execute("ALTER TABLE username_stats_final RENAME TO username_stats")
     
@@ -294,25 +313,64 @@ def create_database(parquet_directory, duckdb_path):
         GROUP BY hour
         ORDER BY hour
     """)
+    merge_sketch_counts(conn, 'hourly_patterns')
     conn.execute("DROP TABLE hourly_patterns")
     conn.execute("ALTER TABLE hourly_patterns_final RENAME TO hourly_patterns")
     
+    return success_count, total_elapsed
+
+
+def create_database(parquet_directory, duckdb_path, settings):
+    """Create database with summary tables only"""
+    
+    print("="*70)
+    print("DuckDB Setup - Summary Tables Only")
+    print("No view creation - avoids file limit issues!")
+    print("="*70)
+    
+    parquet_dir = Path(parquet_directory)
+    
+    # Find all files - day partitions (date=) or files (year=/month=), batched per read_parquet()
+    file_groups = batch_file_groups(partition_file_groups(parquet_dir), settings.batch_files)
+    file_count = sum(len(files) for _, files in file_groups)
+    print(f"\n📂 Found {file_count} Parquet files ({len(file_groups)} scans)")
+    print(f"⚙️  {settings.describe()}")
+    
+    estimated_mins = (len(file_groups) * 0.5) / 60
+    print(f"⏱️  Estimated time: ~{estimated_mins:.0f} minutes")
+    
+    response = input("\nProceed? (y/n): ").strip().lower()
+    if response != 'y':
+        print("Cancelled")
+        return
+    
+    # Connect to database
+    print(f"\n📂 Creating database: {duckdb_path}")
+    conn = duckdb.connect(str(duckdb_path))
+    configure_connection(conn, settings)
+    print("✅ Database created")
+    
+    success_count, total_elapsed = build_summary_tables(conn, file_groups, parquet_dir)
+    
     # Show summary
     print("\n" + "="*70)
     print("Summary")
     print("="*70)
     
-    total = conn.execute("SELECT SUM(total_attacks) FROM daily_stats").fetchone()[0]
+    total = conn.execute("SELECT SUM(total_attacks) FROM daily_stats").fetchone()[0] or 0
     countries = conn.execute("SELECT COUNT(*) FROM country_stats").fetchone()[0]
     ips = conn.execute("SELECT COUNT(*) FROM top_ips").fetchone()[0]
     usernames = conn.execute("SELECT COUNT(*) FROM username_stats").fetchone()[0]
     
-    print(f"\n✅ Database created successfully!")
+    if success_count == len(file_groups):
+        print(f"\n✅ Database created successfully!")
+    else:
+        print(f"\n❌ {len(file_groups) - success_count} of {len(file_groups)} scans failed - tables are incomplete")
     print(f"   Total attacks: {total:,}")
     print(f"   Countries: {countries}")
     print(f"   Top IPs: {ips:,}")
     print(f"   Top usernames: {usernames:,}")
-    print(f"   Processing rate: {len(all_files)/total_elapsed:.1f} files/sec")
+    print(f"   Processing rate: {len(file_groups)/total_elapsed:.1f} scans/sec")
     
     print(f"\n📊 Top 5 countries:")
     top5 = conn.execute("""
@@ -327,7 +385,10 @@ def create_database(parquet_directory, duckdb_path):
     conn.close()
     
     print("\n" + "="*70)
-    print("✅ Done! Next: create country table, then start API")
+    if success_count == len(file_groups):
+        print("✅ Done! Next: create country table, then start API")
+    else:
+        print("❌ Fix the failed scans above and rerun")
     print("="*70)
 
 
@@ -342,7 +403,13 @@ def main():
         print(f"❌ Missing config key: {e}")
         return
     
-    create_database(parquet_directory, duckdb_path)
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
+    create_database(parquet_directory, duckdb_path, settings)
 
 
 if __name__ == "__main__":
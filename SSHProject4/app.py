@@ -25,6 +25,7 @@ from endpoints.country_summary import register_country_summary
 from endpoints.ip_summary import register_ip_summary
 from endpoints.asn_summary import register_asn_summary
 from endpoints.username_summary import register_username_summary
+from endpoints.distinct_counts import register_distinct_counts
 
 # Register all endpoints
 register_total_attacks(app)
@@ -40,6 +41,7 @@ register_country_summary(app)
 register_ip_summary(app)
 register_asn_summary(app)
 register_username_summary(app)
+register_distinct_counts(app)
 
 if __name__ == '__main__':
     from utils.config import DB_PATH
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+End-to-End Pipeline Benchmark
+Generates synthetic data at each scale, then times convert -> 02_setup_duckdb -> every
+summary_tables_code builder -> a fixed set of API queries
+Each stage runs as its own process: wall time, rows/sec, peak RSS and output size are appended
+to the results file and compared with the stored baseline (exit code 1 on a regression)
+"""
+
+import argparse
+import configparser
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+
+# (stage, script and arguments relative to REPO_DIR, what it writes) - run in order from the data folder
+PIPELINE_STAGES = [
+    ('convert', ['convert_to_parquet_FIXED.py', '--force', '--log-level', 'quiet'], 'parquet'),
+    ('setup_duckdb', ['02_setup_duckdb.py'], 'db'),
+    ('country_table', ['summary_tables_code/create_country_file_by_file.py'], 'db'),
+    ('asn_table', ['summary_tables_code/create_asn_table.py'], 'db'),
+    ('username_table', ['summary_tables_code/create_username_table.py'], 'db'),
+    ('ip_tables', ['benchmark_pipeline.py', '--build-ip-tables'], 'db'),
+    ('ip_username_table', ['summary_tables_code/create_ip_table.py'], 'db'),
+    ('all_daily_tables', ['summary_tables_code/create_all_daily_tables.py'], 'db'),
+    ('volatile_country', ['summary_tables_code/create_volatile_country_summary.py'], 'db'),
+    ('volatile_ip', ['summary_tables_code/create_volatile_ip_summary.py'], 'db'),
+    ('volatile_asn', ['summary_tables_code/create_volatile_asn_summary.py'], 'db'),
+    ('volatile_username', ['summary_tables_code/create_volatile_username_summary.py'], 'db'),
+    # Rebuilds every table above in one command (its database replaces theirs before the API queries)
+    ('build_database', ['build_database.py'], 'db'),
+]
+
+# Stages whose daily_* tables create_all_daily_tables.py builds in one pass (setup_duckdb also writes
+# country_stats/top_ips/username_stats/hourly_patterns, so the comparison slightly favours the single pass)
+SEPARATE_DAILY_STAGES = ['setup_duckdb', 'country_table', 'asn_table', 'username_table', 'ip_tables',
+                         'ip_username_table']
+
+# Each query is timed API_REPEATS times through the Flask test client; the median is recorded
+API_REPEATS = 5
+
+# Differences below these are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.5
+MIN_REGRESSION_MS = 10.0
+MIN_REGRESSION_RSS_MB = 32
+
+
+def directory_size(path):
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob('*') if f.is_file()) if path.exists() else 0
+
+
+def git_commit():
+    """Short commit of the tree being benchmarked (None outside a git checkout)"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_stage(args, data_dir, log_path):
+    """
+    Run one pipeline script from data_dir, answering its 'Proceed? (y/n)' prompts
+    Returns (seconds, peak RSS MB of that process, exit code)
+    """
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, *args], cwd=data_dir, stdin=subprocess.PIPE, stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+        )
+        process.stdin.write(b'y\n' * 4)
+        process.stdin.close()
+        # wait4 reports this child's own rusage (RUSAGE_CHILDREN would be the max over every stage so far)
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+    
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return seconds, rss_mb, process.returncode
+
+
+def prepare_data(data_dir, rows, days, seed, workers, log_dir):
+    """Generate the scale's dataset once; later runs reuse it (same rows/days/seed -> same files)"""
+    marker = data_dir / '.generated.json'
+    spec = {'rows': rows, 'days': days, 'seed': seed}
+    if marker.exists() and json.loads(marker.read_text()) == spec:
+        return None
+    
+    args = ['generate_synthetic_data.py', '--rows', str(rows), '--days', str(days), '--seed', str(seed),
+            '--workers', str(workers), '--output', str(data_dir)]
+    data_dir.mkdir(parents=True, exist_ok=True)
+    seconds, _, code = run_stage([str(REPO_DIR / args[0]), *args[1:]], data_dir, log_dir / 'generate.log')
+    if code != 0:
+        raise RuntimeError(f"generator exited with {code} (see {log_dir / 'generate.log'})")
+    marker.write_text(json.dumps(spec))
+    return seconds
+
+
+def benchmark_scale(rows, args, run_id):
+    """All stages for one scale -> result record"""
+    data_dir = (args.workdir / f"rows_{rows}").resolve()
+    log_dir = data_dir / 'benchmark_logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    
+    print(f"\n{'='*70}")
+    print(f"Scale: {rows:,} rows ({args.days} days) - {data_dir}")
+    print(f"{'='*70}")
+    
+    generated = prepare_data(data_dir, rows, args.days, args.seed, args.workers, log_dir)
+    print(f"   {'generate':<20} " + (f"{generated:>8.1f}s" if generated is not None else "  (reused)"))
+    
+    # Every run starts from an empty database
+    for name in ('attack_data.db', 'attack_data.db.wal'):
+        (data_dir / name).unlink(missing_ok=True)
+    
+    record = {
+        'run_id': run_id,
+        'at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'rows': rows,
+        'days': args.days,
+        'seed': args.seed,
+        'stages': {},
+        'api': {},
+    }
+    
+    for stage, stage_args, output in PIPELINE_STAGES:
+        script = str(REPO_DIR / stage_args[0])
+        seconds, rss_mb, code = run_stage([script, *stage_args[1:]], data_dir, log_dir / f"{stage}.log")
+        output_path = data_dir / ('parquet_output' if output == 'parquet' else 'attack_data.db')
+        record['stages'][stage] = {
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(rows / seconds) if seconds > 0 else None,
+            'peak_rss_mb': round(rss_mb, 1),
+            'output_mb': round(directory_size(output_path) / 1024**2, 2),
+            'exit_code': code,
+        }
+        status = "✅" if code == 0 else f"❌ exit {code}"
+        print(f"   {stage:<20} {seconds:>8.1f}s {rows / seconds:>12,.0f} rows/s {rss_mb:>8,.0f} MB RSS "
+              f"{record['stages'][stage]['output_mb']:>9,.1f} MB out  {status}")
+        if code != 0:
+            print(f"   Stopping this scale - see {log_dir / f'{stage}.log'}")
+            return record
+    
+    separate = sum(record['stages'][stage]['seconds'] for stage in SEPARATE_DAILY_STAGES)
+    single = record['stages']['all_daily_tables']['seconds']
+    print(f"   {'daily_* rebuild':<20} separate scripts {separate:.1f}s vs single pass {single:.1f}s "
+          f"({separate / single:.1f}x)")
+    scripts = sum(record['stages'][stage]['seconds'] for stage, _, output in PIPELINE_STAGES
+                  if output == 'db' and stage != 'build_database')
+    orchestrated = record['stages']['build_database']['seconds']
+    print(f"   {'full rebuild':<20} builder scripts {scripts:.1f}s vs build_database {orchestrated:.1f}s "
+          f"({scripts / orchestrated:.1f}x)")
+    
+    api_path = log_dir / 'api_queries.json'
+    _, _, code = run_stage(
+        [str(REPO_DIR / 'benchmark_pipeline.py'), '--api-queries', str(api_path)], data_dir, log_dir / 'api.log')
+    record['api_exit_code'] = code
+    if code == 0:
+        record['api'] = json.loads(api_path.read_text())
+        print(f"   {'api':<20} {len(record['api'])} queries, median of {API_REPEATS} runs each:")
+        for name, result in record['api'].items():
+            print(f"      {name:<32} {result['median_ms']:>9.1f} ms  (HTTP {result['status']})")
+    else:
+        print(f"   ❌ API queries failed - see {log_dir / 'api.log'}")
+    
+    return record
+
+
+def build_ip_tables():
+    """
+    daily_ip_attacks, and the per-scan daily_ip_username_attacks_temp that create_ip_table.py finalizes
+    (no summary_tables_code builder writes these - they come from utils/daily_tables)
+    """
+    import duckdb
+    
+    sys.path.insert(0, str(REPO_DIR))
+    from utils.daily_tables import create_daily_tables, insert_daily_rows, merge_daily_tables
+    from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+    from utils.scan_settings import configure_connection, load_scan_settings
+    
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    tables = ['daily_ip_attacks', 'daily_ip_username_attacks']
+    
+    settings = load_scan_settings()
+    conn = duckdb.connect(config['paths']['duckdb_path'])
+    configure_connection(conn, settings)
+    create_daily_tables(conn, tables)
+    parquet_dir = Path(config['paths']['output_directory'])
+    layout = output_layout(parquet_dir)
+    for _, files in batch_file_groups(partition_file_groups(parquet_dir), settings.batch_files):
+        insert_daily_rows(conn, standard_source_sql(files, parquet_dir, layout), tables)
+    merge_daily_tables(conn, ['daily_ip_attacks'])
+    conn.execute("DROP TABLE IF EXISTS daily_ip_username_attacks_temp")
+    conn.execute("ALTER TABLE daily_ip_username_attacks RENAME TO daily_ip_username_attacks_temp")
+    conn.close()
+
+
+def run_api_queries(output_path):
+    """Time the fixed query set through the Flask test client (run from the data folder)"""
+    import duckdb
+    
+    sys.path.insert(0, str(REPO_DIR))
+    from app import app
+    from utils.config import DB_PATH
+    from utils.dimensions import DIMENSIONS
+    
+    # Filter values: the busiest country / ASN / IP / username of the dataset
+    conn = duckdb.connect(str(DB_PATH), read_only=True)
+    start, end = conn.execute("SELECT MIN(date)::VARCHAR, MAX(date)::VARCHAR FROM daily_stats").fetchone()
+    
+    def busiest(table, dimension=None, column=None):
+        if dimension is None:
+            return conn.execute(f"""
+                SELECT {column} FROM {table} GROUP BY {column} ORDER BY SUM(attacks) DESC, {column} LIMIT 1
+            """).fetchone()[0]
+        spec = DIMENSIONS[dimension]
+        return conn.execute(f"""
+            SELECT d.{spec['name']} FROM {table} JOIN {spec['table']} d USING ({spec['id']})
+            GROUP BY d.{spec['name']} ORDER BY SUM(attacks) DESC, d.{spec['name']} LIMIT 1
+        """).fetchone()[0]
+    
+    country = busiest('daily_country_attacks', column='country')
+    asn = busiest('daily_asn_attacks', 'asn')
+    ip = busiest('daily_ip_attacks', 'ip')
+    username = busiest('daily_username_attacks', 'username')
+    conn.close()
+    
+    span = {'start': start, 'end': end}
+    queries = {
+        'date_range': ('/api/date_range', {}),
+        'total_attacks': ('/api/total_attacks', span),
+        'total_attacks?country': ('/api/total_attacks', {**span, 'country': country}),
+        'total_attacks?ip': ('/api/total_attacks', {**span, 'ip': ip}),
+        'total_attacks?username': ('/api/total_attacks', {**span, 'username': username}),
+        'country_attacks': ('/api/country_attacks', span),
+        'country_attacks?asn': ('/api/country_attacks', {**span, 'asn': asn}),
+        'asn_attacks': ('/api/asn_attacks', span),
+        'ip_attacks': ('/api/ip_attacks', span),
+        'username_attacks': ('/api/username_attacks', span),
+        'username_attacks?country': ('/api/username_attacks', {**span, 'country': country}),
+        'country_summary': ('/api/country_summary', span),
+        'asn_summary': ('/api/asn_summary', span),
+        'ip_summary': ('/api/ip_summary', span),
+        'username_summary': ('/api/username_summary', span),
+        'distinct_counts': ('/api/distinct_counts', span),
+    }
+    
+    client = app.test_client()
+    results = {}
+    for name, (url, params) in queries.items():
+        timings = []
+        for _ in range(API_REPEATS):
+            start_time = time.perf_counter()
+            response = client.get(url, query_string=params)
+            timings.append((time.perf_counter() - start_time) * 1000)
+        results[name] = {'median_ms': round(statistics.median(timings), 2), 'status': response.status_code}
+    
+    Path(output_path).write_text(json.dumps(results, indent=1))
+
+
+def compare_with_baseline(record, baseline, tolerance):
+    """Print each stage/query against the baseline; returns the list of regressions"""
+    regressions = []
+    
+    print(f"\n📊 {record['rows']:,} rows vs baseline ({baseline.get('commit') or 'unknown'}, {baseline.get('at')}):")
+    print(f"   {'Stage':<32} {'Baseline':>10} {'Now':>10} {'Change':>8}")
+    
+    def check(name, base, now, unit, min_diff):
+        if base is None or now is None:
+            return
+        change = (now - base) / base * 100 if base else 0.0
+        regressed = now > base * (1 + tolerance) and now - base >= min_diff
+        flag = "  ⚠️  REGRESSION" if regressed else ""
+        print(f"   {name:<32} {base:>9.1f}{unit} {now:>9.1f}{unit} {change:>+7.1f}%{flag}")
+        if regressed:
+            regressions.append(f"{record['rows']:,} rows: {name} {base:.1f}{unit} -> {now:.1f}{unit} ({change:+.1f}%)")
+    
+    for stage, result in record['stages'].items():
+        base = baseline.get('stages', {}).get(stage, {})
+        check(stage, base.get('seconds'), result['seconds'], 's', MIN_REGRESSION_SECONDS)
+        check(f"{stage} (peak RSS MB)", base.get('peak_rss_mb'), result['peak_rss_mb'], '', MIN_REGRESSION_RSS_MB)
+    for query, result in record['api'].items():
+        base = baseline.get('api', {}).get(query, {})
+        check(f"api {query}", base.get('median_ms'), result['median_ms'], 'ms', MIN_REGRESSION_MS)
+    
+    return regressions
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    bench = config['benchmark'] if config.has_section('benchmark') else {}
+    
+    parser = argparse.ArgumentParser(description="Benchmark convert -> DuckDB -> builders -> API on synthetic data")
+    parser.add_argument('--scales', default=bench.get('scales', '1e6'),
+                        help="Comma-separated row counts, e.g. 1e6,1e7,1e8")
+    parser.add_argument('--days', type=int, default=int(bench.get('days', 30)), help="Days of generated logs")
+    parser.add_argument('--seed', type=int, default=42, help="Generator seed")
+    parser.add_argument('--workers', type=int, default=1, help="Generator processes")
+    parser.add_argument('--workdir', type=Path, default=Path(bench.get('workdir', './benchmark_data')),
+                        help="Where generated datasets live (reused between runs)")
+    parser.add_argument('--results', type=Path, default=Path(bench.get('results_file', './benchmark_results.jsonl')),
+                        help="JSON-lines file every run is appended to")
+    parser.add_argument('--baseline', type=Path, default=Path(bench.get('baseline_file', './benchmark_baseline.json')),
+                        help="Baseline to compare against")
+    parser.add_argument('--tolerance', type=float, default=float(bench.get('regression_tolerance', 0.2)),
+                        help="Allowed slowdown before a stage counts as a regression (0.2 = 20%%)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the new baseline")
+    parser.add_argument('--build-ip-tables', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--api-queries', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    # Internal stages, launched by benchmark_scale() in their own process
+    if args.build_ip_tables:
+        build_ip_tables()
+        return
+    if args.api_queries:
+        run_api_queries(args.api_queries)
+        return
+    
+    try:
+        scales = [int(float(scale)) for scale in args.scales.split(',') if scale.strip()]
+    except ValueError as e:
+        print(f"❌ Invalid --scales: {e}")
+        sys.exit(2)
+    
+    print("="*70)
+    print("End-to-End Pipeline Benchmark")
+    print("="*70)
+    print(f"\n📏 Scales: {', '.join(f'{rows:,}' for rows in scales)} rows")
+    print(f"📂 Data: {args.workdir}")
+    print(f"📝 Results: {args.results}")
+    print(f"📌 Baseline: {args.baseline}" + ("" if args.baseline.exists() else " (none yet)"))
+    
+    run_id = datetime.now().strftime('%Y%m%dT%H%M%S') + f"-{os.getpid()}"
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    records = []
+    
+    for rows in scales:
+        record = benchmark_scale(rows, args, run_id)
+        records.append(record)
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.results, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+    
+    regressions = []
+    for record in records:
+        if str(record['rows']) in baseline:
+            regressions += compare_with_baseline(record, baseline[str(record['rows'])], args.tolerance)
+        else:
+            print(f"\n📊 {record['rows']:,} rows: no baseline entry (use --save-baseline)")
+    
+    failed = [f"{record['rows']:,} rows: {stage}" for record in records
+              for stage, result in record['stages'].items() if result['exit_code'] != 0]
+    failed += [f"{record['rows']:,} rows: api" for record in records if record.get('api_exit_code', 0) != 0]
+    
+    if args.save_baseline:
+        if failed:
+            print(f"\n❌ Not saving the baseline - stages failed: {', '.join(failed)}")
+        else:
+            baseline.update({str(record['rows']): record for record in records})
+            args.baseline.write_text(json.dumps(baseline, indent=1, sort_keys=True))
+            print(f"\n📌 Baseline saved: {args.baseline}")
+    
+    print("\n" + "="*70)
+    if failed or regressions:
+        for problem in failed:
+            print(f"❌ Failed: {problem}")
+        for problem in regressions:
+            print(f"⚠️  Regression: {problem}")
+        print("="*70)
+        sys.exit(1)
+    print("✅ No regressions")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Build the Whole Database - No Prompts
+Runs every summary builder in dependency order:
+
+    Parquet -> overview        country_stats, top_ips, username_stats, hourly_patterns
+    Parquet -> daily           every daily_* table (one pass) + summary_sources
+               daily -> heavy_hitters, volatile_country, volatile_ip, volatile_asn, volatile_username
+
+Nodes whose inputs are ready run at the same time, each in its own process writing its own
+staging database (reading its inputs' staging databases). When every node has succeeded their
+tables are merged into a new file that replaces duckdb_path; tables no node builds are carried over
+"""
+
+import argparse
+import configparser
+import contextlib
+import importlib
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from multiprocessing import get_context
+from pathlib import Path
+
+import duckdb
+
+from utils.daily_tables import DAILY_TABLES, create_event_counts, insert_event_counts, rollup_daily_tables
+from utils.dimensions import DIMENSION_TABLES
+from utils.heavy_hitters import HEAVY_HITTERS_TABLE, refresh_heavy_hitters
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+from utils.summary_sources import SOURCES_TABLE, changed_dates, save_snapshot, scan_parquet_files
+from utils.volatile_tables import VOLATILE_TABLES, create_volatile_table
+
+# The module name starts with a digit, so it cannot be imported with an import statement
+setup_duckdb = importlib.import_module('02_setup_duckdb')
+
+
+def build_overview(conn, settings, parquet_dir):
+    """02_setup_duckdb's tables (its daily_stats comes from the daily node instead)"""
+    file_groups = batch_file_groups(partition_file_groups(parquet_dir), settings.batch_files)
+    success_count, _ = setup_duckdb.build_summary_tables(conn, file_groups, parquet_dir, with_daily=False)
+    if success_count != len(file_groups):
+        raise RuntimeError(f"{len(file_groups) - success_count} of {len(file_groups)} scans failed")
+
+
+def build_daily(conn, settings, parquet_dir):
+    """create_all_daily_tables.py's single pass, recording the files for a later --incremental"""
+    files = scan_parquet_files(parquet_dir)
+    file_groups = batch_file_groups(partition_file_groups(parquet_dir), settings.batch_files)
+    layout = output_layout(parquet_dir)
+    print(f"Counting {len(file_groups)} scans of {len(files)} files")
+    
+    create_event_counts(conn)
+    for _, group in file_groups:
+        insert_event_counts(conn, standard_source_sql(group, parquet_dir, layout))
+    rollup_daily_tables(conn)
+    conn.execute("DROP TABLE event_counts")
+    
+    save_snapshot(conn, files, changed_dates({}, files)[1])
+
+
+def build_heavy_hitters(conn, settings, parquet_dir):
+    refresh_heavy_hitters(conn)
+
+
+def build_volatile(name, conn, settings, parquet_dir):
+    create_volatile_table(conn, name)
+
+
+# node -> nodes whose tables it reads, tables it writes, builder(conn, settings, parquet_dir)
+BUILD_NODES = {
+    'overview': {'after': [], 'tables': setup_duckdb.SUMMARY_TABLES, 'build': build_overview},
+    'daily': {'after': [], 'tables': [*DAILY_TABLES, *DIMENSION_TABLES, SOURCES_TABLE], 'build': build_daily},
+    'heavy_hitters': {'after': ['daily'], 'tables': [HEAVY_HITTERS_TABLE], 'build': build_heavy_hitters},
+}
+for _volatile in VOLATILE_TABLES:
+    BUILD_NODES[_volatile.replace('_summary', '')] = {
+        'after': ['daily'], 'tables': [_volatile], 'build': partial(build_volatile, _volatile)}
+
+
+def staging_path(staging_dir, node):
+    return Path(staging_dir) / f"{node}.db"
+
+
+def remove_database(path):
+    """Delete a DuckDB file and its write-ahead log"""
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    path.with_name(path.name + '.wal').unlink(missing_ok=True)
+
+
+def run_node(node, staging_dir, settings, parquet_dir):
+    """
+    Worker process: build one node into its staging database, output going to <node>.log
+    Its inputs' staging databases are attached read-only and put on the search path, so the
+    builders' unqualified daily_* names resolve to them
+    Returns (seconds, {table: rows})
+    """
+    spec = BUILD_NODES[node]
+    path = staging_path(staging_dir, node)
+    remove_database(path)
+    
+    with open(Path(staging_dir) / f"{node}.log", 'w') as log, contextlib.redirect_stdout(log):
+        start = time.time()
+        conn = duckdb.connect(str(path))
+        configure_connection(conn, settings)
+        conn.execute("SET enable_progress_bar = false")  # it writes to the terminal, not the log
+        for upstream in spec['after']:
+            conn.execute(f"ATTACH '{staging_path(staging_dir, upstream)}' AS {upstream} (READ_ONLY)")
+        if spec['after']:
+            conn.execute(f"SET search_path = '{','.join([node, *spec['after']])}'")
+        
+        spec['build'](conn, settings, Path(parquet_dir))
+        
+        rows = {table: conn.execute(f"SELECT COUNT(*) FROM {node}.main.{table}").fetchone()[0]
+                for table in spec['tables']}
+        conn.close()
+        elapsed = time.time() - start
+        print(f"Built {', '.join(spec['tables'])} in {elapsed:.1f}s")
+    return elapsed, rows
+
+
+def run_graph(nodes, workers, staging_dir, settings, parquet_dir):
+    """
+    Run nodes as soon as their inputs are built, at most `workers` at a time
+    Returns {node: {'start', 'seconds', 'rows'}} for built nodes and {node: error} for failed ones;
+    after a failure nothing new starts (running nodes finish)
+    """
+    results, failed = {}, {}
+    running, started = {}, {}
+    overall_start = time.time()
+    
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        while True:
+            if not failed:
+                ready = [node for node in nodes if node not in results and node not in running.values()
+                         and all(upstream in results for upstream in BUILD_NODES[node]['after'])]
+                for node in ready[:workers - len(running)]:
+                    future = pool.submit(run_node, node, staging_dir, settings, parquet_dir)
+                    running[future] = node
+                    started[node] = time.time() - overall_start
+                    print(f"   ▶ {node:<20} started at {started[node]:>7.1f}s")
+            if not running:
+                break
+            
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    seconds, rows = future.result()
+                except Exception as e:
+                    failed[node] = e
+                    print(f"   ❌ {node:<20} failed: {e}")
+                    continue
+                results[node] = {'start': started[node], 'seconds': seconds, 'rows': rows}
+                print(f"   ✅ {node:<20} done in {seconds:>7.1f}s ({sum(rows.values()):,} rows)")
+    
+    return results, failed
+
+
+def merge_staging(db_path, staging_dir, nodes):
+    """
+    Copy every node's tables into a new database, plus the current database's tables that no node
+    builds, then swap it in for db_path (readers see either the old or the new file)
+    Returns the names of the carried-over tables
+    """
+    db_path = Path(db_path)
+    merged_path = db_path.with_name(db_path.name + '.new')
+    remove_database(merged_path)
+    
+    conn = duckdb.connect(str(merged_path))
+    built = set()
+    for node in nodes:
+        conn.execute(f"ATTACH '{staging_path(staging_dir, node)}' AS {node} (READ_ONLY)")
+        for table in BUILD_NODES[node]['tables']:
+            conn.execute(f"CREATE TABLE {table} AS SELECT * FROM {node}.main.{table}")
+            built.add(table)
+        conn.execute(f"DETACH {node}")
+    
+    carried = []
+    if db_path.exists():
+        conn.execute(f"ATTACH '{db_path}' AS current_db (READ_ONLY)")
+        current = conn.execute("""
+            SELECT table_name FROM duckdb_tables()
+            WHERE database_name = 'current_db' AND schema_name = 'main' AND NOT temporary
+        """).fetchall()
+        for (table,) in current:
+            if table not in built:
+                conn.execute(f"CREATE TABLE {table} AS SELECT * FROM current_db.main.{table}")
+                carried.append(table)
+        conn.execute("DETACH current_db")
+    conn.close()
+    
+    os.replace(merged_path, db_path)
+    # A log left by the old file must not be replayed into the new one
+    db_path.with_name(db_path.name + '.wal').unlink(missing_ok=True)
+    return carried
+
+
+def critical_path(results):
+    """Longest chain of dependent nodes by build time -> (nodes, seconds)"""
+    best = {}
+    for node in BUILD_NODES:
+        if node not in results:
+            continue
+        before = max((best[upstream] for upstream in BUILD_NODES[node]['after'] if upstream in best),
+                     key=lambda chain: chain[1], default=([], 0))
+        best[node] = (before[0] + [node], before[1] + results[node]['seconds'])
+    return max(best.values(), key=lambda chain: chain[1], default=([], 0))
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    
+    parser = argparse.ArgumentParser(description="Build every summary table, independent builders in parallel")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Builders running at once (default: [build] workers)")
+    parser.add_argument('--keep-staging', action='store_true',
+                        help="Keep the staging databases and logs after a successful build")
+    parser.add_argument('--list', action='store_true', help="Print the build graph and exit")
+    args = parser.parse_args()
+    
+    if args.list:
+        for node, spec in BUILD_NODES.items():
+            after = ', '.join(spec['after']) or 'Parquet'
+            print(f"{node:<20} after {after:<10} -> {', '.join(spec['tables'])}")
+        return
+    
+    print("="*70)
+    print("Building Database - All Summary Tables")
+    print("="*70)
+    
+    try:
+        parquet_dir = config['paths']['output_directory']
+        db_path = config['paths']['duckdb_path']
+    except KeyError as e:
+        print(f"❌ Missing config key: {e}")
+        sys.exit(1)
+    
+    workers = args.workers or config.get('build', 'workers', fallback='auto')
+    workers = (os.cpu_count() or 1) if str(workers).strip().lower() == 'auto' else int(workers)
+    workers = max(1, min(workers, len(BUILD_NODES)))
+    staging_dir = Path(config.get('build', 'staging_directory', fallback='./build_staging'))
+    
+    try:
+        # Each running builder gets its share of the [summary] threads and memory
+        settings = load_scan_settings().split(workers)
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        sys.exit(1)
+    
+    if not Path(parquet_dir).exists():
+        print(f"❌ Parquet directory not found: {parquet_dir}")
+        sys.exit(1)
+    
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\n📂 {parquet_dir} -> {db_path} (staging in {staging_dir})")
+    print(f"🔨 {len(BUILD_NODES)} nodes, {workers} at a time")
+    print(f"⚙️  Per builder: {settings.describe()}\n")
+    
+    overall_start = time.time()
+    results, failed = run_graph(list(BUILD_NODES), workers, staging_dir, settings, parquet_dir)
+    
+    if failed:
+        skipped = [node for node in BUILD_NODES if node not in results and node not in failed]
+        print(f"\n❌ Build failed - {db_path} was not changed")
+        for node in failed:
+            print(f"   {node}: see {staging_dir / f'{node}.log'}")
+        if skipped:
+            print(f"   Not built: {', '.join(skipped)}")
+        sys.exit(1)
+    
+    print(f"\n🔄 Merging {len(results)} staging databases into {db_path}...")
+    merge_start = time.time()
+    carried = merge_staging(db_path, staging_dir, list(BUILD_NODES))
+    merge_seconds = time.time() - merge_start
+    overall_elapsed = time.time() - overall_start
+    if carried:
+        print(f"   Kept from the previous database: {', '.join(carried)}")
+    
+    if not args.keep_staging:
+        shutil.rmtree(staging_dir)
+    
+    # Per-node timings: when each started, how long it took, what it wrote
+    print(f"\n{'='*70}")
+    print("TIMINGS")
+    print(f"{'='*70}")
+    print(f"\n{'Node':<20} {'After':<8} {'Start':>8} {'Seconds':>9} {'Rows':>12}")
+    print("-"*61)
+    for node, result in sorted(results.items(), key=lambda item: item[1]['start']):
+        after = ','.join(BUILD_NODES[node]['after']) or '-'
+        print(f"{node:<20} {after:<8} {result['start']:>8.1f} {result['seconds']:>9.1f} "
+              f"{sum(result['rows'].values()):>12,}")
+    print(f"{'merge':<20} {'all':<8} {merge_start - overall_start:>8.1f} {merge_seconds:>9.1f}")
+    
+    chain, chain_seconds = critical_path(results)
+    node_seconds = sum(result['seconds'] for result in results.values())
+    print(f"\n   Wall time: {overall_elapsed:.1f}s (nodes' own times add up to {node_seconds + merge_seconds:.1f}s)")
+    print(f"   Critical path: {' -> '.join(chain)} ({chain_seconds:.1f}s)")
+    
+    print(f"\n{'='*70}")
+    print("✅ Done! All summary tables built - restart API")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Compare Standard vs Compact Parquet Layouts
+Reports on-disk size and DuckDB scan time for the queries the summary builders run
+Convert the same CSVs twice (--layout standard / --layout compact) into two directories first
+"""
+
+import duckdb
+import argparse
+import time
+from pathlib import Path
+
+from utils.parquet_layout import (
+    IP_DIMENSION_FILE, ip_text_sql, parquet_source_sql, partition_file_groups, standard_columns_sql
+)
+
+# Builder-shaped aggregations, written once per layout
+# Compact groups on the uint32 IP and only turns it back into text for the (small) result
+SCAN_QUERIES = {
+    'daily_country': {
+        'standard': """
+            SELECT datetime::DATE as date, country, COUNT(*) as attacks
+            FROM {source} WHERE country IS NOT NULL GROUP BY ALL
+        """,
+        'compact': """
+            SELECT datetime::DATE as date, country, COUNT(*) as attacks
+            FROM {source} WHERE country IS NOT NULL GROUP BY ALL
+        """,
+    },
+    'daily_ip': {
+        'standard': """
+            SELECT datetime::DATE as date, IP, country, asn_name, COUNT(*) as attacks
+            FROM {source} GROUP BY ALL
+        """,
+        'compact': """
+            SELECT date, {ip_text} as IP, country, asn_name, attacks
+            FROM (
+                SELECT datetime::DATE as date, ip_v4, ip_text, country, asn_name, COUNT(*) as attacks
+                FROM {source} GROUP BY ALL
+            ) f
+        """,
+    },
+    'daily_username': {
+        'standard': """
+            SELECT datetime::DATE as date, Username, country, asn_name, COUNT(*) as attacks
+            FROM {source} WHERE country IS NOT NULL GROUP BY ALL
+        """,
+        'compact': """
+            SELECT datetime::DATE as date, Username, country, asn_name, COUNT(*) as attacks
+            FROM {source} WHERE country IS NOT NULL GROUP BY ALL
+        """,
+    },
+    'full_row_scan': {
+        'standard': "SELECT COUNT(*), COUNT(DISTINCT asn_domain), MAX(length(Message)) FROM {source}",
+        'compact': "SELECT COUNT(*), COUNT(DISTINCT asn_domain), MAX(length(Message)) FROM ({standard_view})",
+    },
+}
+
+
+def layout_source(directory):
+    """read_parquet() over every partition file of a layout (month or day partitioned)"""
+    return parquet_source_sql([f for _, files in partition_file_groups(directory) for f in files])
+
+
+def layout_size(directory):
+    """(file count, total bytes) of every Parquet file in a layout"""
+    files = [f for f in Path(directory).rglob('*.parquet')]
+    return len(files), sum(f.stat().st_size for f in files)
+
+
+def time_query(conn, sql, repeats):
+    """Best-of-N wall time for a query whose result is fully materialized"""
+    best = None
+    for _ in range(repeats):
+        start = time.time()
+        conn.execute(f"CREATE OR REPLACE TEMP TABLE scan_result AS {sql}")
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare standard and compact Parquet layouts")
+    parser.add_argument('standard_dir', help="Output directory converted with --layout standard")
+    parser.add_argument('compact_dir', help="Output directory converted with --layout compact")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per query (best time is reported)")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("Parquet Layout Comparison: standard vs compact")
+    print("="*70)
+
+    standard_source = layout_source(args.standard_dir)
+    compact_source = layout_source(args.compact_dir)
+    dimension_path = Path(args.compact_dir) / IP_DIMENSION_FILE
+
+    conn = duckdb.connect()
+
+    # Size
+    rows = conn.execute(f"SELECT COUNT(*) FROM {standard_source}").fetchone()[0]
+    standard_files, standard_bytes = layout_size(args.standard_dir)
+    compact_files, compact_bytes = layout_size(args.compact_dir)
+
+    print(f"\n📦 On-disk size ({rows:,} rows):")
+    print(f"   {'Layout':<12} {'Files':>7} {'MB':>10} {'Bytes/row':>11}")
+    print(f"   {'standard':<12} {standard_files:>7} {standard_bytes/1024**2:>10.1f} {standard_bytes/rows:>11.1f}")
+    print(f"   {'compact':<12} {compact_files:>7} {compact_bytes/1024**2:>10.1f} {compact_bytes/rows:>11.1f}")
+    print(f"   Compact is {compact_bytes/standard_bytes*100:.0f}% of standard (includes {IP_DIMENSION_FILE})")
+
+    # Scan time
+    print(f"\n⏱️  Scan time (best of {args.repeats}):")
+    print(f"   {'Query':<16} {'standard':>10} {'compact':>10} {'speedup':>9}")
+
+    for name, queries in SCAN_QUERIES.items():
+        standard_sql = queries['standard'].format(source=standard_source)
+        compact_sql = queries['compact'].format(
+            source=compact_source,
+            ip_text=ip_text_sql('f'),
+            standard_view=standard_columns_sql(compact_source, dimension_path)
+        )
+
+        standard_time = time_query(conn, standard_sql, args.repeats)
+        compact_time = time_query(conn, compact_sql, args.repeats)
+        print(f"   {name:<16} {standard_time:>9.2f}s {compact_time:>9.2f}s {standard_time/compact_time:>8.2f}x")
+
+    # Sanity check: the compact layout joined back to the dimension must equal the standard rows
+    print("\n🔍 Verifying compact + dimension reproduces the standard rows...")
+    standard_view = standard_columns_sql(compact_source, dimension_path)
+    mismatched = conn.execute(f"""
+        SELECT COUNT(*) FROM (
+            SELECT datetime, IP, Time, continent, country_code, country, latitude, longitude,
+                   asn, asn_name, asn_domain, asn_type, Node, Username, Tag, Message,
+                   event_type, auth_method, invalid_user
+            FROM {standard_source}
+            EXCEPT ALL
+            SELECT datetime, IP, Time, continent, country_code, country, latitude, longitude,
+                   asn, asn_name, asn_domain, asn_type, Node, Username, Tag, Message,
+                   event_type, auth_method, invalid_user
+            FROM ({standard_view})
+        )
+    """).fetchone()[0]
+
+    if mismatched == 0:
+        print("   ✅ Identical")
+    else:
+        print(f"   ⚠️  {mismatched:,} standard rows have no exact match in the compact layout")
+
+    conn.close()
+    print("\n" + "="*70)
+
+
+if __name__ == "__main__":
+    main()
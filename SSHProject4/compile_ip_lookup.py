@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Compile ipinfo.json into the Memory-Mapped IP Lookup
+Run once after ipinfo.json changes - the converter then starts in milliseconds
+(The converter also compiles automatically when the lookup is missing or stale)
+"""
+
+import configparser
+import time
+from pathlib import Path
+
+from utils.ip_lookup import IPLookup, compile_ip_lookup, default_lookup_path
+
+
+def main():
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    
+    try:
+        json_path = config['paths']['json_file']
+    except KeyError as e:
+        print(f"❌ Missing config key: {e}")
+        return
+    
+    lookup_path = config.get('paths', 'ip_lookup', fallback=str(default_lookup_path(json_path)))
+    
+    if not Path(json_path).exists():
+        print(f"❌ JSON file not found: {json_path}")
+        return
+    
+    print("="*70)
+    print("Compile IP Lookup")
+    print("="*70)
+    print(f"\n📂 Source: {json_path}")
+    print(f"📦 Output: {lookup_path}")
+    
+    start = time.time()
+    count = compile_ip_lookup(json_path, lookup_path)
+    print(f"\n✅ Compiled {count:,} IPs in {time.time() - start:.1f}s")
+    
+    start = time.time()
+    lookup = IPLookup(lookup_path)
+    print(f"✅ Memory-mapped in {(time.time() - start) * 1000:.1f} ms "
+          f"({lookup.num_ipv4:,} IPv4 keys, {len(lookup) - lookup.num_ipv4:,} other)")
+    print(f"   File size: {Path(lookup_path).stat().st_size / 1024**2:.1f} MB")
+    
+    print("\n" + "="*70)
+
+
+if __name__ == "__main__":
+    main()
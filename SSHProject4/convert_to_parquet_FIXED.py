@@ -2,160 +2,865 @@
 """
 CSV to Parquet Conversion with IP Enrichment - FIXED VERSION
 Ensures ALL chunks are enriched, not just first chunk per CSV
+Streams CSVs with Arrow's CSV reader; record batches go straight to Parquet (no pandas)
 """
 
-import pandas as pd
 import json
+import os
+import hashlib
+from datetime import datetime
 from pathlib import Path
 import configparser
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
+from utils.chunk_sizing import ChunkSizer, parse_chunk_size
+from utils.daily_tables import (
+    DAILY_TABLES, create_daily_tables, insert_daily_rows, merge_daily_tables, replace_daily_dates
+)
+from utils.dedup import DEDUP_KEY_COLUMNS, DuplicateFilter
+from utils.events import classify_messages, count_event_types, event_columns_sql
+from utils.heavy_hitters import refresh_heavy_hitters
+from utils.ip_lookup import IPLookup, LOOKUP_COLUMNS, compile_ip_lookup, default_lookup_path, lookup_is_current
+from utils.parquet_layout import (
+    COMPACT_COLUMNS, COMPACT_ENRICHMENT_COLUMNS, IP_DIMENSION_FILE, MANIFEST_NAME, PARTITION_GLOBS, SORT_KEYS,
+    ipv4_to_uint32_sql, partition_files_for_dates, split_ip_column, standard_source_sql
+)
+from utils.run_stats import LOG_LEVELS, IngestStats, RunLog, peak_rss_mb
+from utils.summary_sources import changed_dates, load_snapshot, save_snapshot, scan_parquet_files
+from utils.volatile_tables import collect_volatile_keys, existing_volatile_tables, refresh_volatile_keys
+
+# Bumped whenever the Parquet columns change; output written under an older version needs --force
+#   2: event_type, auth_method, invalid_user parsed from Message
+SCHEMA_VERSION = 2
+
+# Rows per row group in sorted (day-partitioned) files - smaller groups mean finer min/max pruning
+SORTED_ROW_GROUP_SIZE = 128 * 1024
+
+# --follow reads at most this many new bytes per CSV per pass (a large backlog is caught up over several passes)
+FOLLOW_MAX_BATCH_BYTES = 256 * 1024 * 1024
+
+# Seconds --follow waits for the database while another process (API, builders) holds it
+DUCKDB_LOCK_RETRIES = 30
+
+# Per-process converter used by pool workers (see convert_parallel)
+_worker_converter = None
+
+# Explicit schema for the honeypot CSVs - Arrow parses straight into these types
+CSV_COLUMN_TYPES = {
+    'Date': pa.int32(),
+    'Time': pa.int64(),
+    'IP': pa.string(),
+    'Node': pa.dictionary(pa.int32(), pa.string()),
+    'Port': pa.int64(),
+    'PID': pa.string(),
+    'Username': pa.string(),
+    'Tag': pa.dictionary(pa.int32(), pa.string()),
+    'Message': pa.string(),
+}
+
+# Source files the converter picks up; compressed logs are decompressed on the fly while Arrow parses
+CSV_SUFFIXES = ['.csv', '.csv.gz', '.csv.zst', '.csv.bz2']
+
+# Text columns where a missing value is written as 'nan' (matches the old pandas astype(str) output)
+TEXT_COLUMNS = ['IP', 'Node', 'PID', 'Username', 'Tag', 'Message']
+
+# Strings Arrow's CSV reader treats as missing (pacsv.ConvertOptions().null_values) - the direct
+# DuckDB path maps the same strings to 'nan' so both paths write identical rows
+CSV_NULL_STRINGS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    'N/A', 'NA', 'NULL', 'NaN', 'n/a', 'nan', 'null'
+]
+
+# Final column order of every Parquet file
+OUTPUT_COLUMNS = [
+    'datetime', 'year', 'month', 'IP', 'Time',
+    'continent', 'country_code', 'country', 'latitude', 'longitude',
+    'asn', 'asn_name', 'asn_domain', 'asn_type',
+    'Node', 'Port', 'PID', 'Username', 'Tag', 'Message',
+    'event_type', 'auth_method', 'invalid_user'
+]
+
+
+def csv_stem(path):
+    """File name without the .csv (and compression) suffix: 20221130.csv.gz -> 20221130"""
+    name = Path(path).name
+    for suffix in sorted(CSV_SUFFIXES, key=len, reverse=True):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return Path(path).stem
+
+
+def find_csv_files(csv_directory):
+    """
+    Every node/date source file, plain or compressed
+    If the same node/date exists in several forms (20221130.csv and 20221130.csv.gz), the first
+    in CSV_SUFFIXES order wins - they would otherwise write the same Parquet file names
+    """
+    csv_directory = Path(csv_directory)
+    found = {}
+    
+    for suffix in CSV_SUFFIXES:
+        for csv_file in sorted(csv_directory.glob(f"*/*{suffix}")):
+            source = (csv_file.parent.name, csv_stem(csv_file))
+            if source in found:
+                print(f"⚠️  Skipping {csv_file.relative_to(csv_directory)}: "
+                      f"{found[source].relative_to(csv_directory)} holds the same node/date")
+                continue
+            found[source] = csv_file
+    
+    return sorted(found.values())
+
+
+def previous_csv_files(csv_files):
+    """
+    Each source file's predecessor: the same node's file before it in date order (None for a node's first)
+    Dedup checks a CSV against its own earlier rows and its predecessor's events - nothing else - so
+    what it drops does not depend on worker count, file order or which files a run reconverts
+    """
+    previous = {}
+    latest = {}
+    
+    for csv_file in sorted(csv_files, key=lambda f: (f.parent.name, csv_stem(f))):
+        previous[csv_file] = latest.get(csv_file.parent.name)
+        latest[csv_file.parent.name] = csv_file
+    
+    return previous
+
+
+def file_fingerprint(path, with_hash=True):
+    """Size, mtime and (optionally) content hash of a source file"""
+    stat = Path(path).stat()
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    
+    if with_hash:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        fingerprint['hash'] = digest.hexdigest()
+    
+    return fingerprint
+
+
+class ConversionManifest:
+    """
+    JSON record of every converted source CSV: size, mtime, hash and the Parquet files it produced
+    Saved after each file so an interrupted run resumes where it stopped
+    """
+    
+    def __init__(self, path, layout='standard', partitioning='month'):
+        self.path = Path(path)
+        self.layout = layout
+        self.partitioning = partitioning
+        self.schema_version = SCHEMA_VERSION
+        self.sources = {}
+        
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.layout = data.get('layout', 'standard')
+            self.partitioning = data.get('partitioning', 'month')
+            self.schema_version = data.get('schema_version', 1)
+            self.sources = data.get('sources', {})
+    
+    def status(self, key, csv_file):
+        """Classify a source CSV as 'new', 'changed' or 'unchanged'"""
+        entry = self.sources.get(key)
+        if entry is None:
+            return 'new'
+        
+        fingerprint = file_fingerprint(csv_file, with_hash=False)
+        if fingerprint['size'] == entry['size'] and fingerprint['mtime_ns'] == entry['mtime_ns']:
+            return 'unchanged'
+        
+        # Size or mtime moved - only the content hash decides (e.g. a touched but identical file)
+        fingerprint = file_fingerprint(csv_file)
+        if fingerprint['size'] == entry['size'] and fingerprint['hash'] == entry['hash']:
+            entry['mtime_ns'] = fingerprint['mtime_ns']
+            self.save()
+            return 'unchanged'
+        
+        return 'changed'
+    
+    def record(self, key, entry):
+        """Store a finished conversion and persist the manifest"""
+        self.sources[key] = entry
+        self.save()
+    
+    def forget(self, key, output_directory):
+        """Delete a source's recorded Parquet outputs and drop its entry; returns files removed"""
+        entry = self.sources.pop(key, None)
+        if entry is None:
+            return 0
+        
+        removed = 0
+        for output in entry['outputs']:
+            output_path = Path(output_directory) / output
+            if output_path.exists():
+                output_path.unlink()
+                removed += 1
+        
+        self.save()
+        return removed
+    
+    def save(self):
+        """Write atomically so a crash never leaves a truncated manifest"""
+        temp_path = self.path.with_suffix('.json.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump({
+                'version': 1,
+                'layout': self.layout,
+                'partitioning': self.partitioning,
+                'schema_version': self.schema_version,
+                'sources': self.sources,
+            }, f, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+class PartitionedParquetWriter:
+    """
+    Keeps one open ParquetWriter per partition directory and appends each chunk as a row group
+    Files roll over to a new sequence number once they reach target_file_size bytes
+    
+    With sort_by set, a partition's rows are buffered instead (up to sort_buffer bytes in memory)
+    and every flush is sorted and written as its own file of row_group_size-row groups,
+    so each row group covers a narrow range of the sort columns
+    """
+    
+    def __init__(self, output_directory, file_prefix, compression='snappy', target_file_size=256 * 1024 * 1024,
+                 sort_by=None, sort_buffer=512 * 1024 * 1024, row_group_size=None):
+        self.output_directory = Path(output_directory)
+        self.file_prefix = file_prefix
+        self.compression = compression
+        self.target_file_size = target_file_size
+        self.sort_by = sort_by
+        self.sort_buffer = sort_buffer
+        self.row_group_size = row_group_size
+        
+        self.open_files = {}  # partition -> (writer, sink, temp_path, final_path)
+        self.buffers = {}     # partition -> tables waiting to be sorted (sort_by only)
+        self.sequence = {}    # partition -> next file number
+        self.output_files = []
+    
+    def write(self, partition, table):
+        """Append a table to a partition (relative directory such as 'year=2022/month=11')"""
+        if self.sort_by:
+            buffered = self.buffers.setdefault(partition, [])
+            buffered.append(table)
+            if sum(t.nbytes for t in buffered) >= self.sort_buffer:
+                self._flush_sorted(partition)
+            return
+        
+        if partition not in self.open_files:
+            self._open(partition, table.schema)
+        
+        writer, sink, _, _ = self.open_files[partition]
+        writer.write_table(table)
+        
+        if sink.tell() >= self.target_file_size:
+            self._close(partition)
+    
+    def close(self):
+        """Finish every open file and return the list of Parquet files written"""
+        for partition in list(self.buffers):
+            self._flush_sorted(partition)
+        for partition in list(self.open_files):
+            self._close(partition)
+        return self.output_files
+    
+    def abort(self):
+        """Discard unfinished files (already finished files are kept)"""
+        for writer, sink, temp_path, _ in self.open_files.values():
+            try:
+                writer.close()
+            finally:
+                sink.close()
+                temp_path.unlink(missing_ok=True)
+        self.open_files = {}
+        self.buffers = {}
+    
+    def _flush_sorted(self, partition):
+        table = pa.concat_tables(self.buffers.pop(partition)).sort_by(self.sort_by)
+        
+        self._open(partition, table.schema)
+        writer, _, _, _ = self.open_files[partition]
+        writer.write_table(table, row_group_size=self.row_group_size)
+        self._close(partition)
+    
+    def _open(self, partition, schema):
+        partition_dir = self.output_directory / partition
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        
+        sequence = self.sequence.get(partition, 0)
+        self.sequence[partition] = sequence + 1
+        
+        # Write under a temporary name so readers never see a file without a footer
+        final_path = partition_dir / f"{self.file_prefix}_{sequence:04d}.parquet"
+        temp_path = final_path.with_suffix('.parquet.tmp')
+        
+        sink = pa.OSFile(str(temp_path), 'wb')
+        writer = pq.ParquetWriter(sink, schema, compression=self.compression)
+        self.open_files[partition] = (writer, sink, temp_path, final_path)
+    
+    def _close(self, partition):
+        writer, sink, temp_path, final_path = self.open_files.pop(partition)
+        writer.close()
+        sink.close()
+        temp_path.replace(final_path)
+        self.output_files.append(final_path)
+
+
 class CSVToParquetConverter:
-    def __init__(self, json_path, csv_directory, output_directory, chunk_size=100000, compression='snappy'):
+    def __init__(self, json_path, csv_directory, output_directory, chunk_size=100000, compression='snappy',
+                 workers=1, target_file_size_mb=256, layout='standard', partitioning='month', sort_buffer_mb=512,
+                 lookup_path=None, ip_lookup=None, log_level='file', run_log_path=None, dedup=True,
+                 dedup_memory_mb=256, chunk_memory_mb=256):
         """
         Initialize converter with IP enrichment
+        chunk_size is rows per chunk, or 'auto' to size chunks to chunk_memory_mb (see utils/chunk_sizing.py)
+        layout is 'standard' (all columns as strings/floats) or 'compact' (see utils/parquet_layout.py)
+        partitioning is 'month' (year=/month=, CSV order) or 'day' (date=, sorted by IP and Time)
+        dedup drops events repeated within a CSV or from the node's previous CSV, in dedup_memory_mb of hashes
+        (see previous_csv_files and utils/dedup.py)
+        log_level is 'quiet', 'file' or 'chunk' (see utils/run_stats.py); run_log_path gets JSON-lines stats
+        IP data comes from the memory-mapped lookup compiled from ipinfo.json (see compile_ip_lookup.py)
         """
         self.json_path = Path(json_path)
         self.csv_directory = Path(csv_directory)
         self.output_directory = Path(output_directory)
         self.chunk_size = chunk_size
+        self.chunk_memory_mb = chunk_memory_mb
+        self.chunk_sizer = ChunkSizer(chunk_size, chunk_memory_mb)
         self.compression = compression
+        self.workers = workers
+        self.target_file_size_mb = target_file_size_mb
+        self.layout = layout
+        self.partitioning = partitioning
+        self.sort_buffer_mb = sort_buffer_mb
+        self.log_level = log_level
+        self.verbose = log_level == 'chunk'
+        self.run_log_path = run_log_path
+        self.dedup = dedup
+        self.dedup_memory_mb = dedup_memory_mb
         
-        # Load IP enrichment data
-        print(f"Loading IP lookup data from {json_path}...")
-        with open(self.json_path, 'r') as f:
-            self.ip_data = json.load(f)
-        print(f"✅ Loaded {len(self.ip_data):,} IP addresses")
+        # Stage timers and counters of the file being converted (reset by convert_source)
+        self.stats = IngestStats()
         
-    def enrich_row_with_ip_data(self, ip):
-        """Enrich a row with IP geolocation and ASN data"""
+        # Events of the CSV being converted and of the node's previous CSV (a day's events repeated in the
+        # next day's export); each filter gets half the budget (see start_dedup_scope)
+        self.dedup_scope_mb = max(1, dedup_memory_mb // 2)
+        self.duplicate_filter = DuplicateFilter(self.dedup_scope_mb) if dedup else None
+        self.previous_events = None
+        self.events_source = None  # CSV whose events duplicate_filter holds in full, once converted
+        self.hash_conn = duckdb.connect() if dedup else None
         
-        def safe_float(value):
-            """Safely convert to float"""
-            if value is None:
-                return None
-            if isinstance(value, (int, float)):
-                return float(value)
-            if isinstance(value, str):
-                value = value.strip()
-                if value.lower() in ('nan', 'none', '', 'null'):
-                    return None
-                try:
-                    return float(value)
-                except (ValueError, TypeError):
-                    return None
-            return None
-        
-        # Return default values if IP not in lookup
-        if ip not in self.ip_data:
-            return {
-                'continent': None,
-                'country_code': None,
-                'country': None,
-                'latitude': None,
-                'longitude': None,
-                'asn': None,
-                'asn_name': None,
-                'asn_domain': None,
-                'asn_type': None
-            }
-        
-        ip_info = self.ip_data[ip]
-        asn_info = ip_info.get('asn', {})
-        
-        return {
-            'continent': ip_info.get('cntn', None),
-            'country_code': ip_info.get('cc', None),
-            'country': ip_info.get('cn', None),
-            'latitude': safe_float(ip_info.get('lat')),
-            'longitude': safe_float(ip_info.get('lng')),
-            'asn': asn_info.get('asn', None),
-            'asn_name': asn_info.get('name', None),
-            'asn_domain': asn_info.get('domain', None),
-            'asn_type': asn_info.get('type', None)
+        self.lookup_path = Path(lookup_path) if lookup_path else default_lookup_path(json_path)
+        
+        if ip_lookup is not None:
+            self.ip_lookup = ip_lookup
+            return
+        
+        # Compile ipinfo.json once; later runs just memory-map the result
+        if not lookup_is_current(self.json_path, self.lookup_path):
+            print(f"Compiling IP lookup {self.lookup_path} from {json_path} (one-time)...")
+            compiled = compile_ip_lookup(self.json_path, self.lookup_path)
+            print(f"✅ Compiled {compiled:,} IP addresses")
+        
+        load_start = time.time()
+        self.ip_lookup = IPLookup(self.lookup_path)
+        print(f"✅ Memory-mapped IP lookup: {len(self.ip_lookup):,} IPs in {(time.time() - load_start) * 1000:.1f} ms")
+    
+    def enrich_chunk(self, chunk):
+        """Enrich a chunk with IP geolocation and ASN data via vectorized lookups"""
+        # Binary search of every row's IP in the lookup; unknown IPs get a null position
+        positions = self.ip_lookup.find(chunk['IP'])
+        self.stats.count('rows_enriched', len(positions))
+        self.stats.count('ip_hits', len(positions) - positions.null_count)
+        
+        for col in LOOKUP_COLUMNS:
+            values = self.ip_lookup.take(col, positions)
+            if pa.types.is_dictionary(values.type):
+                values = pc.cast(values, pa.string())
+            chunk = chunk.append_column(col, values)
+        return chunk
+    
+    def event_hashes(self, chunk):
+        """(Date, 64-bit event hash) arrays over a chunk's rows"""
+        keys = chunk.select(DEDUP_KEY_COLUMNS)
+        node_index = keys.schema.get_field_index('Node')
+        keys = keys.set_column(node_index, 'Node', pc.cast(keys['Node'], pa.string()))
+        
+        # DuckDB's vectorized hash() over the Arrow columns, zero-copy
+        self.hash_conn.register('dedup_keys', keys)
+        try:
+            hashes = self.hash_conn.execute(
+                f"SELECT hash({', '.join(DEDUP_KEY_COLUMNS)}) as event_hash FROM dedup_keys"
+            ).fetchnumpy()['event_hash']
+        finally:
+            self.hash_conn.unregister('dedup_keys')
+        
+        return pc.fill_null(chunk['Date'], -1).to_numpy(), hashes
+    
+    def drop_duplicates(self, chunk):
+        """
+        Remove rows whose event (DEDUP_KEY_COLUMNS) appeared earlier in this CSV or anywhere in
+        the node's previous CSV (see start_dedup_scope)
+        Events match by 64-bit hash only, so a distinct event is dropped on a hash collision
+        (~1 in 10^7 per day at 2M events/day, see DuplicateFilter)
+        """
+        days, hashes = self.event_hashes(chunk)
+        
+        evicted_before = self.duplicate_filter.evicted_days
+        duplicate = self.duplicate_filter.duplicate_mask(days, hashes)
+        self.stats.count('dedup_evicted_days', self.duplicate_filter.evicted_days - evicted_before)
+        
+        if self.previous_events is not None:
+            duplicate |= self.previous_events.seen_mask(days, hashes)
+        
+        return chunk.filter(pa.array(~duplicate))
+    
+    def read_events(self, csv_path):
+        """
+        Every event of a CSV (a path or an Arrow stream), hashed exactly as process_csv_file does
+        but not converted; returns the DuplicateFilter holding them
+        """
+        events = DuplicateFilter(self.dedup_scope_mb)
+        
+        for chunk in self.read_csv_chunks(csv_path):
+            with self.stats.stage('dedup'):
+                events.duplicate_mask(*self.event_hashes(self.fill_missing(chunk)))
+        
+        return events
+    
+    def start_dedup_scope(self, previous_file):
+        """
+        Reset dedup for the next CSV: its rows are checked against its own earlier rows and every
+        event of previous_file (the node's previous CSV, see previous_csv_files)
+        The predecessor's events are reused when this converter has just converted it, else re-read
+        """
+        if previous_file is None:
+            self.previous_events = None
+        elif self.events_source == Path(previous_file):
+            self.previous_events = self.duplicate_filter
+        else:
+            self.previous_events = self.read_events(previous_file)
+        
+        self.duplicate_filter = DuplicateFilter(self.dedup_scope_mb)
+        self.events_source = None
+    
+    def compact_chunk(self, chunk):
+        """
+        Narrow an enriched chunk to the compact layout
+        uint32 IPv4, small ints, dictionary-encoded dimensions; other enrichment lives in the IP dimension file
+        """
+        ip_v4, ip_text = split_ip_column(chunk['IP'])
+        
+        # PID is free text in the CSV; anything that is not a plain integer becomes null
+        pid = chunk['PID']
+        pid = pc.if_else(pc.match_substring_regex(pid, r'^\d{1,9}$'), pid, pa.scalar(None, pa.string()))
+        
+        port = chunk['Port']
+        port = pc.if_else(pc.and_(pc.greater_equal(port, 0), pc.less_equal(port, 65535)), port, None)
+        
+        columns = {
+            'datetime': chunk['datetime'],
+            'year': pc.cast(chunk['year'], pa.int16()),
+            'month': pc.cast(chunk['month'], pa.int8()),
+            'ip_v4': ip_v4,
+            'ip_text': ip_text,
+            'Time': chunk['Time'],
+            'Node': chunk['Node'],
+            'Port': pc.cast(port, pa.uint16()),
+            'PID': pc.cast(pid, pa.int32()),
+            'Username': chunk['Username'],
+            'Tag': chunk['Tag'],
+            'Message': chunk['Message'],
+            'event_type': chunk['event_type'],
+            'auth_method': pc.dictionary_encode(chunk['auth_method']),
+            'invalid_user': chunk['invalid_user'],
         }
+        for col in COMPACT_ENRICHMENT_COLUMNS:
+            columns[col] = pc.dictionary_encode(chunk[col])
+        
+        return pa.table({col: columns[col] for col in COMPACT_COLUMNS})
+    
+    def write_ip_dimension_file(self):
+        """Write the IP dimension used to join enrichment back onto compact fact rows"""
+        dimension = self.ip_lookup.table.select(['ip_v4', 'ip_text', *LOOKUP_COLUMNS])
+        pq.write_table(dimension, self.output_directory / IP_DIMENSION_FILE, compression=self.compression)
+    
+    def read_csv_chunks(self, csv_path):
+        """Stream a CSV (a path, or an Arrow stream such as a tailed byte range) as Arrow tables of the sizer's current row count"""
+        # .gz/.zst/.bz2 are decoded as a stream (no scratch copy); Arrow's reader pulls blocks on its
+        # I/O thread, so decompression of the next block overlaps parsing of the current one
+        if isinstance(csv_path, pa.NativeFile):
+            stream = csv_path
+        else:
+            stream = pa.input_stream(str(csv_path), compression='detect', buffer_size=4 * 1024 * 1024)
+        
+        with stream as source:
+            reader = pacsv.open_csv(
+                source,
+                convert_options=pacsv.ConvertOptions(
+                    column_types=CSV_COLUMN_TYPES,
+                    strings_can_be_null=True
+                )
+            )
+            
+            pending = []
+            pending_rows = 0
+            
+            batches = iter(reader)
+            while True:
+                # Arrow parses ahead on its own threads - this is the time spent waiting on it
+                with self.stats.stage('parse'):
+                    batch = next(batches, None)
+                if batch is None:
+                    break
+                
+                pending.append(batch)
+                pending_rows += batch.num_rows
+                
+                if pending_rows >= self.chunk_sizer.rows:
+                    yield pa.Table.from_batches(pending)
+                    pending = []
+                    pending_rows = 0
+            
+            if pending_rows > 0:
+                yield pa.Table.from_batches(pending)
+    
+    def fill_missing(self, chunk):
+        """Missing Time/Port become 0 and missing text 'nan'"""
+        for col in ['Time', 'Port']:
+            chunk = chunk.set_column(chunk.schema.get_field_index(col), col, pc.fill_null(chunk[col], 0))
+        
+        for col in TEXT_COLUMNS:
+            chunk = chunk.set_column(chunk.schema.get_field_index(col), col, pc.fill_null(chunk[col], 'nan'))
+        return chunk
     
     def process_csv_file(self, csv_path):
         """
-        Process a single CSV file in chunks and yield enriched dataframes
+        Process a single CSV file in chunks and yield enriched Arrow tables
         FIXED: Enriches EVERY chunk, not just first one
         """
-        csv_path = Path(csv_path)
-        
         # Read CSV in chunks
         chunk_num = 0
         enriched_chunks = 0
         
-        for chunk in pd.read_csv(csv_path, chunksize=self.chunk_size, low_memory=False):
+        for chunk in self.read_csv_chunks(csv_path):
             chunk_num += 1
+            self.stats.count('rows_read', chunk.num_rows)
             
-            # Convert datetime
-            chunk['datetime'] = pd.to_datetime(
-                chunk['Date'].astype(str), 
-                format='%Y%m%d', 
-                errors='coerce'
-            )
-            
-            # Extract year and month for partitioning
-            chunk['year'] = chunk['datetime'].dt.year
-            chunk['month'] = chunk['datetime'].dt.month
-            
-            # Fix data types
-            chunk['Time'] = pd.to_numeric(chunk['Time'], errors='coerce').fillna(0).astype('int64')
-            chunk['Port'] = pd.to_numeric(chunk['Port'], errors='coerce').fillna(0).astype('int64')
+            with self.stats.stage('coerce'):
+                # Convert datetime (YYYYMMDD integer -> timestamp, invalid dates become null)
+                datetime_col = pc.strptime(
+                    pc.cast(chunk['Date'], pa.string()),
+                    format='%Y%m%d',
+                    unit='us',
+                    error_is_null=True
+                )
+                
+                # Extract year and month for partitioning
+                chunk = chunk.append_column('datetime', datetime_col)
+                chunk = chunk.append_column('year', pc.cast(pc.year(datetime_col), pa.int32()))
+                chunk = chunk.append_column('month', pc.cast(pc.month(datetime_col), pa.int32()))
+                
+                # Fix data types
+                chunk = self.fill_missing(chunk)
             
-            # Ensure string columns are strings
-            for col in ['IP', 'Node', 'PID', 'Username', 'Tag', 'Message']:
-                chunk[col] = chunk[col].astype(str)
+            # Overlapping exports repeat events - drop them before they cost enrichment and writes
+            if self.duplicate_filter is not None:
+                with self.stats.stage('dedup'):
+                    deduped = self.drop_duplicates(chunk)
+                self.stats.count('duplicates', chunk.num_rows - deduped.num_rows)
+                chunk = deduped
+                if chunk.num_rows == 0:
+                    continue
             
             # **CRITICAL: Enrich with IP data for EVERY chunk**
             try:
-                print(f"      Enriching chunk {chunk_num} ({len(chunk)} rows)...")
-                ip_enrichment = chunk['IP'].apply(self.enrich_row_with_ip_data)
-                enrichment_df = pd.DataFrame(ip_enrichment.tolist(), index=chunk.index)  # FIX: Preserve index!
+                if self.verbose:
+                    print(f"      Enriching chunk {chunk_num} ({chunk.num_rows} rows)...")
+                with self.stats.stage('enrich'):
+                    enriched_chunk = self.enrich_chunk(chunk)
                 
                 # Verify enrichment worked
-                non_null_country = enrichment_df['country'].notna().sum()
-                print(f"      ✅ Enriched: {non_null_country}/{len(chunk)} rows have country data")
+                non_null_country = chunk.num_rows - enriched_chunk['country'].null_count
+                if self.verbose:
+                    print(f"      ✅ Enriched: {non_null_country}/{chunk.num_rows} rows have country data")
                 
                 if non_null_country == 0:
-                    print(f"      ⚠️  WARNING: No IPs matched in lookup for this chunk!")
+                    if self.log_level != 'quiet':
+                        print(f"      ⚠️  WARNING: No IPs matched in lookup for this chunk!")
                 else:
                     enriched_chunks += 1
                 
-                # Combine original data with enrichment
-                enriched_chunk = pd.concat([chunk, enrichment_df], axis=1)
-                
             except Exception as e:
                 print(f"      ❌ ERROR enriching chunk {chunk_num}: {e}")
                 print(f"      Continuing without enrichment for this chunk...")
                 # Create empty enrichment columns
-                enriched_chunk = chunk.copy()
-                for col in ['continent', 'country_code', 'country', 'latitude', 'longitude', 
-                           'asn', 'asn_name', 'asn_domain', 'asn_type']:
-                    enriched_chunk[col] = None
+                enriched_chunk = chunk
+                for col in LOOKUP_COLUMNS:
+                    col_type = pa.float64() if col in ('latitude', 'longitude') else pa.string()
+                    enriched_chunk = enriched_chunk.append_column(col, pa.nulls(chunk.num_rows, col_type))
             
-            # Drop the original Date column
-            enriched_chunk = enriched_chunk.drop(columns=['Date'])
+            # Structured event columns parsed from Message (see utils/events.py)
+            with self.stats.stage('events'):
+                event_type, auth_method, invalid_user = classify_messages(enriched_chunk['Message'])
+                enriched_chunk = enriched_chunk.append_column('event_type', event_type)
+                enriched_chunk = enriched_chunk.append_column('auth_method', auth_method)
+                enriched_chunk = enriched_chunk.append_column('invalid_user', invalid_user)
+            for name, count in count_event_types(event_type).items():
+                self.stats.count(f"event_{name}", count)
             
-            # Reorder columns
-            column_order = [
-                'datetime', 'year', 'month', 'IP', 'Time',
-                'continent', 'country_code', 'country', 'latitude', 'longitude',
-                'asn', 'asn_name', 'asn_domain', 'asn_type',
-                'Node', 'Port', 'PID', 'Username', 'Tag', 'Message'
-            ]
-            enriched_chunk = enriched_chunk[column_order]
+            # Drop the original Date column and reorder
+            with self.stats.stage('layout'):
+                if self.layout == 'compact':
+                    output_chunk = self.compact_chunk(enriched_chunk)
+                else:
+                    output_chunk = enriched_chunk.select(OUTPUT_COLUMNS)
+            
+            # What this chunk held in memory (parsed rows + enriched output) sizes the next one
+            self.chunk_sizer.observe(chunk.num_rows, chunk.nbytes + output_chunk.nbytes)
+            self.stats.count('chunks')
+            if self.verbose and self.chunk_sizer.adaptive:
+                print(f"      📏 {self.chunk_sizer.bytes_per_row:,.0f} bytes/row -> "
+                      f"next chunk {self.chunk_sizer.rows:,} rows")
+            yield output_chunk
+        
+        if self.verbose:
+            print(f"   📊 Total chunks: {chunk_num}, Successfully enriched: {enriched_chunks}")
+    
+    def convert_file(self, csv_file, source=None, file_prefix=None):
+        """
+        Convert one CSV file to partitioned Parquet
+        source replaces the file's contents (e.g. only newly appended lines) and file_prefix the
+        default data_{node}_{date} output name
+        Returns (rows written, list of Parquet files written)
+        """
+        csv_file = Path(csv_file)
+        
+        # Node name keeps files from different honeypots with the same date stem apart
+        node = csv_file.parent.name
+        
+        # Day partitions are sorted so row-group statistics on IP are tight
+        sorted_output = self.partitioning == 'day'
+        
+        writer = PartitionedParquetWriter(
+            self.output_directory,
+            file_prefix=file_prefix or f"data_{node}_{csv_stem(csv_file)}",
+            compression=self.compression,
+            target_file_size=self.target_file_size_mb * 1024 * 1024,
+            sort_by=SORT_KEYS[self.layout] if sorted_output else None,
+            sort_buffer=self.sort_buffer_mb * 1024 * 1024,
+            row_group_size=SORTED_ROW_GROUP_SIZE if sorted_output else None
+        )
+        
+        file_rows = 0
+        
+        try:
+            # Process CSV in chunks and append each partition's rows as a row group
+            for enriched_chunk in self.process_csv_file(csv_file if source is None else source):
+                with self.stats.stage('partition'):
+                    groups = list(self.split_partitions(enriched_chunk))
+                
+                with self.stats.stage('write'):
+                    for partition, group in groups:
+                        writer.write(partition, group)
+                        file_rows += group.num_rows
             
-            yield enriched_chunk
+            with self.stats.stage('write'):
+                output_files = writer.close()
+        except Exception:
+            writer.abort()
+            raise
+        
+        self.stats.count('rows_written', file_rows)
+        self.stats.count('files_written', len(output_files))
+        self.stats.count('bytes_written', sum(output.stat().st_size for output in output_files))
+        
+        return file_rows, output_files
+    
+    def split_partitions(self, chunk):
+        """Yield (partition directory, rows) for a chunk; rows with an unparseable Date are dropped"""
+        if self.partitioning == 'day':
+            partition_key = pc.cast(chunk['datetime'], pa.date32())
+            for day in pc.unique(partition_key).drop_null().to_pylist():
+                yield f"date={day.isoformat()}", chunk.filter(pc.equal(partition_key, pa.scalar(day, pa.date32())))
+            return
         
-        print(f"   📊 Total chunks: {chunk_num}, Successfully enriched: {enriched_chunks}")
+        partition_key = pc.add(pc.multiply(chunk['year'], 100), chunk['month'])
+        for key in pc.unique(partition_key).drop_null().to_pylist():
+            year, month = divmod(key, 100)
+            yield f"year={year}/month={month}", chunk.filter(pc.equal(partition_key, key))
     
-    def convert(self):
-        """Convert all CSV files to partitioned Parquet with IP enrichment"""
+    def convert_source(self, csv_file, previous_file=None):
+        """
+        Fingerprint, clean up and convert one CSV
+        previous_file is the node's CSV before it (see previous_csv_files), whose events dedup also drops
+        Returns (manifest entry, stats dict)
+        """
+        csv_file = Path(csv_file)
+        self.stats = IngestStats()
+        
+        # Fingerprint before reading so a file modified mid-conversion is picked up next run
+        with self.stats.stage('fingerprint'):
+            fingerprint = file_fingerprint(csv_file)
+        self.stats.count('bytes_read', fingerprint['size'])
+        
+        # Outputs left behind by an interrupted run (or unrecorded --follow micro-batches) - remove them first
+        prefix = f"{PARTITION_GLOBS[self.partitioning]}/data_{csv_file.parent.name}_{csv_stem(csv_file)}"
+        for stale_pattern in [f"{prefix}_[0-9][0-9][0-9][0-9].parquet", f"{prefix}_at*.parquet"]:
+            for stale_file in self.output_directory.glob(stale_pattern):
+                stale_file.unlink()
+        
+        if self.dedup:
+            self.start_dedup_scope(previous_file)
         
-        # Find all CSV files
-        csv_files = list(self.csv_directory.glob('*/*.csv'))
+        file_rows, output_files = self.convert_file(csv_file)
+        self.events_source = csv_file
+        
+        entry = {
+            **fingerprint,
+            'rows': file_rows,
+            'duplicates': self.stats.counters.get('duplicates', 0),
+            'outputs': [output.relative_to(self.output_directory).as_posix() for output in output_files],
+            'converted_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        return entry, self.stats.to_dict()
+    
+    def dedup_chains(self, csv_files, previous):
+        """
+        Split (key, csv_file) pairs into pool tasks of one node's consecutive CSVs in date order, so a
+        worker reuses each file's events as the next one's predecessor instead of re-reading it
+        Long runs are cut into ~4 tasks per worker to keep the pool busy; each cut costs one re-read
+        Returns lists of (key, csv_file, previous_file)
+        """
+        if not self.dedup:
+            return [[(key, csv_file, None)] for key, csv_file in csv_files]
+        
+        longest = max(1, -(-len(csv_files) // (self.workers * 4)))
+        chains = []
+        
+        for key, csv_file in csv_files:
+            previous_file = previous.get(csv_file)
+            chain = chains[-1] if chains else None
+            if chain is None or len(chain) >= longest or chain[-1][1] != previous_file:
+                chain = []
+                chains.append(chain)
+            chain.append((key, csv_file, previous_file))
+        
+        return chains
+    
+    def convert_parallel(self, csv_files, previous, on_converted):
+        """
+        Convert CSV files across a pool of worker processes
+        Every worker memory-maps the same compiled IP lookup file instead of reloading ipinfo.json
+        previous maps each CSV to its node's previous CSV (see previous_csv_files and dedup_chains)
+        on_converted(key, entry, stats) runs in this process as each file finishes
+        """
+        worker_kwargs = {
+            'json_path': self.json_path,
+            'csv_directory': self.csv_directory,
+            'output_directory': self.output_directory,
+            'chunk_size': self.chunk_size,
+            # Every worker holds its own chunk - split the budget so the pool stays within it
+            'chunk_memory_mb': max(1, self.chunk_memory_mb // self.workers),
+            'compression': self.compression,
+            'target_file_size_mb': self.target_file_size_mb,
+            'layout': self.layout,
+            'partitioning': self.partitioning,
+            'sort_buffer_mb': self.sort_buffer_mb,
+            'lookup_path': self.lookup_path,
+            'log_level': self.log_level,
+            'dedup': self.dedup,
+            'dedup_memory_mb': self.dedup_memory_mb,
+        }
+        
+        print(f"👷 Workers: {self.workers}")
+        
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(worker_kwargs,)
+        ) as executor:
+            futures = {executor.submit(_convert_chain_in_worker, [(csv_file, previous_file)
+                                                                   for _, csv_file, previous_file in chain]): chain
+                       for chain in self.dedup_chains(csv_files, previous)}
+            
+            with tqdm(total=len(csv_files), desc="Converting files") as progress:
+                for future in as_completed(futures):
+                    chain = futures[future]
+                    progress.update(len(chain))
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = [e] * len(chain)
+                    
+                    for (key, _, _), result in zip(chain, results):
+                        if isinstance(result, Exception):
+                            print(f"\n   ❌ Error processing {key}: {result}")
+                            continue
+                        on_converted(key, *result)
+    
+    def open_output(self, force=False):
+        """
+        Prepare output_directory and load its manifest
+        Returns None if the directory holds another layout/partitioning and force is not set
+        """
+        # Create output directory
+        self.output_directory.mkdir(parents=True, exist_ok=True)
+        
+        # Files still named *.parquet.tmp were being written when a previous run stopped
+        for unfinished in self.output_directory.glob(f"{PARTITION_GLOBS[self.partitioning]}/*.parquet.tmp"):
+            unfinished.unlink()
+        
+        manifest = ConversionManifest(self.output_directory / MANIFEST_NAME, layout=self.layout,
+                                      partitioning=self.partitioning)
+        
+        # Mixing layouts, partitionings or column sets in one output directory would break every reader
+        if (manifest.layout, manifest.partitioning) != (self.layout, self.partitioning):
+            if not force:
+                print(f"❌ {self.output_directory} holds '{manifest.layout}' layout files partitioned by "
+                      f"{manifest.partitioning}; use --force to rewrite it as '{self.layout}' by "
+                      f"{self.partitioning} or pick another output_directory")
+                return None
+        elif manifest.schema_version != SCHEMA_VERSION and manifest.sources:
+            if not force:
+                print(f"❌ {self.output_directory} was written with Parquet schema v{manifest.schema_version} "
+                      f"(current: v{SCHEMA_VERSION}); use --force to reconvert it")
+                return None
+        
+        if (manifest.layout, manifest.partitioning, manifest.schema_version) != \
+                (self.layout, self.partitioning, SCHEMA_VERSION):
+            for key in list(manifest.sources):
+                manifest.forget(key, self.output_directory)
+            manifest.layout = self.layout
+            manifest.partitioning = self.partitioning
+            manifest.schema_version = SCHEMA_VERSION
+            manifest.save()
+        
+        if self.layout == 'compact':
+            self.write_ip_dimension_file()
+        
+        return manifest
+    
+    def convert(self, force=False):
+        """
+        Convert new or changed CSV files to partitioned Parquet with IP enrichment
+        force=True reconverts everything regardless of the manifest
+        """
+        
+        # Find all CSV files (.csv, .csv.gz, .csv.zst, .csv.bz2)
+        csv_files = find_csv_files(self.csv_directory)
         
         if not csv_files:
             print("❌ No CSV files found")
@@ -164,68 +869,829 @@ class CSVToParquetConverter:
         print(f"\n📂 Found {len(csv_files)} CSV files")
         print(f"📦 Output directory: {self.output_directory}")
         print(f"🗜️  Compression: {self.compression}")
-        print(f"📏 Chunk size: {self.chunk_size:,} rows")
+        if self.chunk_sizer.adaptive:
+            per_worker = f", {self.chunk_memory_mb // self.workers:,} MB per worker" if self.workers > 1 else ""
+            print(f"📏 Chunk size: auto ({self.chunk_memory_mb:,} MB budget{per_worker})")
+        else:
+            print(f"📏 Chunk size: {self.chunk_size:,} rows")
+        print(f"📐 Target file size: {self.target_file_size_mb} MB")
+        print(f"🧱 Layout: {self.layout}")
+        print(f"🗂️  Partitioning: {self.partitioning}" + (" (sorted by IP, Time)" if self.partitioning == 'day' else ""))
+        
+        # Decide what needs converting
+        manifest = self.open_output(force)
+        if manifest is None:
+            return
+        
+        to_convert = []
+        counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+        stale_removed = 0
+        
+        for csv_file in sorted(csv_files):
+            key = csv_file.relative_to(self.csv_directory).as_posix()
+            status = 'changed' if force and key in manifest.sources else manifest.status(key, csv_file)
+            counts[status] += 1
+            
+            if status == 'unchanged':
+                continue
+            if status == 'changed':
+                stale_removed += manifest.forget(key, self.output_directory)
+            to_convert.append((key, csv_file))
+        
+        # What dedup drops from a CSV depends on the node's previous CSV - reconvert the one after each
+        # new or changed file too, so an incremental run matches a full one
+        previous = previous_csv_files(csv_files)
+        requeued = 0
+        if self.dedup:
+            following = {previous_file: csv_file for csv_file, previous_file in previous.items() if previous_file}
+            queued = {csv_file for _, csv_file in to_convert}
+            for _, csv_file in list(to_convert):
+                next_file = following.get(csv_file)
+                if next_file is None or next_file in queued:
+                    continue
+                key = next_file.relative_to(self.csv_directory).as_posix()
+                stale_removed += manifest.forget(key, self.output_directory)
+                to_convert.append((key, next_file))
+                queued.add(next_file)
+                requeued += 1
+            to_convert.sort(key=lambda item: item[1])
+        
+        print(f"📋 Manifest: {counts['new']} new, {counts['changed']} changed, {counts['unchanged']} unchanged")
+        if requeued:
+            print(f"🔁 Reconverting {requeued} unchanged CSVs whose node's previous CSV changed (dedup)")
+        if stale_removed:
+            print(f"🗑️  Removed {stale_removed} stale Parquet files from changed CSVs")
+        
+        if not to_convert:
+            print("✅ Nothing to convert - output is up to date")
+            return
+        
+        run_stats = IngestStats()
+        run_log = RunLog(self.run_log_path)
+        
+        def on_converted(key, entry, stats):
+            manifest.record(key, entry)
+            run_stats.merge(stats)
+            run_log.write('file', source=key, rows=entry['rows'], duplicates=entry.get('duplicates', 0),
+                          outputs=len(entry['outputs']), **stats)
+            if self.log_level != 'quiet':
+                duplicates = f", {entry['duplicates']:,} duplicates dropped" if entry.get('duplicates') else ""
+                print(f"\n   ✅ {key}: {entry['rows']:,} rows in {len(entry['outputs'])} files{duplicates}")
+        
+        start_time = time.time()
+        
+        if self.workers > 1:
+            self.convert_parallel(to_convert, previous, on_converted)
+        else:
+            # Process each CSV file
+            for key, csv_file in tqdm(to_convert, desc="Converting files", disable=self.log_level == 'quiet'):
+                if self.verbose:
+                    print(f"\n📄 Processing: {key}")
+                
+                try:
+                    entry, stats = self.convert_source(csv_file, previous[csv_file])
+                except Exception as e:
+                    print(f"   ❌ Error processing {key}: {e}")
+                    continue
+                
+                on_converted(key, entry, stats)
+        
+        elapsed = time.time() - start_time
+        total_rows = run_stats.counters.get('rows_written', 0)
+        rate = total_rows / elapsed if elapsed > 0 else 0
+        
+        run_log.write(
+            'run',
+            mode='convert',
+            layout=self.layout,
+            partitioning=self.partitioning,
+            workers=self.workers,
+            files=len(to_convert),
+            elapsed=round(elapsed, 3),
+            rows_per_sec=round(rate),
+            enrichment_hit_rate=run_stats.hit_rate(),
+            peak_rss_mb=peak_rss_mb(),
+            peak_worker_rss_mb=peak_rss_mb(children=True) if self.workers > 1 else None,
+            **run_stats.to_dict()
+        )
+        
+        print("\n" + "="*70)
+        print("Conversion Complete!")
+        print("="*70)
+        print(f"✅ Total rows processed: {total_rows:,}")
+        print(f"⏱️  Elapsed: {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+        print(f"✅ Total Parquet files produced: {run_stats.counters.get('files_written', 0)}")
+        print(f"📂 Output location: {self.output_directory}")
+        run_stats.print_summary(elapsed, workers=self.workers > 1)
+        if self.run_log_path:
+            print(f"📝 Run log: {self.run_log_path}")
+        print("="*70)
+
+class CSVFollower:
+    """
+    --follow: tail the CSVs under csv_directory so Parquet and the daily_* tables lag by seconds
+    Every interval, complete lines appended since the last pass become a micro-batch of Parquet files
+    (data_{node}_{date}_at{offset}_*.parquet) and the days they touch are re-aggregated in the database
+    (daily_*, heavy hitters and the volatile_* rows of the entities on those days)
+    A tailed CSV's manifest entry records the byte offset consumed so far, so a restart resumes there;
+    CSVs are assumed append-only (one that shrinks is reconverted from the start)
+    """
+    
+    def __init__(self, converter, duckdb_path, interval=10):
+        self.converter = converter
+        self.output_directory = converter.output_directory
+        self.duckdb_path = duckdb_path
+        self.interval = interval
+        self.pending_dates = set()  # days whose daily_* rows still need refreshing
+        self.previous = {}  # CSV -> node's previous CSV (see previous_csv_files)
+        self.events = {}  # CSV -> (DuplicateFilter of its converted lines, bytes they cover)
+    
+    def events_of(self, manifest, csv_file):
+        """
+        Dedup events of the part of csv_file already converted (its manifest offset)
+        Kept across passes; after a restart, or once the file moved on, they are re-read from the CSV
+        """
+        key = csv_file.relative_to(self.converter.csv_directory).as_posix()
+        entry = manifest.sources.get(key)
+        size = entry['size'] if entry else 0
+        
+        cached = self.events.get(csv_file)
+        if cached is not None and cached[1] == size:
+            return cached[0]
+        
+        if size == 0:
+            events = DuplicateFilter(self.converter.dedup_scope_mb)
+        elif csv_file.name.endswith('.csv'):
+            with open(csv_file, 'rb') as f:
+                events = self.converter.read_events(pa.BufferReader(f.read(size)))
+        else:
+            events = self.converter.read_events(csv_file)
+        
+        self.events[csv_file] = (events, size)
+        return events
+    
+    def tail(self, manifest, key, csv_file):
+        """
+        Convert the complete lines appended to a plain CSV since its manifest offset
+        Returns (rows, Parquet files written, whether unread bytes remain)
+        """
+        entry = manifest.sources.get(key)
+        offset = entry['size'] if entry else 0
+        stat = csv_file.stat()
+        
+        if stat.st_size < offset:
+            print(f"   ⚠️  {key} shrank - reconverting it from the start")
+            manifest.forget(key, self.output_directory)
+            entry, offset = None, 0
+        
+        if stat.st_size == offset:
+            return 0, [], False
+        
+        with open(csv_file, 'rb') as f:
+            header = f.readline()
+            f.seek(offset)
+            data = f.read(min(stat.st_size - offset, FOLLOW_MAX_BATCH_BYTES))
+        
+        # The writer may be mid-line - stop at the last newline and pick the rest up next pass
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return 0, [], False
+        data = data[:end] if offset == 0 else header + data[:end]
+        
+        self.converter.stats.count('bytes_read', end)
+        
+        # Same scope as a batch conversion: this CSV's earlier lines and the node's previous CSV
+        if self.converter.dedup:
+            previous_file = self.previous.get(csv_file)
+            self.converter.previous_events = self.events_of(manifest, previous_file) if previous_file else None
+            self.converter.duplicate_filter = self.events_of(manifest, csv_file)
+            self.converter.events_source = None
+            # Re-cached below once the lines are converted; a failed pass must not leave half of them behind
+            del self.events[csv_file]
+        
+        rows, output_files = self.converter.convert_file(
+            csv_file,
+            source=pa.BufferReader(data),
+            file_prefix=f"data_{csv_file.parent.name}_{csv_stem(csv_file)}_at{offset}"
+        )
+        
+        duplicates = self.converter.stats.counters.get('duplicates', 0)
+        
+        # No hash: a batch run that finds the file grown or rewritten sees it as changed and reconverts it whole
+        manifest.record(key, {
+            'size': offset + end,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': None,
+            'rows': (entry['rows'] if entry else 0) + rows,
+            'duplicates': (entry.get('duplicates', 0) if entry else 0) + duplicates,
+            'outputs': (entry['outputs'] if entry else []) +
+                       [output.relative_to(self.output_directory).as_posix() for output in output_files],
+            'converted_at': datetime.now().isoformat(timespec='seconds'),
+        })
+        if self.converter.dedup:
+            self.events[csv_file] = (self.converter.duplicate_filter, offset + end)
+        return rows, output_files, offset + end < stat.st_size
+    
+    def poll(self, manifest, stats):
+        """
+        One pass over csv_directory: tail plain CSVs, convert new or changed compressed ones whole
+        Returns (Parquet files written, whether any CSV still has unread bytes)
+        """
+        written = []
+        backlog = False
+        
+        csv_files = find_csv_files(self.converter.csv_directory)
+        self.previous = previous_csv_files(csv_files)
+        
+        # Only a node's newest CSV grows, so only it and its predecessor's events are worth keeping
+        newest = set(self.previous) - set(self.previous.values())
+        keep = newest | {self.previous[csv_file] for csv_file in newest}
+        self.events = {csv_file: cached for csv_file, cached in self.events.items() if csv_file in keep}
+        
+        for csv_file in csv_files:
+            key = csv_file.relative_to(self.converter.csv_directory).as_posix()
+            try:
+                if csv_file.name.endswith('.csv'):
+                    self.converter.stats = IngestStats()
+                    _, output_files, more = self.tail(manifest, key, csv_file)
+                    stats.merge(self.converter.stats)
+                    backlog = backlog or more
+                else:
+                    # Compressed logs are finished (rotated) files - nothing to tail
+                    status = manifest.status(key, csv_file)
+                    if status == 'unchanged':
+                        continue
+                    if status == 'changed':
+                        manifest.forget(key, self.output_directory)
+                    entry, file_stats = self.converter.convert_source(csv_file, self.previous[csv_file])
+                    manifest.record(key, entry)
+                    if self.converter.dedup:
+                        self.events[csv_file] = (self.converter.duplicate_filter, entry['size'])
+                    stats.merge(file_stats)
+                    output_files = [self.output_directory / output for output in entry['outputs']]
+            except Exception as e:
+                print(f"   ❌ Error following {key}: {e}")
+                continue
+            
+            written.extend(output_files)
+        
+        return written, backlog
+    
+    def connect(self):
+        """Open the database for writing, waiting while the API or a builder holds it"""
+        for attempt in range(DUCKDB_LOCK_RETRIES):
+            try:
+                return duckdb.connect(str(self.duckdb_path))
+            except duckdb.IOException:
+                if attempt == DUCKDB_LOCK_RETRIES - 1:
+                    raise
+                time.sleep(1)
+    
+    def refresh_days(self):
+        """
+        Re-aggregate every pending day of the daily_* tables from its Parquet files, recompute the
+        volatile_* rows of the entities on those days and move the summary_sources snapshot forward,
+        as create_all_daily_tables.py --incremental does
+        """
+        dates = sorted(self.pending_dates)
+        source = standard_source_sql(partition_files_for_dates(self.output_directory, dates),
+                                     self.output_directory, self.converter.layout)
+        
+        # Listed before reading, like the builders: a file written meanwhile is picked up next pass
+        files = scan_parquet_files(self.output_directory)
+        
+        # One short transaction: dashboard readers see each day either before or after the batch
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN TRANSACTION")
+            volatile = existing_volatile_tables(conn)
+            
+            # Entities on these days before the replace (they may vanish) and after it (they may be new)
+            for name in volatile:
+                collect_volatile_keys(conn, name, dates)
+            replace_daily_dates(conn, source, dates)
+            refresh_heavy_hitters(conn, dates)
+            for name in volatile:
+                collect_volatile_keys(conn, name, dates)
+                refresh_volatile_keys(conn, name)
+            
+            # Only if nothing beyond these days changed - otherwise --incremental still has work to do
+            snapshot = load_snapshot(conn)
+            if snapshot is not None:
+                changed, ranges, _ = changed_dates(snapshot, files)
+                if changed <= set(dates):
+                    save_snapshot(conn, files, ranges)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        
+        self.pending_dates.clear()
+        return dates
+    
+    def run(self):
+        """Poll until interrupted (Ctrl+C)"""
+        manifest = self.converter.open_output()
+        if manifest is None:
+            return
+        
+        # Micro-batches written before a crash but never recorded would be counted twice
+        recorded = {output for entry in manifest.sources.values() for output in entry['outputs']}
+        for orphan in self.output_directory.glob(f"{PARTITION_GLOBS[self.converter.partitioning]}/data_*_at*.parquet"):
+            if orphan.relative_to(self.output_directory).as_posix() not in recorded:
+                orphan.unlink()
+        
+        print(f"\n👀 Following {self.converter.csv_directory} every {self.interval}s (Ctrl+C to stop)")
+        print(f"📦 Output directory: {self.output_directory}")
+        print(f"🦆 Database: {self.duckdb_path}")
+        
+        run_stats = IngestStats()
+        run_log = RunLog(self.converter.run_log_path)
+        start_time = time.time()
+        
+        try:
+            while True:
+                tick_start = time.time()
+                stats = IngestStats()
+                
+                written, backlog = self.poll(manifest, stats)
+                
+                with stats.stage('dates'):
+                    for output in written:
+                        datetimes = pq.read_table(output, columns=['datetime'])['datetime']
+                        self.pending_dates.update(pc.unique(pc.cast(datetimes, pa.date32())).drop_null().to_pylist())
+                
+                refreshed = []
+                if self.pending_dates:
+                    try:
+                        with stats.stage('refresh'):
+                            refreshed = self.refresh_days()
+                    except Exception as e:
+                        print(f"   ❌ Could not refresh daily tables (retrying next pass): {e}")
+                
+                rows = stats.counters.get('rows_written', 0)
+                if rows or refreshed:
+                    run_stats.merge(stats)
+                    run_log.write('tick', rows=rows, outputs=len(written),
+                                  days=[day.isoformat() for day in refreshed], **stats.to_dict())
+                    if self.converter.log_level != 'quiet':
+                        print(f"   🔄 {datetime.now():%H:%M:%S} +{rows:,} rows in {len(written)} files, "
+                              f"{len(refreshed)} days refreshed ({time.time() - tick_start:.1f}s)")
+                
+                # Catching up on a large backlog: go again straight away
+                if not backlog:
+                    time.sleep(max(0.0, self.interval - (time.time() - tick_start)))
+        except KeyboardInterrupt:
+            pass
+        
+        elapsed = time.time() - start_time
+        run_log.write(
+            'run',
+            mode='follow',
+            layout=self.converter.layout,
+            partitioning=self.converter.partitioning,
+            elapsed=round(elapsed, 3),
+            enrichment_hit_rate=run_stats.hit_rate(),
+            peak_rss_mb=peak_rss_mb(),
+            **run_stats.to_dict()
+        )
+        
+        print("\n" + "="*70)
+        print("Follow Mode Stopped")
+        print("="*70)
+        print(f"✅ Rows ingested: {run_stats.counters.get('rows_written', 0):,}")
+        run_stats.print_summary(elapsed)
+        print("="*70)
+
+class DirectDuckDBIngest:
+    """
+    --direct: CSV folder -> enriched partitioned Parquet + daily_* tables in one pass, no Arrow/pandas loop
+    DuckDB reads one date's CSVs from every node in parallel, joins them to the IP dimension and stages
+    the enriched rows once; the same staged rows feed the Parquet COPYs and the daily_* aggregates
+    Parquet file names and the manifest match the converter, so later incremental runs pick up from here
+    """
+    
+    def __init__(self, lookup_path, csv_directory, output_directory, duckdb_path, compression='snappy',
+                 partitioning='month', log_level='file', run_log_path=None, dedup=True):
+        self.lookup_path = Path(lookup_path)
+        self.csv_directory = Path(csv_directory)
+        self.output_directory = Path(output_directory)
+        self.duckdb_path = duckdb_path
+        self.compression = compression
+        self.partitioning = partitioning
+        self.log_level = log_level
+        self.run_log_path = run_log_path
+        self.dedup = dedup
+    
+    def load_ip_dimension(self, conn):
+        """Copy the compiled IP lookup into a DuckDB temp table keyed like the compact layout"""
+        lookup_table = IPLookup(self.lookup_path).table
+        conn.register('ip_lookup_arrow', lookup_table)
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE ip_dimension AS
+            SELECT
+                ip_v4,
+                ip_text,
+                {', '.join(f'CAST({col} AS {"DOUBLE" if col in ("latitude", "longitude") else "VARCHAR"}) as {col}'
+                           for col in LOOKUP_COLUMNS)}
+            FROM ip_lookup_arrow
+        """)
+        conn.unregister('ip_lookup_arrow')
+        return len(lookup_table)
+    
+    def parsed_sql(self, csv_files):
+        """
+        SELECT over CSVs typed like process_csv_file(): invalid dates NULL, missing ints 0, missing text 'nan'
+        csv_row numbers the rows in file and line order (DuckDB preserves insertion order)
+        """
+        file_list = ', '.join("'" + str(f).replace("'", "''") + "'" for f in csv_files)
+        null_strings = ', '.join("'" + value.replace("'", "''") + "'" for value in CSV_NULL_STRINGS)
+        
+        def text(col):
+            return f"CASE WHEN {col} IS NULL OR {col} IN ({null_strings}) THEN 'nan' ELSE {col} END"
+        
+        return f"""
+            SELECT
+                try_strptime(CAST(Date AS VARCHAR), '%Y%m%d') as datetime,
+                {text('IP')} as IP,
+                COALESCE(Time, 0) as Time,
+                {text('Node')} as Node,
+                COALESCE(Port, 0) as Port,
+                {text('PID')} as PID,
+                {text('Username')} as Username,
+                {text('Tag')} as Tag,
+                {text('Message')} as Message,
+                filename,
+                row_number() OVER () as csv_row
+            FROM read_csv([{file_list}],
+                header = true,
+                auto_detect = false,
+                filename = true,
+                columns = {{
+                    'Date': 'INTEGER', 'Time': 'BIGINT', 'IP': 'VARCHAR', 'Node': 'VARCHAR', 'Port': 'BIGINT',
+                    'PID': 'VARCHAR', 'Username': 'VARCHAR', 'Tag': 'VARCHAR', 'Message': 'VARCHAR'
+                }})
+        """
+    
+    def stage_csvs(self, conn, csv_files, previous=None):
+        """
+        Read, type, enrich and stage a batch of CSVs as the temp view 'staged'
+        Mirrors process_csv_file(), and with dedup drops every row whose event appeared earlier in its
+        CSV or anywhere in the node's previous CSV (previous maps each CSV to it, see previous_csv_files)
+        Returns (staged rows, rows whose IP was found in the lookup, {csv path: duplicates dropped})
+        """
+        # The converter's DuplicateFilter key and DuckDB hash(), over the parsed datetime instead of the
+        # integer Date (rows without one are dropped anyway): the same rows are duplicates, but the
+        # hash values differ. seen_events holds the distinct events of the previous batch's CSVs,
+        # the usual predecessors of this batch's
+        if self.dedup:
+            event_hash = f"hash({', '.join('datetime' if col == 'Date' else col for col in DEDUP_KEY_COLUMNS)})"
+            
+            predecessors = {str(csv_file): str(previous[csv_file]) for csv_file in csv_files if previous.get(csv_file)}
+            seen_files = {row[0] for row in conn.execute("SELECT DISTINCT filename FROM seen_events").fetchall()}
+            
+            # A node that skipped a day: its predecessor was not in the previous batch - read it again
+            missing = sorted(set(predecessors.values()) - seen_files)
+            if missing:
+                conn.execute(f"""
+                    INSERT INTO seen_events
+                    SELECT DISTINCT filename, {event_hash} FROM ({self.parsed_sql(missing)})
+                """)
+            
+            conn.execute("CREATE OR REPLACE TEMP TABLE predecessors (filename VARCHAR, previous VARCHAR)")
+            if predecessors:
+                conn.executemany("INSERT INTO predecessors VALUES (?, ?)", list(predecessors.items()))
+            
+            # Like the converter, the first copy in CSV order is kept
+            duplicate_sql = ("row_number() OVER (PARTITION BY t.filename, t.event_hash ORDER BY t.csv_row) > 1 "
+                             "OR s.event_hash IS NOT NULL")
+            seen_join = ("LEFT JOIN predecessors p ON p.filename = t.filename "
+                         "LEFT JOIN seen_events s ON s.filename = p.previous AND s.event_hash = t.event_hash")
+        else:
+            event_hash = "NULL::UBIGINT"
+            duplicate_sql = "false"
+            seen_join = ""
+        
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE typed AS
+            WITH parsed AS ({self.parsed_sql(csv_files)}),
+            hashed AS (
+                SELECT *, {event_hash} as event_hash FROM parsed
+            )
+            SELECT t.*, {duplicate_sql} as duplicate
+            FROM hashed t
+            {seen_join}
+        """)
+        
+        # Every event of this batch, duplicates included - they are all in their CSV
+        if self.dedup:
+            conn.execute("DELETE FROM seen_events")
+            conn.execute("INSERT INTO seen_events SELECT DISTINCT filename, event_hash FROM typed")
+        
+        # Attack logs repeat the same IPs heavily - key and look up each distinct IP once
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP TABLE ip_enrichment AS
+            WITH ip_keys AS (
+                SELECT IP, {ipv4_to_uint32_sql('IP')} as ip_v4
+                FROM (SELECT DISTINCT IP FROM typed)
+            )
+            SELECT
+                k.IP,
+                {', '.join(f'd.{col}' for col in LOOKUP_COLUMNS)},
+                d.ip_v4 IS NOT NULL OR d.ip_text IS NOT NULL as ip_found
+            FROM ip_keys k
+            LEFT JOIN ip_dimension d
+                ON k.ip_v4 IS NOT DISTINCT FROM d.ip_v4
+               AND (CASE WHEN k.ip_v4 IS NULL THEN k.IP END) IS NOT DISTINCT FROM d.ip_text
+        """)
+        
+        # A view, not a copy: the daily aggregates and COPYs only pull the columns they need
+        conn.execute(f"""
+            CREATE OR REPLACE TEMP VIEW staged AS
+            SELECT
+                t.datetime,
+                CAST(year(t.datetime) AS INTEGER) as year,
+                CAST(month(t.datetime) AS INTEGER) as month,
+                t.IP,
+                t.Time,
+                {', '.join(f'e.{col}' for col in LOOKUP_COLUMNS)},
+                t.Node,
+                t.Port,
+                t.PID,
+                t.Username,
+                t.Tag,
+                t.Message,
+                {event_columns_sql('t.Message')},
+                t.filename,
+                t.csv_row,
+                COALESCE(e.ip_found, false) as ip_found
+            FROM typed t
+            LEFT JOIN ip_enrichment e ON t.IP = e.IP
+            WHERE t.datetime IS NOT NULL AND NOT t.duplicate
+        """)
+        
+        rows, ip_hits = conn.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE ip_found) FROM staged").fetchone()
+        duplicates = dict(conn.execute(
+            "SELECT filename, COUNT(*) FILTER (WHERE duplicate) FROM typed GROUP BY filename"
+        ).fetchall())
+        return rows, ip_hits, duplicates
+    
+    def write_partitions(self, conn, csv_file):
+        """
+        COPY one CSV's staged rows into its partitions as .parquet.tmp files
+        Returns (rows, list of Parquet files) - run() renames the temp files to them once the batch commits
+        """
+        csv_file = Path(csv_file)
+        
+        if self.partitioning == 'day':
+            key_sql = "datetime::DATE"
+            order_sql = "ORDER BY " + ', '.join(col for col, _ in SORT_KEYS['standard'])
+            row_group_size = SORTED_ROW_GROUP_SIZE
+        else:
+            key_sql = "year * 100 + month"
+            order_sql = "ORDER BY csv_row"
+            row_group_size = 100000
+        
+        partitions = conn.execute(f"""
+            SELECT {key_sql} as partition_key, COUNT(*) as rows
+            FROM staged WHERE filename = ?
+            GROUP BY partition_key ORDER BY partition_key
+        """, [str(csv_file)]).fetchall()
+        
+        output_files = []
+        for partition_key, _ in partitions:
+            if self.partitioning == 'day':
+                partition = f"date={partition_key.isoformat()}"
+            else:
+                partition = "year={}/month={}".format(*divmod(partition_key, 100))
+            
+            partition_dir = self.output_directory / partition
+            partition_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Same name and temp-file convention as PartitionedParquetWriter
+            final_path = partition_dir / f"data_{csv_file.parent.name}_{csv_stem(csv_file)}_0000.parquet"
+            temp_path = final_path.with_suffix('.parquet.tmp')
+            target = str(temp_path).replace("'", "''")
+            
+            conn.execute(f"""
+                COPY (
+                    SELECT {', '.join(OUTPUT_COLUMNS)}
+                    FROM staged
+                    WHERE filename = ? AND {key_sql} = ?
+                    {order_sql}
+                ) TO '{target}' (FORMAT PARQUET, COMPRESSION '{self.compression}', ROW_GROUP_SIZE {row_group_size})
+            """, [str(csv_file), partition_key])
+            
+            output_files.append(final_path)
+        
+        return sum(rows for _, rows in partitions), output_files
+    
+    def run(self):
+        """Rebuild the Parquet output and the daily_* tables from every CSV"""
+        csv_files = find_csv_files(self.csv_directory)
+        
+        if not csv_files:
+            print("❌ No CSV files found")
+            return
+        
+        # DuckDB's CSV reader decompresses gzip and zstd, not bzip2
+        bz2_files = [csv_file for csv_file in csv_files if csv_file.name.endswith('.bz2')]
+        if bz2_files:
+            print(f"❌ --direct cannot read .bz2 inputs ({len(bz2_files)} found); "
+                  f"convert them without --direct or recompress as .gz/.zst")
+            return
+        
+        # One batch per date stem: every node's CSV for that day is read together
+        previous = previous_csv_files(csv_files)
+        batches = {}
+        for csv_file in csv_files:
+            batches.setdefault(csv_stem(csv_file), []).append(csv_file)
+        
+        print(f"\n📂 Found {len(csv_files)} CSV files ({len(batches)} daily batches)")
+        print(f"📦 Output directory: {self.output_directory}")
+        print(f"🦆 Database: {self.duckdb_path}")
+        print(f"🗂️  Partitioning: {self.partitioning}")
         
-        # Create output directory
         self.output_directory.mkdir(parents=True, exist_ok=True)
+        for unfinished in self.output_directory.glob(f"{PARTITION_GLOBS[self.partitioning]}/*.parquet.tmp"):
+            unfinished.unlink()
+        
+        # Full rebuild: previous outputs go, the manifest is rewritten as files complete
+        manifest = ConversionManifest(self.output_directory / MANIFEST_NAME, partitioning=self.partitioning)
+        removed = sum(manifest.forget(key, self.output_directory) for key in list(manifest.sources))
+        manifest.layout = 'standard'
+        manifest.partitioning = self.partitioning
+        manifest.schema_version = SCHEMA_VERSION
+        manifest.save()
+        if removed:
+            print(f"🗑️  Removed {removed} Parquet files from the previous conversion")
+        
+        conn = duckdb.connect(str(self.duckdb_path))
         
-        total_rows = 0
-        total_files_written = 0
+        load_start = time.time()
+        dimension_rows = self.load_ip_dimension(conn)
+        print(f"✅ IP dimension: {dimension_rows:,} IPs in {time.time() - load_start:.1f}s")
         
-        # Process each CSV file
-        for csv_file in tqdm(csv_files, desc="Converting files"):
-            print(f"\n📄 Processing: {csv_file.name}")
+        create_daily_tables(conn)
+        if self.dedup:
+            conn.execute("CREATE OR REPLACE TEMP TABLE seen_events (filename VARCHAR, event_hash UBIGINT)")
+        
+        run_stats = IngestStats()
+        run_log = RunLog(self.run_log_path)
+        start_time = time.time()
+        
+        for stem, batch in tqdm(sorted(batches.items()), desc="Ingesting days", disable=self.log_level == 'quiet'):
+            stats = IngestStats()
             
-            file_rows = 0
-            file_chunks = 0
+            with stats.stage('fingerprint'):
+                fingerprints = {csv_file: file_fingerprint(csv_file) for csv_file in batch}
+            stats.count('bytes_read', sum(fingerprint['size'] for fingerprint in fingerprints.values()))
             
+            # One transaction per batch: a failure leaves no daily_* rows, Parquet files or manifest entries
+            written = {}
+            conn.execute("BEGIN TRANSACTION")
             try:
-                # Process CSV in chunks and write to partitioned Parquet
-                for enriched_chunk in self.process_csv_file(csv_file):
-                    
-                    # Group by partition (year, month)
-                    for (year, month), group in enriched_chunk.groupby(['year', 'month']):
-                        
-                        # Create partition directory
-                        partition_dir = self.output_directory / f"year={int(year)}" / f"month={int(month)}"
-                        partition_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        # Generate unique filename
-                        import time
-                        timestamp = int(time.time() * 1000000)
-                        output_file = partition_dir / f"data_{csv_file.stem}_{timestamp}_{file_chunks}.parquet"
-                        
-                        # Write to Parquet
-                        group.to_parquet(
-                            output_file,
-                            engine='pyarrow',
-                            compression=self.compression,
-                            index=False
-                        )
-                        
-                        file_rows += len(group)
-                        file_chunks += 1
-                        total_files_written += 1
+                # read_csv, typing and the dimension join run inside one DuckDB statement
+                with stats.stage('stage'):
+                    rows, ip_hits, duplicates = self.stage_csvs(conn, batch, previous)
+                stats.count('rows_read', rows + sum(duplicates.values()))
+                stats.count('rows_enriched', rows)
+                stats.count('ip_hits', ip_hits)
+                if self.dedup:
+                    stats.count('duplicates', sum(duplicates.values()))
                 
-                total_rows += file_rows
-                print(f"   ✅ Wrote {file_rows:,} rows in {file_chunks} chunks")
+                with stats.stage('aggregate'):
+                    insert_daily_rows(conn, 'staged')
                 
+                for csv_file in batch:
+                    with stats.stage('write'):
+                        written[csv_file] = self.write_partitions(conn, csv_file)
+                
+                conn.execute("COMMIT")
             except Exception as e:
-                print(f"   ❌ Error processing {csv_file.name}: {e}")
+                conn.execute("ROLLBACK")
+                for unfinished in self.output_directory.glob(f"{PARTITION_GLOBS[self.partitioning]}/*.parquet.tmp"):
+                    unfinished.unlink()
+                print(f"\n   ❌ Error ingesting {stem}: {e}")
                 continue
+            
+            for csv_file, (rows, output_files) in written.items():
+                with stats.stage('write'):
+                    for output in output_files:
+                        output.with_suffix('.parquet.tmp').replace(output)
+                key = csv_file.relative_to(self.csv_directory).as_posix()
+                manifest.record(key, {
+                    **fingerprints[csv_file],
+                    'rows': rows,
+                    'duplicates': duplicates.get(str(csv_file), 0),
+                    'outputs': [output.relative_to(self.output_directory).as_posix() for output in output_files],
+                    'converted_at': datetime.now().isoformat(timespec='seconds'),
+                })
+                stats.count('rows_written', rows)
+                stats.count('files_written', len(output_files))
+                stats.count('bytes_written', sum(output.stat().st_size for output in output_files))
+            
+            run_stats.merge(stats)
+            run_log.write('batch', source=stem, files=len(batch), **stats.to_dict())
+            if self.log_level != 'quiet':
+                print(f"\n   ✅ {stem}: {stats.counters['rows_written']:,} rows from {len(batch)} CSVs")
+        
+        print("\n🔄 Merging daily tables...")
+        with run_stats.stage('merge'):
+            conn.execute("DROP VIEW IF EXISTS staged")
+            conn.execute("DROP TABLE IF EXISTS typed")
+            conn.execute("DROP TABLE IF EXISTS ip_enrichment")
+            conn.execute("DROP TABLE IF EXISTS seen_events")
+            merge_daily_tables(conn)
+            refresh_heavy_hitters(conn)
+        
+        elapsed = time.time() - start_time
+        total_rows = run_stats.counters.get('rows_written', 0)
+        rate = total_rows / elapsed if elapsed > 0 else 0
+        
+        run_log.write(
+            'run',
+            mode='direct',
+            layout='standard',
+            partitioning=self.partitioning,
+            files=len(csv_files),
+            elapsed=round(elapsed, 3),
+            rows_per_sec=round(rate),
+            enrichment_hit_rate=run_stats.hit_rate(),
+            peak_rss_mb=peak_rss_mb(),
+            **run_stats.to_dict()
+        )
         
         print("\n" + "="*70)
-        print("Conversion Complete!")
+        print("Direct Ingest Complete!")
         print("="*70)
         print(f"✅ Total rows processed: {total_rows:,}")
-        print(f"✅ Total Parquet files: {total_files_written}")
+        print(f"⏱️  Elapsed: {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+        print(f"✅ Total Parquet files produced: {run_stats.counters.get('files_written', 0)}")
+        for name in DAILY_TABLES:
+            count = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            print(f"   {name}: {count:,} rows")
         print(f"📂 Output location: {self.output_directory}")
+        run_stats.print_summary(elapsed)
+        if self.run_log_path:
+            print(f"📝 Run log: {self.run_log_path}")
         print("="*70)
+        
+        conn.close()
+
+def _init_worker(converter_kwargs):
+    """Pool initializer: memory-map the compiled IP lookup instead of reloading ipinfo.json"""
+    global _worker_converter
+    ip_lookup = IPLookup(converter_kwargs['lookup_path'])
+    _worker_converter = CSVToParquetConverter(ip_lookup=ip_lookup, **converter_kwargs)
+
+
+def _convert_chain_in_worker(sources):
+    """
+    Convert (csv_file, previous_file) pairs in order inside a pool worker (see dedup_chains)
+    Returns one (manifest entry, stats dict) per file, or the exception that file raised
+    """
+    results = []
+    for csv_file, previous_file in sources:
+        try:
+            results.append(_worker_converter.convert_source(csv_file, previous_file))
+        except Exception as e:
+            results.append(e)
+    return results
 
 
 def main():
     """Main execution"""
     
+    parser = argparse.ArgumentParser(description="Convert honeypot CSVs to enriched, partitioned Parquet")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of worker processes (default: 1, sequential)")
+    parser.add_argument('--chunk-size',
+                        help="Rows per chunk, or 'auto' to size chunks to [processing] chunk_memory_mb "
+                             "(default: [processing] chunk_size in config.ini, else 100000)")
+    parser.add_argument('--layout', choices=['standard', 'compact'],
+                        help="Output schema (default: [processing] layout in config.ini, else standard)")
+    parser.add_argument('--partitioning', choices=['month', 'day'],
+                        help="year=/month= or date= partitions sorted by IP, Time "
+                             "(default: [processing] partitioning in config.ini, else month)")
+    parser.add_argument('--direct', action='store_true',
+                        help="Rebuild Parquet and the daily_* tables in attack_data.db in one DuckDB pass")
+    parser.add_argument('--follow', action='store_true',
+                        help="Keep running: tail growing CSVs and refresh the affected days of the daily_* tables")
+    parser.add_argument('--interval', type=float,
+                        help="Seconds between --follow passes "
+                             "(default: [processing] follow_interval_seconds in config.ini, else 10)")
+    parser.add_argument('--log-level', choices=LOG_LEVELS,
+                        help="quiet (summary only), file (one line per CSV) or chunk (per-chunk detail) "
+                             "(default: [processing] log_level in config.ini, else file)")
+    parser.add_argument('--keep-duplicates', action='store_true',
+                        help="Keep repeated events instead of dropping them (overrides [processing] dedup); "
+                             "dedup drops a row whose event appeared earlier in the same CSV or anywhere in "
+                             "the node's previous CSV; events match by 64-bit hash, so it is probabilistic "
+                             "(~1 in 10^7 chance per day of dropping a distinct event at 2M events/day)")
+    parser.add_argument('--force', action='store_true',
+                        help="Reconvert every CSV, even ones the manifest says are unchanged")
+    args = parser.parse_args()
+    
     # Load configuration
     config = configparser.ConfigParser()
     config.read('config.ini')
@@ -234,12 +1700,28 @@ def main():
         json_path = config['paths']['json_file']
         csv_directory = config['paths']['csv_directory']
         output_directory = config['paths']['output_directory']
+        lookup_path = config.get('paths', 'ip_lookup', fallback=str(default_lookup_path(json_path)))
+        chunk_size = parse_chunk_size(args.chunk_size or config.get('processing', 'chunk_size', fallback='100000'))
+        chunk_memory_mb = config.getint('processing', 'chunk_memory_mb', fallback=256)
+        target_file_size_mb = config.getint('processing', 'target_file_size_mb', fallback=256)
+        layout = args.layout or config.get('processing', 'layout', fallback='standard')
+        partitioning = args.partitioning or config.get('processing', 'partitioning', fallback='month')
+        sort_buffer_mb = config.getint('processing', 'sort_buffer_mb', fallback=512)
+        duckdb_path = config.get('paths', 'duckdb_path', fallback='./attack_data.db')
+        run_log_path = config.get('paths', 'run_log', fallback=None)
+        log_level = args.log_level or config.get('processing', 'log_level', fallback='file')
+        dedup = not args.keep_duplicates and config.getboolean('processing', 'dedup', fallback=True)
+        dedup_memory_mb = config.getint('processing', 'dedup_memory_mb', fallback=256)
+        follow_interval = args.interval or config.getfloat('processing', 'follow_interval_seconds', fallback=10)
     except KeyError as e:
         print(f"❌ Config file missing required key: {e}")
         return
+    except ValueError as e:
+        print(f"❌ Invalid setting: {e}")
+        return
     
-    # Verify JSON file exists
-    if not Path(json_path).exists():
+    # Verify IP data exists (a compiled lookup is enough on its own)
+    if not Path(json_path).exists() and not Path(lookup_path).exists():
         print(f"\n❌ JSON file not found: {json_path}")
         print("Please update the json_file path in config.ini")
         return
@@ -248,16 +1730,58 @@ def main():
     print("CSV → Parquet with IP Enrichment (FIXED VERSION)")
     print("="*70)
     
+    if args.direct and args.follow:
+        print("❌ --direct and --follow cannot be combined; run --direct once, then --follow")
+        return
+    
+    if args.direct:
+        if layout != 'standard':
+            print("❌ --direct writes the standard layout only")
+            return
+        
+        if not lookup_is_current(json_path, lookup_path):
+            print(f"Compiling IP lookup {lookup_path} from {json_path} (one-time)...")
+            compiled = compile_ip_lookup(json_path, lookup_path)
+            print(f"✅ Compiled {compiled:,} IP addresses")
+        
+        DirectDuckDBIngest(
+            lookup_path=lookup_path,
+            csv_directory=csv_directory,
+            output_directory=output_directory,
+            duckdb_path=duckdb_path,
+            compression='snappy',
+            partitioning=partitioning,
+            log_level=log_level,
+            run_log_path=run_log_path,
+            dedup=dedup
+        ).run()
+        return
+    
     # Create converter and run
     converter = CSVToParquetConverter(
         json_path=json_path,
         csv_directory=csv_directory,
         output_directory=output_directory,
-        chunk_size=100000,
-        compression='snappy'
+        chunk_size=chunk_size,
+        chunk_memory_mb=chunk_memory_mb,
+        compression='snappy',
+        workers=args.workers,
+        target_file_size_mb=target_file_size_mb,
+        layout=layout,
+        partitioning=partitioning,
+        sort_buffer_mb=sort_buffer_mb,
+        lookup_path=lookup_path,
+        log_level=log_level,
+        run_log_path=run_log_path,
+        dedup=dedup,
+        dedup_memory_mb=dedup_memory_mb
     )
     
-    converter.convert()
+    if args.follow:
+        CSVFollower(converter, duckdb_path=duckdb_path, interval=follow_interval).run()
+        return
+    
+    converter.convert(force=args.force)
 
 
 if __name__ == "__main__":
@@ -7,6 +7,8 @@ BUG FIX: When ASN filter is active, don't include it in where_clause to avoid co
 
 from flask import jsonify, request
 from utils.db import get_db, parse_date_params
+from utils.dimensions import dimension_ids, id_sql
+from utils.heavy_hitters import top_entities_sql
 
 
 def register_asn_attacks(app):
@@ -31,6 +33,15 @@ def register_asn_attacks(app):
         
         conn = get_db()
         
+        # Batch filters are '|||'-separated lists; names become dimension ids in one lookup
+        ids = dimension_ids(
+            conn,
+            username=usernames_filter.split('|||') if usernames_filter else username_filter,
+            ip=ips_filter.split('|||') if ips_filter else ip_filter,
+            asn=asns_filter.split('|||') if asns_filter else asn_filter,
+            country=countries_filter.split('|||') if countries_filter else country_filter,
+        )
+        
         # Determine which table to use
         use_username_table = username_filter or usernames_filter
         use_ip_table = ip_filter or ips_filter or use_username_table
@@ -55,45 +66,37 @@ def register_asn_attacks(app):
         
         # Username filter
         if usernames_filter:
-            usernames = usernames_filter.split('|||')
-            username_list = ', '.join([f"'{u}'" for u in usernames])
-            condition = f"username IN ({username_list})"
+            condition = f"{table_alias}.username_id IN ({id_sql(ids['username'])})"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         elif username_filter:
-            condition = f"username = '{username_filter}'"
+            condition = f"{table_alias}.username_id = {id_sql(ids['username'])}"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         
         # IP filter
         if ips_filter:
-            ips = ips_filter.split('|||')
-            ip_list = ', '.join([f"'{ip}'" for ip in ips])
-            condition = f"IP IN ({ip_list})"
+            condition = f"{table_alias}.ip_id IN ({id_sql(ids['ip'])})"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         elif ip_filter:
-            condition = f"IP = '{ip_filter}'"
+            condition = f"{table_alias}.ip_id = {id_sql(ids['ip'])}"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         
         # ASN filter - ONLY add to where_conditions_with_asn
         if asns_filter:
-            asns = asns_filter.split('|||')
-            asn_list = ', '.join([f"'{a}'" for a in asns])
-            where_conditions_with_asn.append(f"asn_name IN ({asn_list})")
+            where_conditions_with_asn.append(f"{table_alias}.asn_id IN ({id_sql(ids['asn'])})")
         elif asn_filter:
-            where_conditions_with_asn.append(f"asn_name = '{asn_filter}'")
+            where_conditions_with_asn.append(f"{table_alias}.asn_id = {id_sql(ids['asn'])}")
         
         # Country filter
         if countries_filter:
-            countries = countries_filter.split('|||')
-            country_list = ', '.join([f"'{c}'" for c in countries])
-            condition = f"country IN ({country_list})"
+            condition = f"{table_alias}.country_id IN ({id_sql(ids['country'])})"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         elif country_filter:
-            condition = f"country = '{country_filter}'"
+            condition = f"{table_alias}.country_id = {id_sql(ids['country'])}"
             where_conditions_with_asn.append(condition)
             where_conditions_without_asn.append(condition)
         
@@ -102,71 +105,79 @@ def register_asn_attacks(app):
         
         # If specific ASN filter(s), show only those ASN(s)
         if asn_filter or asns_filter:
-            if asns_filter:
-                asns = asns_filter.split('|||')
-                asn_list = ', '.join([f"'{a}'" for a in asns])
-                asn_values = asns
-            else:
-                asn_list = f"'{asn_filter}'"
-                asn_values = [asn_filter]
+            params = [asns_filter.split('|||') if asns_filter else [asn_filter]]
             
             # Build query for specific ASN(s) with ALL filters EXCEPT ASN
-            # (ASN is already constrained by the complete_grid)
+            # (ASN is already constrained by the complete_grid; unknown names keep a NULL id)
             query = f"""
                 WITH selected_asns AS (
-                    SELECT unnest(ARRAY[{asn_list}]) as asn_name
+                    SELECT s.asn_name, a.asn_id
+                    FROM (SELECT unnest(?::VARCHAR[]) as asn_name) s
+                    LEFT JOIN dim_asn a ON a.asn_name = s.asn_name
                 ),
                 date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, s.asn_name FROM date_range d CROSS JOIN selected_asns s
+                    SELECT d.date, s.asn_name, s.asn_id FROM date_range d CROSS JOIN selected_asns s
                 )
                 SELECT 
                     g.date::VARCHAR as date,
                     g.asn_name,
-                    COALESCE(MAX({table_alias}.country), 'Mixed') as country,
+                    COALESCE(MAX(c.country), 'Mixed') as country,
                     COALESCE(SUM({table_alias}.attacks), 0) as attacks
                 FROM complete_grid g
                 LEFT JOIN {table} {table_alias}
                     ON g.date = {table_alias}.date 
-                    AND g.asn_name = {table_alias}.asn_name
+                    AND g.asn_id = {table_alias}.asn_id
                     AND {where_clause_without_asn}
+                LEFT JOIN dim_country c ON c.country_id = {table_alias}.country_id
                 GROUP BY g.date, g.asn_name
                 ORDER BY g.date
             """
         else:
+            params = []
+            
             # Show top 10 ASNs with ALL filters applied
-            query = f"""
-                WITH top_asns AS (
-                    SELECT asn_name
-                    FROM {table}
+            # Unfiltered: per-day heavy hitters answer wide ranges; exact GROUP BY when they cannot
+            top_asns = None
+            if table == "daily_asn_attacks" and not where_conditions_with_asn:
+                top_asns = top_entities_sql(conn, 'asn', start, end, 10, 'asn_id')
+            top_asns = top_asns or f"""
+                    SELECT asn_id
+                    FROM {table} {table_alias}
                     WHERE date BETWEEN '{start}' AND '{end}' AND {where_clause_with_asn}
-                    GROUP BY asn_name
+                    GROUP BY asn_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
+            """
+            query = f"""
+                WITH top_asns AS (
+                    {top_asns}
                 ),
                 date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.asn_name FROM date_range d CROSS JOIN top_asns t
+                    SELECT d.date, t.asn_id FROM date_range d CROSS JOIN top_asns t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.asn_name,
-                    COALESCE(MAX({table_alias}.country), 'Mixed') as country,
+                    a.asn_name,
+                    COALESCE(MAX(c.country), 'Mixed') as country,
                     COALESCE(SUM({table_alias}.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_asn a ON a.asn_id = g.asn_id
                 LEFT JOIN {table} {table_alias}
                     ON g.date = {table_alias}.date 
-                    AND g.asn_name = {table_alias}.asn_name
+                    AND g.asn_id = {table_alias}.asn_id
                     AND {where_clause_with_asn}
-                GROUP BY g.date, g.asn_name
+                LEFT JOIN dim_country c ON c.country_id = {table_alias}.country_id
+                GROUP BY g.date, g.asn_id, a.asn_name
                 ORDER BY g.date, attacks DESC
             """
         
-        result = conn.execute(query).fetchall()
+        result = conn.execute(query, params).fetchall()
         conn.close()
         
         data = [{'date': row[0], 'asn_name': row[1], 'country': row[2], 'attacks': row[3]} for row in result]
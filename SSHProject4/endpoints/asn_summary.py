@@ -26,13 +26,13 @@ def register_asn_summary(app):
             ),
             asn_list AS (
                 -- Get all unique ASNs
-                SELECT DISTINCT asn_name
+                SELECT DISTINCT asn_id
                 FROM daily_asn_attacks
                 WHERE date BETWEEN '{start}' AND '{end}'
             ),
             complete_grid AS (
                 -- Create complete date x ASN grid
-                SELECT d.date, a.asn_name
+                SELECT d.date, a.asn_id
                 FROM date_range d
                 CROSS JOIN asn_list a
             ),
@@ -40,59 +40,59 @@ def register_asn_summary(app):
                 -- Join with actual data, filling missing days with 0
                 SELECT 
                     g.date,
-                    g.asn_name,
+                    g.asn_id,
                     COALESCE(d.attacks, 0) as attacks,
-                    d.country,
+                    d.country_id,
                     CASE WHEN d.attacks IS NOT NULL THEN 1 ELSE 0 END as was_present
                 FROM complete_grid g
                 LEFT JOIN daily_asn_attacks d 
-                    ON g.date = d.date AND g.asn_name = d.asn_name
+                    ON g.date = d.date AND g.asn_id = d.asn_id
             ),
             asn_stats AS (
                 SELECT 
-                    asn_name,
+                    asn_id,
                     SUM(attacks) as total_attacks,
                     AVG(CASE WHEN was_present = 1 THEN attacks ELSE NULL END) as avg_daily,
                     SUM(was_present) as active_days,
                     MIN(CASE WHEN was_present = 1 THEN date ELSE NULL END) as first_seen,
                     MAX(CASE WHEN was_present = 1 THEN date ELSE NULL END) as last_seen,
                     MAX(attacks) as max_daily,
-                    COUNT(DISTINCT country) as country_count
+                    COUNT(DISTINCT country_id) as country_count
                 FROM daily_data
-                GROUP BY asn_name
+                GROUP BY asn_id
             ),
             day_over_day AS (
                 -- Calculate day-over-day changes for volatility metrics
                 SELECT 
-                    asn_name,
+                    asn_id,
                     date,
                     attacks,
-                    attacks - LAG(attacks) OVER (PARTITION BY asn_name ORDER BY date) as absolute_change,
+                    attacks - LAG(attacks) OVER (PARTITION BY asn_id ORDER BY date) as absolute_change,
                     CASE 
-                        WHEN LAG(attacks) OVER (PARTITION BY asn_name ORDER BY date) = 0 
+                        WHEN LAG(attacks) OVER (PARTITION BY asn_id ORDER BY date) = 0 
                         THEN (attacks - 1.0) / 1.0 * 100
-                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY asn_name ORDER BY date)) 
-                             / LAG(attacks) OVER (PARTITION BY asn_name ORDER BY date) * 100
+                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY asn_id ORDER BY date)) 
+                             / LAG(attacks) OVER (PARTITION BY asn_id ORDER BY date) * 100
                     END as pct_change
                 FROM daily_data
             ),
             volatility_metrics AS (
                 SELECT 
-                    asn_name,
+                    asn_id,
                     MAX(absolute_change) as max_absolute_change,
                     MAX(pct_change) as max_pct_change
                 FROM day_over_day
                 WHERE absolute_change IS NOT NULL
-                GROUP BY asn_name
+                GROUP BY asn_id
             ),
             last_7_days AS (
                 -- Calculate attacks in last 7 days
                 SELECT 
-                    asn_name,
+                    asn_id,
                     SUM(attacks) as recent_attacks
                 FROM daily_data
                 WHERE date > (SELECT MAX(date) FROM daily_data) - INTERVAL 7 DAY
-                GROUP BY asn_name
+                GROUP BY asn_id
             ),
             total_days AS (
                 -- Count total days in range
@@ -100,7 +100,7 @@ def register_asn_summary(app):
                 FROM date_range
             )
             SELECT 
-                s.asn_name,
+                n.asn_name,
                 s.total_attacks,
                 ROUND(s.avg_daily, 2) as avg_daily,
                 s.first_seen::VARCHAR as first_seen,
@@ -114,8 +114,9 @@ def register_asn_summary(app):
                 s.country_count
             FROM asn_stats s
             CROSS JOIN total_days td
-            LEFT JOIN volatility_metrics vm ON s.asn_name = vm.asn_name
-            LEFT JOIN last_7_days l7 ON s.asn_name = l7.asn_name
+            LEFT JOIN dim_asn n ON n.asn_id = s.asn_id
+            LEFT JOIN volatility_metrics vm ON s.asn_id = vm.asn_id
+            LEFT JOIN last_7_days l7 ON s.asn_id = l7.asn_id
             ORDER BY s.total_attacks DESC
             {f'LIMIT {limit}' if limit else ''}
             {f'OFFSET {offset}' if offset > 0 else ''}
@@ -5,6 +5,7 @@ Chart 2: Top countries with filter support
 
 from flask import jsonify, request
 from utils.db import get_db, parse_date_params
+from utils.dimensions import dimension_ids, id_sql
 
 
 def register_country_attacks(app):
@@ -20,31 +21,34 @@ def register_country_attacks(app):
         username_filter = request.args.get('username')
         
         conn = get_db()
+        ids = dimension_ids(conn, ip=ip_filter, username=username_filter, country=country_filter, asn=asn_filter)
+        params = []
         
         if username_filter:
             # Username filter takes priority - respect all other filters
             # Show only the country(ies) for this username with all filters applied
-            where_conditions = [f"u.username = '{username_filter}'"]
+            where_conditions = [f"u.username_id = {id_sql(ids['username'])}"]
             
             if ip_filter:
-                where_conditions.append(f"u.IP = '{ip_filter}'")
+                where_conditions.append(f"u.ip_id = {id_sql(ids['ip'])}")
             if country_filter:
-                where_conditions.append(f"u.country = '{country_filter}'")
+                where_conditions.append(f"u.country_id = {id_sql(ids['country'])}")
             if asn_filter:
-                where_conditions.append(f"u.asn_name = '{asn_filter}'")
+                where_conditions.append(f"u.asn_id = {id_sql(ids['asn'])}")
             
             where_clause = " AND ".join(where_conditions)
             
             # If country_filter is set, show only that country
             # Otherwise, show top countries for this username
             if country_filter:
+                params = [country_filter]
                 query = f"""
                     WITH date_range AS (
                         SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                     )
                     SELECT 
                         d.date::VARCHAR as date,
-                        '{country_filter}' as country,
+                        ?::VARCHAR as country,
                         COALESCE(SUM(u.attacks), 0) as attacks
                     FROM date_range d
                     LEFT JOIN daily_ip_username_attacks u
@@ -55,10 +59,10 @@ def register_country_attacks(app):
             else:
                 query = f"""
                     WITH top_countries AS (
-                        SELECT country
+                        SELECT country_id
                         FROM daily_ip_username_attacks u
                         WHERE date BETWEEN '{start}' AND '{end}' AND {where_clause}
-                        GROUP BY country
+                        GROUP BY country_id
                         ORDER BY SUM(u.attacks) DESC
                         LIMIT 10
                     ),
@@ -66,16 +70,17 @@ def register_country_attacks(app):
                         SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                     ),
                     complete_grid AS (
-                        SELECT d.date, t.country FROM date_range d CROSS JOIN top_countries t
+                        SELECT d.date, t.country_id FROM date_range d CROSS JOIN top_countries t
                     )
                     SELECT 
                         g.date::VARCHAR as date,
-                        g.country,
+                        c.country,
                         COALESCE(SUM(u.attacks), 0) as attacks
                     FROM complete_grid g
+                    LEFT JOIN dim_country c ON c.country_id = g.country_id
                     LEFT JOIN daily_ip_username_attacks u
-                        ON g.date = u.date AND g.country = u.country AND {where_clause}
-                    GROUP BY g.date, g.country
+                        ON g.date = u.date AND g.country_id = u.country_id AND {where_clause}
+                    GROUP BY g.date, g.country_id, c.country
                     ORDER BY g.date, attacks DESC
                 """
         elif ip_filter:
@@ -84,58 +89,66 @@ def register_country_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 ip_country AS (
-                    SELECT DISTINCT country FROM daily_ip_attacks WHERE IP = '{ip_filter}' LIMIT 1
+                    SELECT DISTINCT c.country
+                    FROM daily_ip_attacks i
+                    LEFT JOIN dim_country c ON c.country_id = i.country_id
+                    WHERE i.ip_id = {id_sql(ids['ip'])}
+                    LIMIT 1
                 )
                 SELECT 
                     d.date::VARCHAR as date,
-                    COALESCE(i.country, (SELECT country FROM ip_country)) as country,
+                    COALESCE(c.country, (SELECT country FROM ip_country)) as country,
                     COALESCE(i.attacks, 0) as attacks
                 FROM date_range d
                 CROSS JOIN ip_country
-                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.IP = '{ip_filter}'
+                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.ip_id = {id_sql(ids['ip'])}
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
                 ORDER BY d.date
             """
         elif asn_filter and country_filter:
+            params = [country_filter]
             query = f"""
                 WITH date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 )
                 SELECT 
                     d.date::VARCHAR as date,
-                    '{country_filter}' as country,
+                    ?::VARCHAR as country,
                     COALESCE(SUM(a.attacks), 0) as attacks
                 FROM date_range d
                 LEFT JOIN daily_asn_attacks a
-                    ON d.date = a.date AND a.country = '{country_filter}' AND a.asn_name = '{asn_filter}'
+                    ON d.date = a.date AND a.country_id = {id_sql(ids['country'])} AND a.asn_id = {id_sql(ids['asn'])}
                 GROUP BY d.date
                 ORDER BY d.date
             """
         elif country_filter:
+            params = [country_filter]
             query = f"""
                 SELECT date::VARCHAR as date, country, attacks
                 FROM daily_country_attacks
-                WHERE date BETWEEN '{start}' AND '{end}' AND country = '{country_filter}'
+                WHERE date BETWEEN '{start}' AND '{end}' AND country = ?
                 ORDER BY date
             """
         elif asn_filter:
             query = f"""
                 WITH asn_countries AS (
-                    SELECT country FROM daily_asn_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_name = '{asn_filter}'
-                    GROUP BY country ORDER BY SUM(attacks) DESC LIMIT 10
+                    SELECT country_id FROM daily_asn_attacks
+                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_id = {id_sql(ids['asn'])}
+                    GROUP BY country_id ORDER BY SUM(attacks) DESC LIMIT 10
                 ),
                 date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.country FROM date_range d CROSS JOIN asn_countries t
+                    SELECT d.date, t.country_id FROM date_range d CROSS JOIN asn_countries t
                 )
                 SELECT 
-                    g.date::VARCHAR as date, g.country, COALESCE(SUM(a.attacks), 0) as attacks
+                    g.date::VARCHAR as date, c.country, COALESCE(SUM(a.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_country c ON c.country_id = g.country_id
                 LEFT JOIN daily_asn_attacks a
-                    ON g.date = a.date AND g.country = a.country AND a.asn_name = '{asn_filter}'
-                GROUP BY g.date, g.country
+                    ON g.date = a.date AND g.country_id = a.country_id AND a.asn_id = {id_sql(ids['asn'])}
+                GROUP BY g.date, g.country_id, c.country
                 ORDER BY g.date, attacks DESC
             """
         else:
@@ -158,7 +171,7 @@ def register_country_attacks(app):
                 ORDER BY g.date, attacks DESC
             """
         
-        result = conn.execute(query).fetchall()
+        result = conn.execute(query, params).fetchall()
         conn.close()
         
         data = [{'date': row[0], 'country': row[1], 'attacks': row[2]} for row in result]
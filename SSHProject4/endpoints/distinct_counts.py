@@ -0,0 +1,38 @@
+"""
+Distinct Counts Endpoint
+Unique IPs, usernames and countries for any date range, merged from the daily HyperLogLog sketches
+"""
+
+from flask import jsonify
+from utils.db import get_db, parse_date_params
+from utils.hll import HLL_ERROR, hll_estimate_sql
+
+
+def register_distinct_counts(app):
+    """Register distinct counts endpoint"""
+    
+    @app.route('/api/distinct_counts', methods=['GET'])
+    def get_distinct_counts():
+        """Unique IPs / usernames / countries over the brushed range (approximate)"""
+        start, end = parse_date_params()
+        
+        registers = f"""(
+            SELECT dimension, bucket, rho FROM daily_sketches
+            WHERE date BETWEEN '{start}' AND '{end}'
+        ) s"""
+        
+        conn = get_db()
+        result = conn.execute(hll_estimate_sql(registers, keys=['dimension'])).fetchall()
+        conn.close()
+        
+        counts = dict(result)
+        return jsonify({
+            'unique_ips': counts.get('ip', 0),
+            'unique_usernames': counts.get('username', 0),
+            'unique_countries': counts.get('country', 0),
+            'relative_error': round(HLL_ERROR, 4),
+            'date_range': {
+                'start': start,
+                'end': end
+            }
+        })
@@ -21,7 +21,8 @@ def register_index(app):
                 '/api/ip_attacks': 'Top 10 IPs',
                 '/api/username_attacks': 'Top 10 usernames',
                 '/api/asn_attacks': 'Top 10 ASNs',
-                '/api/date_range': 'Available dates'
+                '/api/date_range': 'Available dates',
+                '/api/distinct_counts': 'Unique IPs/usernames/countries (HyperLogLog estimate)'
             },
             'note': 'Uses only summary tables - fast queries!'
         })
\ No newline at end of file
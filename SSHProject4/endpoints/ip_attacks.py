@@ -5,6 +5,8 @@ Chart 4: Top IPs with filter support
 
 from flask import jsonify, request
 from utils.db import get_db, parse_date_params
+from utils.dimensions import dimension_ids, id_sql
+from utils.heavy_hitters import top_entities_sql
 
 
 def register_ip_attacks(app):
@@ -20,45 +22,49 @@ def register_ip_attacks(app):
         username_filter = request.args.get('username')
         
         conn = get_db()
+        ids = dimension_ids(conn, ip=ip_filter, username=username_filter, country=country_filter, asn=asn_filter)
+        params = []
         
         if username_filter:
             # Username filter takes priority - respect all other filters
-            where_conditions = [f"u.username = '{username_filter}'"]
+            where_conditions = [f"u.username_id = {id_sql(ids['username'])}"]
             
             if ip_filter:
-                where_conditions.append(f"u.IP = '{ip_filter}'")
+                where_conditions.append(f"u.ip_id = {id_sql(ids['ip'])}")
             if country_filter:
-                where_conditions.append(f"u.country = '{country_filter}'")
+                where_conditions.append(f"u.country_id = {id_sql(ids['country'])}")
             if asn_filter:
-                where_conditions.append(f"u.asn_name = '{asn_filter}'")
+                where_conditions.append(f"u.asn_id = {id_sql(ids['asn'])}")
             
             where_clause = " AND ".join(where_conditions)
             
             # If ip_filter is set, show only that IP
             # Otherwise, show top IPs for this username
             if ip_filter:
+                params = [ip_filter]
                 query = f"""
                     WITH date_range AS (
                         SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                     )
                     SELECT 
                         d.date::VARCHAR as date,
-                        '{ip_filter}' as IP,
-                        COALESCE(MAX(u.country), 'Unknown') as country,
+                        ?::VARCHAR as IP,
+                        COALESCE(MAX(c.country), 'Unknown') as country,
                         COALESCE(SUM(u.attacks), 0) as attacks
                     FROM date_range d
                     LEFT JOIN daily_ip_username_attacks u
                         ON d.date = u.date AND {where_clause}
+                    LEFT JOIN dim_country c ON c.country_id = u.country_id
                     GROUP BY d.date
                     ORDER BY d.date
                 """
             else:
                 query = f"""
                     WITH top_ips AS (
-                        SELECT IP
+                        SELECT ip_id
                         FROM daily_ip_username_attacks u
                         WHERE date BETWEEN '{start}' AND '{end}' AND {where_clause}
-                        GROUP BY IP
+                        GROUP BY ip_id
                         ORDER BY SUM(u.attacks) DESC
                         LIMIT 10
                     ),
@@ -66,42 +72,47 @@ def register_ip_attacks(app):
                         SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                     ),
                     complete_grid AS (
-                        SELECT d.date, t.IP FROM date_range d CROSS JOIN top_ips t
+                        SELECT d.date, t.ip_id FROM date_range d CROSS JOIN top_ips t
                     )
                     SELECT 
                         g.date::VARCHAR as date,
-                        g.IP,
-                        COALESCE(MAX(u.country), 'Mixed') as country,
+                        p.IP,
+                        COALESCE(MAX(c.country), 'Mixed') as country,
                         COALESCE(SUM(u.attacks), 0) as attacks
                     FROM complete_grid g
+                    LEFT JOIN dim_ip p ON p.ip_id = g.ip_id
                     LEFT JOIN daily_ip_username_attacks u
-                        ON g.date = u.date AND g.IP = u.IP AND {where_clause}
-                    GROUP BY g.date, g.IP
+                        ON g.date = u.date AND g.ip_id = u.ip_id AND {where_clause}
+                    LEFT JOIN dim_country c ON c.country_id = u.country_id
+                    GROUP BY g.date, g.ip_id, p.IP
                     ORDER BY g.date, attacks DESC
                 """
         elif ip_filter:
+            params = [ip_filter]
             query = f"""
                 WITH date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 )
                 SELECT 
                     d.date::VARCHAR as date,
-                    '{ip_filter}' as IP,
-                    COALESCE(MAX(i.country), 'Unknown') as country,
+                    ?::VARCHAR as IP,
+                    COALESCE(MAX(c.country), 'Unknown') as country,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM date_range d
-                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.IP = '{ip_filter}'
+                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.ip_id = {id_sql(ids['ip'])}
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
                 GROUP BY d.date
                 ORDER BY d.date
             """
         elif asn_filter and country_filter:
+            params = [country_filter]
             query = f"""
                 WITH top_ips AS (
-                    SELECT IP
+                    SELECT ip_id
                     FROM daily_ip_attacks
                     WHERE date BETWEEN '{start}' AND '{end}'
-                      AND asn_name = '{asn_filter}' AND country = '{country_filter}'
-                    GROUP BY IP
+                      AND asn_id = {id_sql(ids['asn'])} AND country_id = {id_sql(ids['country'])}
+                    GROUP BY ip_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -109,27 +120,30 @@ def register_ip_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.IP FROM date_range d CROSS JOIN top_ips t
+                    SELECT d.date, t.ip_id FROM date_range d CROSS JOIN top_ips t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.IP,
-                    COALESCE(MAX(i.country), '{country_filter}') as country,
+                    p.IP,
+                    COALESCE(MAX(c.country), ?) as country,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_ip p ON p.ip_id = g.ip_id
                 LEFT JOIN daily_ip_attacks i 
-                    ON g.date = i.date AND g.IP = i.IP
-                    AND i.asn_name = '{asn_filter}' AND i.country = '{country_filter}'
-                GROUP BY g.date, g.IP
+                    ON g.date = i.date AND g.ip_id = i.ip_id
+                    AND i.asn_id = {id_sql(ids['asn'])} AND i.country_id = {id_sql(ids['country'])}
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
+                GROUP BY g.date, g.ip_id, p.IP
                 ORDER BY g.date, attacks DESC
             """
         elif country_filter:
+            params = [country_filter]
             query = f"""
                 WITH top_ips AS (
-                    SELECT IP
+                    SELECT ip_id
                     FROM daily_ip_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND country = '{country_filter}'
-                    GROUP BY IP
+                    WHERE date BETWEEN '{start}' AND '{end}' AND country_id = {id_sql(ids['country'])}
+                    GROUP BY ip_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -137,26 +151,28 @@ def register_ip_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.IP FROM date_range d CROSS JOIN top_ips t
+                    SELECT d.date, t.ip_id FROM date_range d CROSS JOIN top_ips t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.IP,
-                    COALESCE(MAX(i.country), '{country_filter}') as country,
+                    p.IP,
+                    COALESCE(MAX(c.country), ?) as country,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_ip p ON p.ip_id = g.ip_id
                 LEFT JOIN daily_ip_attacks i 
-                    ON g.date = i.date AND g.IP = i.IP AND i.country = '{country_filter}'
-                GROUP BY g.date, g.IP
+                    ON g.date = i.date AND g.ip_id = i.ip_id AND i.country_id = {id_sql(ids['country'])}
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
+                GROUP BY g.date, g.ip_id, p.IP
                 ORDER BY g.date, attacks DESC
             """
         elif asn_filter:
             query = f"""
                 WITH top_ips AS (
-                    SELECT IP
+                    SELECT ip_id
                     FROM daily_ip_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_name = '{asn_filter}'
-                    GROUP BY IP
+                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_id = {id_sql(ids['asn'])}
+                    GROUP BY ip_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -164,47 +180,55 @@ def register_ip_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.IP FROM date_range d CROSS JOIN top_ips t
+                    SELECT d.date, t.ip_id FROM date_range d CROSS JOIN top_ips t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.IP,
-                    COALESCE(MAX(i.country), 'Mixed') as country,
+                    p.IP,
+                    COALESCE(MAX(c.country), 'Mixed') as country,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_ip p ON p.ip_id = g.ip_id
                 LEFT JOIN daily_ip_attacks i 
-                    ON g.date = i.date AND g.IP = i.IP AND i.asn_name = '{asn_filter}'
-                GROUP BY g.date, g.IP
+                    ON g.date = i.date AND g.ip_id = i.ip_id AND i.asn_id = {id_sql(ids['asn'])}
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
+                GROUP BY g.date, g.ip_id, p.IP
                 ORDER BY g.date, attacks DESC
             """
         else:
-            query = f"""
-                WITH top_ips AS (
-                    SELECT IP
+            # Per-day heavy hitters answer wide ranges; exact GROUP BY when they cannot
+            top_ips = top_entities_sql(conn, 'ip', start, end, 10, 'ip_id') or f"""
+                    SELECT ip_id
                     FROM daily_ip_attacks
                     WHERE date BETWEEN '{start}' AND '{end}'
-                    GROUP BY IP
+                    GROUP BY ip_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
+            """
+            query = f"""
+                WITH top_ips AS (
+                    {top_ips}
                 ),
                 date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.IP FROM date_range d CROSS JOIN top_ips t
+                    SELECT d.date, t.ip_id FROM date_range d CROSS JOIN top_ips t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.IP,
-                    COALESCE(MAX(i.country), 'Mixed') as country,
+                    p.IP,
+                    COALESCE(MAX(c.country), 'Mixed') as country,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM complete_grid g
-                LEFT JOIN daily_ip_attacks i ON g.date = i.date AND g.IP = i.IP
-                GROUP BY g.date, g.IP
+                LEFT JOIN dim_ip p ON p.ip_id = g.ip_id
+                LEFT JOIN daily_ip_attacks i ON g.date = i.date AND g.ip_id = i.ip_id
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
+                GROUP BY g.date, g.ip_id, p.IP
                 ORDER BY g.date, attacks DESC
             """
         
-        result = conn.execute(query).fetchall()
+        result = conn.execute(query, params).fetchall()
         conn.close()
         
         data = [{'date': row[0], 'IP': row[1], 'country': row[2], 'attacks': row[3]} for row in result]
@@ -5,7 +5,9 @@ Uses simpler aggregation without complete grid for better performance
 """
 
 from flask import jsonify, request
+from utils.daily_tables import sketch_count_sql
 from utils.db import get_db, parse_date_params
+from utils.hll import HLL_ERROR
 
 
 def register_ip_summary(app):
@@ -13,19 +15,16 @@ def register_ip_summary(app):
     
     @app.route('/api/ip_count', methods=['GET'])
     def get_ip_count():
-        """Get total count of unique IPs (for debugging)"""
+        """Get total count of unique IPs (for debugging) - HyperLogLog estimate"""
         start, end = parse_date_params()
         conn = get_db()
-        query = f"""
-            SELECT COUNT(DISTINCT IP) as total
-            FROM daily_ip_attacks
-            WHERE date BETWEEN '{start}' AND '{end}'
-        """
+        query = sketch_count_sql('ip', start, end)
         result = conn.execute(query).fetchone()
         conn.close()
         total = result[0]
         print(f"[IP_COUNT] Total unique IPs: {total:,}")
-        return jsonify({'total_ips': total, 'date_range': {'start': start, 'end': end}})
+        return jsonify({'total_ips': total, 'relative_error': round(HLL_ERROR, 4),
+                        'date_range': {'start': start, 'end': end}})
     
     @app.route('/api/ip_summary', methods=['GET'])
     def get_ip_summary():
@@ -38,10 +37,10 @@ def register_ip_summary(app):
         
         # Step 1: Get the top N IPs by total attacks
         top_query = f"""
-            SELECT IP
+            SELECT ip_id
             FROM daily_ip_attacks
             WHERE date BETWEEN '{start}' AND '{end}'
-            GROUP BY IP
+            GROUP BY ip_id
             ORDER BY SUM(attacks) DESC
             LIMIT {limit}
             OFFSET {offset}
@@ -53,7 +52,7 @@ def register_ip_summary(app):
             conn.close()
             return jsonify([])
         
-        # Get list of IPs
+        # Get list of IP ids
         ips = [row[0] for row in top_result]
         
         # Create placeholder string for parameterized query
@@ -63,54 +62,56 @@ def register_ip_summary(app):
         stats_query = f"""
             WITH ip_stats AS (
                 SELECT 
-                    IP,
+                    ip_id,
                     SUM(attacks) as total_attacks,
                     AVG(attacks) as avg_daily,
                     COUNT(DISTINCT date) as active_days,
                     MIN(date) as first_seen,
                     MAX(date) as last_seen,
                     MAX(attacks) as max_daily,
-                    MODE() WITHIN GROUP (ORDER BY country) as most_common_country,
-                    MODE() WITHIN GROUP (ORDER BY asn_name) as most_common_asn
-                FROM daily_ip_attacks
+                    MODE() WITHIN GROUP (ORDER BY c.country) as most_common_country,
+                    MODE() WITHIN GROUP (ORDER BY a.asn_name) as most_common_asn
+                FROM daily_ip_attacks i
+                LEFT JOIN dim_country c ON c.country_id = i.country_id
+                LEFT JOIN dim_asn a ON a.asn_id = i.asn_id
                 WHERE date BETWEEN '{start}' AND '{end}'
-                  AND IP IN ({placeholders})
-                GROUP BY IP
+                  AND ip_id IN ({placeholders})
+                GROUP BY ip_id
             ),
             day_over_day AS (
                 SELECT 
-                    IP,
-                    attacks - LAG(attacks) OVER (PARTITION BY IP ORDER BY date) as absolute_change,
+                    ip_id,
+                    attacks - LAG(attacks) OVER (PARTITION BY ip_id ORDER BY date) as absolute_change,
                     CASE 
-                        WHEN LAG(attacks) OVER (PARTITION BY IP ORDER BY date) = 0 
+                        WHEN LAG(attacks) OVER (PARTITION BY ip_id ORDER BY date) = 0 
                         THEN (attacks - 1.0) / 1.0 * 100
-                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY IP ORDER BY date)) 
-                             / LAG(attacks) OVER (PARTITION BY IP ORDER BY date) * 100
+                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY ip_id ORDER BY date)) 
+                             / LAG(attacks) OVER (PARTITION BY ip_id ORDER BY date) * 100
                     END as pct_change
                 FROM daily_ip_attacks
                 WHERE date BETWEEN '{start}' AND '{end}'
-                  AND IP IN ({placeholders})
+                  AND ip_id IN ({placeholders})
             ),
             volatility_metrics AS (
                 SELECT 
-                    IP,
+                    ip_id,
                     MAX(absolute_change) as max_absolute_change,
                     MAX(pct_change) as max_pct_change
                 FROM day_over_day
                 WHERE absolute_change IS NOT NULL
-                GROUP BY IP
+                GROUP BY ip_id
             ),
             last_7_days AS (
                 SELECT 
-                    IP,
+                    ip_id,
                     SUM(attacks) as recent_attacks
                 FROM daily_ip_attacks
                 WHERE date BETWEEN (DATE '{end}' - INTERVAL 6 DAY) AND DATE '{end}'
-                  AND IP IN ({placeholders})
-                GROUP BY IP
+                  AND ip_id IN ({placeholders})
+                GROUP BY ip_id
             )
             SELECT 
-                s.IP,
+                p.IP,
                 s.total_attacks,
                 ROUND(s.avg_daily, 2) as avg_daily,
                 s.first_seen::VARCHAR as first_seen,
@@ -124,8 +125,9 @@ def register_ip_summary(app):
                 s.most_common_country as country,
                 s.most_common_asn as asn_name
             FROM ip_stats s
-            LEFT JOIN volatility_metrics vm ON s.IP = vm.IP
-            LEFT JOIN last_7_days l7 ON s.IP = l7.IP
+            LEFT JOIN dim_ip p ON p.ip_id = s.ip_id
+            LEFT JOIN volatility_metrics vm ON s.ip_id = vm.ip_id
+            LEFT JOIN last_7_days l7 ON s.ip_id = l7.ip_id
             ORDER BY s.total_attacks DESC
         """
         
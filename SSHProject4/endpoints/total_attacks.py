@@ -5,6 +5,7 @@ Chart 1: Total attacks over time with filter support
 
 from flask import jsonify, request
 from utils.db import get_db, parse_date_params
+from utils.dimensions import dimension_ids, id_sql
 
 
 def register_total_attacks(app):
@@ -20,17 +21,18 @@ def register_total_attacks(app):
         username_filter = request.args.get('username')
         
         conn = get_db()
+        ids = dimension_ids(conn, ip=ip_filter, username=username_filter, country=country_filter, asn=asn_filter)
         
         if username_filter:
             # Username filter takes priority - respect all other filters
-            where_conditions = [f"u.username = '{username_filter}'"]
+            where_conditions = [f"u.username_id = {id_sql(ids['username'])}"]
             
             if ip_filter:
-                where_conditions.append(f"u.IP = '{ip_filter}'")
+                where_conditions.append(f"u.ip_id = {id_sql(ids['ip'])}")
             if country_filter:
-                where_conditions.append(f"u.country = '{country_filter}'")
+                where_conditions.append(f"u.country_id = {id_sql(ids['country'])}")
             if asn_filter:
-                where_conditions.append(f"u.asn_name = '{asn_filter}'")
+                where_conditions.append(f"u.asn_id = {id_sql(ids['asn'])}")
             
             where_clause = " AND ".join(where_conditions)
             
@@ -56,7 +58,7 @@ def register_total_attacks(app):
                     d.date::VARCHAR as date,
                     COALESCE(SUM(i.attacks), 0) as attacks
                 FROM date_range d
-                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.IP = '{ip_filter}'
+                LEFT JOIN daily_ip_attacks i ON d.date = i.date AND i.ip_id = {id_sql(ids['ip'])}
                 GROUP BY d.date
                 ORDER BY d.date
             """).fetchall()
@@ -70,7 +72,7 @@ def register_total_attacks(app):
                     COALESCE(SUM(a.attacks), 0) as attacks
                 FROM date_range d
                 LEFT JOIN daily_asn_attacks a
-                    ON d.date = a.date AND a.asn_name = '{asn_filter}' AND a.country = '{country_filter}'
+                    ON d.date = a.date AND a.asn_id = {id_sql(ids['asn'])} AND a.country_id = {id_sql(ids['country'])}
                 GROUP BY d.date
                 ORDER BY d.date
             """).fetchall()
@@ -78,9 +80,9 @@ def register_total_attacks(app):
             result = conn.execute(f"""
                 SELECT date::VARCHAR as date, attacks
                 FROM daily_country_attacks
-                WHERE date BETWEEN '{start}' AND '{end}' AND country = '{country_filter}'
+                WHERE date BETWEEN '{start}' AND '{end}' AND country = ?
                 ORDER BY date
-            """).fetchall()
+            """, [country_filter]).fetchall()
         elif asn_filter:
             result = conn.execute(f"""
                 WITH date_range AS (
@@ -90,7 +92,7 @@ def register_total_attacks(app):
                     d.date::VARCHAR as date,
                     COALESCE(SUM(a.attacks), 0) as attacks
                 FROM date_range d
-                LEFT JOIN daily_asn_attacks a ON d.date = a.date AND a.asn_name = '{asn_filter}'
+                LEFT JOIN daily_asn_attacks a ON d.date = a.date AND a.asn_id = {id_sql(ids['asn'])}
                 GROUP BY d.date
                 ORDER BY d.date
             """).fetchall()
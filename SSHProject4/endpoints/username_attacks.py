@@ -5,6 +5,8 @@ Chart 5: Top usernames with filter support
 
 from flask import jsonify, request
 from utils.db import get_db, parse_date_params
+from utils.dimensions import dimension_ids, id_sql
+from utils.heavy_hitters import top_entities_sql
 
 
 def register_username_attacks(app):
@@ -20,42 +22,46 @@ def register_username_attacks(app):
         username_filter = request.args.get('username')
         
         conn = get_db()
+        ids = dimension_ids(conn, ip=ip_filter, username=username_filter, country=country_filter, asn=asn_filter)
+        params = []
         
         if username_filter:
             # Show only this username - single line chart, respecting all other filters
-            where_conditions = [f"u.username = '{username_filter}'"]
+            where_conditions = [f"u.username_id = {id_sql(ids['username'])}"]
             
             if ip_filter:
-                where_conditions.append(f"u.IP = '{ip_filter}'")
+                where_conditions.append(f"u.ip_id = {id_sql(ids['ip'])}")
             if country_filter:
-                where_conditions.append(f"u.country = '{country_filter}'")
+                where_conditions.append(f"u.country_id = {id_sql(ids['country'])}")
             if asn_filter:
-                where_conditions.append(f"u.asn_name = '{asn_filter}'")
+                where_conditions.append(f"u.asn_id = {id_sql(ids['asn'])}")
             
             where_clause = " AND ".join(where_conditions)
             
+            params = [username_filter]
             query = f"""
                 WITH date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 )
                 SELECT 
                     d.date::VARCHAR as date,
-                    '{username_filter}' as username,
-                    COALESCE(MAX(u.country), 'Mixed') as country,
+                    ?::VARCHAR as username,
+                    COALESCE(MAX(c.country), 'Mixed') as country,
                     COALESCE(SUM(u.attacks), 0) as attacks
                 FROM date_range d
                 LEFT JOIN daily_ip_username_attacks u
                     ON d.date = u.date AND {where_clause}
+                LEFT JOIN dim_country c ON c.country_id = u.country_id
                 GROUP BY d.date
                 ORDER BY d.date
             """
         elif ip_filter:
             query = f"""
                 WITH top_usernames AS (
-                    SELECT username
+                    SELECT username_id
                     FROM daily_ip_username_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND IP = '{ip_filter}'
-                    GROUP BY username
+                    WHERE date BETWEEN '{start}' AND '{end}' AND ip_id = {id_sql(ids['ip'])}
+                    GROUP BY username_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -63,27 +69,29 @@ def register_username_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.username FROM date_range d CROSS JOIN top_usernames t
+                    SELECT d.date, t.username_id FROM date_range d CROSS JOIN top_usernames t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.username,
+                    n.username,
                     'Single IP' as country,
                     COALESCE(SUM(d.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_username n ON n.username_id = g.username_id
                 LEFT JOIN daily_ip_username_attacks d 
-                    ON g.date = d.date AND g.username = d.username AND d.IP = '{ip_filter}'
-                GROUP BY g.date, g.username
+                    ON g.date = d.date AND g.username_id = d.username_id AND d.ip_id = {id_sql(ids['ip'])}
+                GROUP BY g.date, g.username_id, n.username
                 ORDER BY g.date, attacks DESC
             """
         elif asn_filter and country_filter:
+            params = [country_filter]
             query = f"""
                 WITH top_usernames AS (
-                    SELECT username
+                    SELECT username_id
                     FROM daily_username_attacks
                     WHERE date BETWEEN '{start}' AND '{end}'
-                      AND asn_name = '{asn_filter}' AND country = '{country_filter}'
-                    GROUP BY username
+                      AND asn_id = {id_sql(ids['asn'])} AND country_id = {id_sql(ids['country'])}
+                    GROUP BY username_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -91,27 +99,29 @@ def register_username_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.username FROM date_range d CROSS JOIN top_usernames t
+                    SELECT d.date, t.username_id FROM date_range d CROSS JOIN top_usernames t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.username,
-                    '{country_filter}' as country,
+                    n.username,
+                    ?::VARCHAR as country,
                     COALESCE(SUM(d.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_username n ON n.username_id = g.username_id
                 LEFT JOIN daily_username_attacks d 
-                    ON g.date = d.date AND g.username = d.username
-                    AND d.asn_name = '{asn_filter}' AND d.country = '{country_filter}'
-                GROUP BY g.date, g.username
+                    ON g.date = d.date AND g.username_id = d.username_id
+                    AND d.asn_id = {id_sql(ids['asn'])} AND d.country_id = {id_sql(ids['country'])}
+                GROUP BY g.date, g.username_id, n.username
                 ORDER BY g.date, attacks DESC
             """
         elif country_filter:
+            params = [country_filter]
             query = f"""
                 WITH top_usernames AS (
-                    SELECT username
+                    SELECT username_id
                     FROM daily_username_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND country = '{country_filter}'
-                    GROUP BY username
+                    WHERE date BETWEEN '{start}' AND '{end}' AND country_id = {id_sql(ids['country'])}
+                    GROUP BY username_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -119,26 +129,27 @@ def register_username_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.username FROM date_range d CROSS JOIN top_usernames t
+                    SELECT d.date, t.username_id FROM date_range d CROSS JOIN top_usernames t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.username,
-                    '{country_filter}' as country,
+                    n.username,
+                    ?::VARCHAR as country,
                     COALESCE(SUM(d.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_username n ON n.username_id = g.username_id
                 LEFT JOIN daily_username_attacks d 
-                    ON g.date = d.date AND g.username = d.username AND d.country = '{country_filter}'
-                GROUP BY g.date, g.username
+                    ON g.date = d.date AND g.username_id = d.username_id AND d.country_id = {id_sql(ids['country'])}
+                GROUP BY g.date, g.username_id, n.username
                 ORDER BY g.date, attacks DESC
             """
         elif asn_filter:
             query = f"""
                 WITH top_usernames AS (
-                    SELECT username
+                    SELECT username_id
                     FROM daily_username_attacks
-                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_name = '{asn_filter}'
-                    GROUP BY username
+                    WHERE date BETWEEN '{start}' AND '{end}' AND asn_id = {id_sql(ids['asn'])}
+                    GROUP BY username_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
                 ),
@@ -146,48 +157,54 @@ def register_username_attacks(app):
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.username FROM date_range d CROSS JOIN top_usernames t
+                    SELECT d.date, t.username_id FROM date_range d CROSS JOIN top_usernames t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.username,
+                    n.username,
                     'Mixed' as country,
                     COALESCE(SUM(d.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_username n ON n.username_id = g.username_id
                 LEFT JOIN daily_username_attacks d 
-                    ON g.date = d.date AND g.username = d.username AND d.asn_name = '{asn_filter}'
-                GROUP BY g.date, g.username
+                    ON g.date = d.date AND g.username_id = d.username_id AND d.asn_id = {id_sql(ids['asn'])}
+                GROUP BY g.date, g.username_id, n.username
                 ORDER BY g.date, attacks DESC
             """
         else:
-            query = f"""
-                WITH top_usernames AS (
-                    SELECT username
+            # Per-day heavy hitters answer wide ranges; exact GROUP BY when they cannot
+            top_usernames = top_entities_sql(conn, 'username', start, end, 10, 'username_id') or f"""
+                    SELECT username_id
                     FROM daily_username_attacks
                     WHERE date BETWEEN '{start}' AND '{end}'
-                    GROUP BY username
+                    GROUP BY username_id
                     ORDER BY SUM(attacks) DESC
                     LIMIT 10
+            """
+            query = f"""
+                WITH top_usernames AS (
+                    {top_usernames}
                 ),
                 date_range AS (
                     SELECT UNNEST(generate_series(DATE '{start}', DATE '{end}', INTERVAL 1 DAY))::DATE as date
                 ),
                 complete_grid AS (
-                    SELECT d.date, t.username FROM date_range d CROSS JOIN top_usernames t
+                    SELECT d.date, t.username_id FROM date_range d CROSS JOIN top_usernames t
                 )
                 SELECT 
                     g.date::VARCHAR as date,
-                    g.username,
+                    n.username,
                     'Mixed' as country,
                     COALESCE(SUM(d.attacks), 0) as attacks
                 FROM complete_grid g
+                LEFT JOIN dim_username n ON n.username_id = g.username_id
                 LEFT JOIN daily_username_attacks d 
-                    ON g.date = d.date AND g.username = d.username
-                GROUP BY g.date, g.username
+                    ON g.date = d.date AND g.username_id = d.username_id
+                GROUP BY g.date, g.username_id, n.username
                 ORDER BY g.date, attacks DESC
             """
         
-        result = conn.execute(query).fetchall()
+        result = conn.execute(query, params).fetchall()
         conn.close()
         
         data = [{'date': row[0], 'username': row[1], 'country': row[2], 'attacks': row[3]} for row in result]
@@ -5,7 +5,9 @@ OPTIMIZED: Only processes the usernames that will be returned
 """
 
 from flask import jsonify, request
+from utils.daily_tables import sketch_count_sql
 from utils.db import get_db, parse_date_params
+from utils.hll import HLL_ERROR
 
 
 def register_username_summary(app):
@@ -13,16 +15,12 @@ def register_username_summary(app):
     
     @app.route('/api/username_count', methods=['GET'])
     def get_username_count():
-        """Get total count of unique usernames (for debugging)"""
+        """Get total count of unique usernames (for debugging) - HyperLogLog estimate"""
         start, end = parse_date_params()
         
         conn = get_db()
         
-        query = f"""
-            SELECT COUNT(DISTINCT username) as total_usernames
-            FROM daily_username_attacks
-            WHERE date BETWEEN '{start}' AND '{end}'
-        """
+        query = sketch_count_sql('username', start, end)
         
         result = conn.execute(query).fetchone()
         conn.close()
@@ -32,6 +30,7 @@ def register_username_summary(app):
         
         return jsonify({
             'total_usernames': total,
+            'relative_error': round(HLL_ERROR, 4),
             'date_range': {
                 'start': start,
                 'end': end
@@ -48,11 +47,7 @@ def register_username_summary(app):
         conn = get_db()
         
         # DEBUG: Get total count of unique usernames
-        count_query = f"""
-            SELECT COUNT(DISTINCT username) as total_usernames
-            FROM daily_username_attacks
-            WHERE date BETWEEN '{start}' AND '{end}'
-        """
+        count_query = sketch_count_sql('username', start, end)
         total_count = conn.execute(count_query).fetchone()[0]
         print(f"[USERNAME_SUMMARY] Total unique usernames in dataset: {total_count:,}")
         print(f"[USERNAME_SUMMARY] Requested limit={limit}, offset={offset}")
@@ -60,10 +55,10 @@ def register_username_summary(app):
         
         # Step 1: Get the top N usernames by total attacks
         top_query = f"""
-            SELECT username
+            SELECT username_id
             FROM daily_username_attacks
             WHERE date BETWEEN '{start}' AND '{end}'
-            GROUP BY username
+            GROUP BY username_id
             ORDER BY SUM(attacks) DESC
             LIMIT {limit}
             OFFSET {offset}
@@ -77,7 +72,7 @@ def register_username_summary(app):
             print(f"[USERNAME_SUMMARY] No usernames found at offset {offset}")
             return jsonify([])
         
-        # Get list of usernames
+        # Get list of username ids
         usernames = [row[0] for row in top_result]
         
         # Create placeholder string for parameterized query
@@ -87,53 +82,53 @@ def register_username_summary(app):
         stats_query = f"""
             WITH username_stats AS (
                 SELECT 
-                    username,
+                    username_id,
                     SUM(attacks) as total_attacks,
                     AVG(attacks) as avg_daily,
                     COUNT(DISTINCT date) as active_days,
                     MIN(date) as first_seen,
                     MAX(date) as last_seen,
                     MAX(attacks) as max_daily,
-                    COUNT(DISTINCT country) as country_count
+                    COUNT(DISTINCT country_id) as country_count
                 FROM daily_username_attacks
                 WHERE date BETWEEN '{start}' AND '{end}'
-                  AND username IN ({placeholders})
-                GROUP BY username
+                  AND username_id IN ({placeholders})
+                GROUP BY username_id
             ),
             day_over_day AS (
                 SELECT 
-                    username,
-                    attacks - LAG(attacks) OVER (PARTITION BY username ORDER BY date) as absolute_change,
+                    username_id,
+                    attacks - LAG(attacks) OVER (PARTITION BY username_id ORDER BY date) as absolute_change,
                     CASE 
-                        WHEN LAG(attacks) OVER (PARTITION BY username ORDER BY date) = 0 
+                        WHEN LAG(attacks) OVER (PARTITION BY username_id ORDER BY date) = 0 
                         THEN (attacks - 1.0) / 1.0 * 100
-                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY username ORDER BY date)) 
-                             / LAG(attacks) OVER (PARTITION BY username ORDER BY date) * 100
+                        ELSE (attacks - LAG(attacks) OVER (PARTITION BY username_id ORDER BY date)) 
+                             / LAG(attacks) OVER (PARTITION BY username_id ORDER BY date) * 100
                     END as pct_change
                 FROM daily_username_attacks
                 WHERE date BETWEEN '{start}' AND '{end}'
-                  AND username IN ({placeholders})
+                  AND username_id IN ({placeholders})
             ),
             volatility_metrics AS (
                 SELECT 
-                    username,
+                    username_id,
                     MAX(absolute_change) as max_absolute_change,
                     MAX(pct_change) as max_pct_change
                 FROM day_over_day
                 WHERE absolute_change IS NOT NULL
-                GROUP BY username
+                GROUP BY username_id
             ),
             last_7_days AS (
                 SELECT 
-                    username,
+                    username_id,
                     SUM(attacks) as recent_attacks
                 FROM daily_username_attacks
                 WHERE date BETWEEN (DATE '{end}' - INTERVAL 6 DAY) AND DATE '{end}'
-                  AND username IN ({placeholders})
-                GROUP BY username
+                  AND username_id IN ({placeholders})
+                GROUP BY username_id
             )
             SELECT 
-                s.username,
+                n.username,
                 s.total_attacks,
                 ROUND(s.avg_daily, 2) as avg_daily,
                 s.first_seen::VARCHAR as first_seen,
@@ -146,8 +141,9 @@ def register_username_summary(app):
                 s.active_days,
                 s.country_count
             FROM username_stats s
-            LEFT JOIN volatility_metrics vm ON s.username = vm.username
-            LEFT JOIN last_7_days l7 ON s.username = l7.username
+            LEFT JOIN dim_username n ON n.username_id = s.username_id
+            LEFT JOIN volatility_metrics vm ON s.username_id = vm.username_id
+            LEFT JOIN last_7_days l7 ON s.username_id = l7.username_id
             ORDER BY s.total_attacks DESC
         """
         
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Synthetic Honeypot Data Generator
+Writes csv_files/{node}/YYYYMMDD.csv in the exact honeypot schema plus a matching ipinfo.json,
+so the converter, builders and API can be benchmarked without the real data
+Zipfian popularity over IPs, usernames, ASNs and countries; deterministic for a given --seed
+(independent of --workers); vectorized with numpy/Arrow, so 213M rows is a matter of minutes
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+# Rows generated and written per block (bounds memory regardless of file size)
+BLOCK_ROWS = 1_000_000
+
+# Zipf exponents: a handful of IPs/usernames/ASNs account for most attacks
+IP_EXPONENT = 1.1
+USERNAME_EXPONENT = 1.2
+ASN_EXPONENT = 1.3
+COUNTRY_EXPONENT = 1.2
+
+# Share of IPs that are IPv6 and share left out of ipinfo.json (enrichment misses)
+IPV6_SHARE = 0.005
+UNKNOWN_IP_SHARE = 0.02
+
+# (country, code, continent, latitude, longitude), most attacked-from first
+COUNTRIES = [
+    ('China', 'CN', 'AS', 35.0, 105.0), ('United States', 'US', 'NA', 38.0, -97.0),
+    ('Russia', 'RU', 'EU', 60.0, 100.0), ('India', 'IN', 'AS', 20.0, 77.0),
+    ('Brazil', 'BR', 'SA', -10.0, -55.0), ('Vietnam', 'VN', 'AS', 16.0, 106.0),
+    ('Germany', 'DE', 'EU', 51.0, 9.0), ('South Korea', 'KR', 'AS', 37.0, 127.5),
+    ('Netherlands', 'NL', 'EU', 52.5, 5.75), ('Singapore', 'SG', 'AS', 1.37, 103.8),
+    ('Indonesia', 'ID', 'AS', -5.0, 120.0), ('France', 'FR', 'EU', 46.0, 2.0),
+    ('United Kingdom', 'GB', 'EU', 54.0, -2.0), ('Iran', 'IR', 'AS', 32.0, 53.0),
+    ('Taiwan', 'TW', 'AS', 23.5, 121.0), ('Hong Kong', 'HK', 'AS', 22.25, 114.17),
+    ('Japan', 'JP', 'AS', 36.0, 138.0), ('Canada', 'CA', 'NA', 60.0, -95.0),
+    ('Ukraine', 'UA', 'EU', 49.0, 32.0), ('Thailand', 'TH', 'AS', 15.0, 100.0),
+    ('Argentina', 'AR', 'SA', -34.0, -64.0), ('Mexico', 'MX', 'NA', 23.0, -102.0),
+    ('Turkey', 'TR', 'AS', 39.0, 35.0), ('Italy', 'IT', 'EU', 42.8, 12.8),
+    ('Poland', 'PL', 'EU', 52.0, 20.0), ('Bangladesh', 'BD', 'AS', 24.0, 90.0),
+    ('Pakistan', 'PK', 'AS', 30.0, 70.0), ('Egypt', 'EG', 'AF', 27.0, 30.0),
+    ('South Africa', 'ZA', 'AF', -29.0, 24.0), ('Australia', 'AU', 'OC', -27.0, 133.0),
+]
+
+# Well-known hosting/ISP ASNs; the long tail is generated
+KNOWN_ASNS = [
+    ('AS4134', 'Chinanet', 'chinatelecom.com.cn', 'isp'),
+    ('AS14061', 'DigitalOcean, LLC', 'digitalocean.com', 'hosting'),
+    ('AS4837', 'CHINA UNICOM China169 Backbone', 'chinaunicom.cn', 'isp'),
+    ('AS16509', 'Amazon.com, Inc.', 'amazon.com', 'hosting'),
+    ('AS45090', 'Shenzhen Tencent Computer Systems Company Limited', 'tencent.com', 'hosting'),
+    ('AS37963', 'Hangzhou Alibaba Advertising Co.,Ltd.', 'alibaba.com', 'hosting'),
+    ('AS24940', 'Hetzner Online GmbH', 'hetzner.com', 'hosting'),
+    ('AS16276', 'OVH SAS', 'ovh.com', 'hosting'),
+    ('AS396982', 'Google LLC', 'google.com', 'hosting'),
+    ('AS8075', 'Microsoft Corporation', 'microsoft.com', 'hosting'),
+    ('AS4766', 'Korea Telecom', 'kt.com', 'isp'),
+    ('AS45899', 'VNPT Corp', 'vnpt.vn', 'isp'),
+    ('AS63949', 'Akamai Connected Cloud', 'linode.com', 'hosting'),
+    ('AS9009', 'M247 Europe SRL', 'm247.com', 'hosting'),
+    ('AS209605', 'UAB Host Baltic', 'hostbaltic.lt', 'hosting'),
+]
+GENERATED_ASNS = 400
+
+# Usernames brute-forcers try first; the long tail is generated
+COMMON_USERNAMES = [
+    'root', 'admin', 'user', 'test', 'ubuntu', 'oracle', 'postgres', 'git', 'ftpuser', 'guest',
+    'pi', 'support', 'mysql', 'deploy', 'hadoop', 'centos', 'test1', 'ubnt', 'www', 'jenkins',
+    'dev', 'nagios', 'tomcat', 'steam', 'minecraft', 'es', 'elastic', 'debian', 'administrator', 'sa',
+]
+
+# (event, share, Message template) - templates match the rules in utils/events.py
+EVENT_TEMPLATES = [
+    ('failed_auth', 0.38, 'Failed password for {user} from {ip} port {sport} ssh2'),
+    ('failed_invalid', 0.08, 'Failed password for invalid user {user} from {ip} port {sport} ssh2'),
+    ('invalid_user', 0.22, 'Invalid user {user} from {ip} port {sport}'),
+    ('disconnect', 0.11, 'Received disconnect from {ip} port {sport}:11: Bye Bye [preauth]'),
+    ('connection_closed', 0.13, 'Connection closed by {ip} port {sport} [preauth]'),
+    ('max_attempts', 0.03, 'Disconnecting authenticating user {user} {ip} port {sport}: '
+                           'Too many authentication failures [preauth]'),
+    ('auth_failure', 0.02, 'pam_unix(sshd:auth): authentication failure; logname= uid=0 euid=0 tty=ssh '
+                           'ruser= rhost={ip}  user={user}'),
+    ('negotiation_failed', 0.025, 'Unable to negotiate with {ip} port {sport}: '
+                                  'no matching key exchange method found.'),
+    ('accepted', 0.005, 'Accepted password for {user} from {ip} port {sport} ssh2'),
+]
+
+CSV_SCHEMA = pa.schema([
+    ('Date', pa.int32()),
+    ('Time', pa.int64()),
+    ('IP', pa.string()),
+    ('Node', pa.string()),
+    ('Port', pa.int64()),
+    ('PID', pa.string()),
+    ('Username', pa.string()),
+    ('Tag', pa.string()),
+    ('Message', pa.string()),
+])
+
+# Printed in config.ini / the closing hint: the pipeline runs from inside the output folder
+CONVERTER_SCRIPT = (Path(__file__).resolve().parent / 'convert_to_parquet_FIXED.py').as_posix()
+
+COMPRESSION_SUFFIXES = {'none': '.csv', 'gzip': '.csv.gz', 'zstd': '.csv.zst'}
+
+# Per-process catalogs for pool workers (see _init_worker)
+_catalog = None
+
+
+def zipf_cdf(n, exponent):
+    """Cumulative distribution of a finite Zipf law over ranks 1..n"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+
+def zipf_sample(rng, cdf, size):
+    """Ranks (0-based) drawn from a zipf_cdf"""
+    return np.minimum(np.searchsorted(cdf, rng.random(size), side='right'), len(cdf) - 1)
+
+
+def build_catalog(seed, num_ips, num_usernames):
+    """
+    IPs with their country/ASN, and usernames - all from the seed
+    IP index order is popularity order (index 0 is the most active attacker)
+    """
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 0]))
+    
+    # ASNs: known ones first, then a generated tail; each ASN lives in one country (Zipf over countries)
+    asns = list(KNOWN_ASNS)
+    for i in range(GENERATED_ASNS):
+        asns.append((f"AS{200000 + i}", f"Synthetic Hosting {i} Ltd", f"hosting{i}.example", 'hosting' if i % 3 else 'isp'))
+    country_cdf = zipf_cdf(len(COUNTRIES), COUNTRY_EXPONENT)
+    asn_countries = zipf_sample(rng, country_cdf, len(asns))
+    
+    # Unique public-looking IPv4 addresses (first octet 1-223, skipping 10 and 127)
+    num_v6 = int(num_ips * IPV6_SHARE)
+    values = np.unique(rng.integers(0x01000000, 0xDF000000, int((num_ips - num_v6) * 1.1) + 16, dtype=np.uint64))
+    first_octet = values >> 24
+    values = values[(first_octet != 10) & (first_octet != 127)]
+    values = rng.permutation(values)[:num_ips - num_v6]
+    octets = [(values >> shift) & 255 for shift in (24, 16, 8, 0)]
+    ipv4 = pc.binary_join_element_wise(*[pc.cast(pa.array(o), pa.string()) for o in octets], '.')
+    ipv6 = [f"2001:db8:{rng.integers(0, 65536):x}::{i:x}" for i in range(num_v6)]
+    ips = rng.permutation(np.array(ipv4.to_pylist() + ipv6, dtype=object))
+    
+    ip_asns = zipf_sample(rng, zipf_cdf(len(asns), ASN_EXPONENT), len(ips))
+    
+    # Long tail of usernames after the common ones: user17, admin18, test19, ...
+    stems = ['user', 'admin', 'test', 'oracle', 'git', 'support']
+    tail = [f"{stems[i % len(stems)]}{i}" for i in range(len(COMMON_USERNAMES), num_usernames)]
+    usernames = COMMON_USERNAMES[:num_usernames] + tail
+    
+    return {
+        'ips': ips.tolist(),
+        'ip_asns': ip_asns,
+        'asns': asns,
+        'asn_countries': asn_countries,
+        'usernames': usernames,
+    }
+
+
+def write_ipinfo(catalog, path, seed):
+    """ipinfo.json in the shape compile_ip_lookup() reads; the last UNKNOWN_IP_SHARE of IPs is left out"""
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 1]))
+    ips = catalog['ips']
+    known = len(ips) - int(len(ips) * UNKNOWN_IP_SHARE)
+    jitter = rng.normal(0, 2.0, size=(known, 2))
+    
+    # Streamed entry by entry - a 5M-IP dict would not need to fit in memory at once
+    with open(path, 'w') as f:
+        f.write('{')
+        for i in range(known):
+            asn, name, domain, asn_type = catalog['asns'][catalog['ip_asns'][i]]
+            country, code, continent, lat, lng = COUNTRIES[catalog['asn_countries'][catalog['ip_asns'][i]]]
+            entry = {
+                'cntn': continent,
+                'cc': code,
+                'cn': country,
+                'lat': f"{lat + jitter[i, 0]:.4f}",
+                'lng': f"{lng + jitter[i, 1]:.4f}",
+                'asn': {'asn': asn, 'name': name, 'domain': domain, 'type': asn_type},
+            }
+            f.write(f"{', ' if i else ''}{json.dumps(ips[i])}: {json.dumps(entry)}")
+        f.write('}')
+    return known
+
+
+def file_row_counts(rows, nodes, days, seed):
+    """Rows per (node, day): busier nodes and bursty days, summing exactly to rows"""
+    rng = np.random.default_rng(np.random.SeedSequence([seed, 2]))
+    node_weights = 1.0 / np.arange(1, len(nodes) + 1) ** 0.5
+    day_weights = rng.lognormal(0.0, 0.35, size=len(days))
+    weights = np.outer(node_weights, day_weights).ravel()
+    
+    counts = np.floor(weights / weights.sum() * rows).astype(np.int64)
+    counts[np.argsort(-weights)[:rows - counts.sum()]] += 1
+    return counts.reshape(len(nodes), len(days))
+
+
+def build_messages(event_ids, users, ips, sports):
+    """Vectorized Message strings: each template filled for its rows, then put back in row order"""
+    order = np.argsort(event_ids, kind='stable')
+    bounds = np.searchsorted(event_ids[order], np.arange(len(EVENT_TEMPLATES) + 1))
+    fields = {'user': users, 'ip': ips, 'sport': sports}
+    
+    pieces = []
+    for event_id, (_, _, template) in enumerate(EVENT_TEMPLATES):
+        rows = pa.array(order[bounds[event_id]:bounds[event_id + 1]])
+        if len(rows) == 0:
+            continue
+        
+        # 'Failed password for {user} from ...' -> ['Failed password for ', user, ' from ', ...]
+        parts = []
+        for i, text in enumerate(template.replace('}', '{').split('{')):
+            if i % 2:
+                parts.append(fields[text].take(rows))
+            elif text:
+                parts.append(pa.scalar(text))
+        pieces.append(pc.binary_join_element_wise(*parts, ''))
+    
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.arange(len(order))
+    return pa.concat_arrays(pieces).take(pa.array(inverse))
+
+
+def generate_block(rng, catalog_arrays, day, node, rows, time_start, time_end, duplicate_rate):
+    """One time-ordered block of rows for a node/day"""
+    ip_cdf, username_cdf, ips, usernames, event_cdf = catalog_arrays
+    
+    times = np.sort(rng.integers(time_start, time_end, rows))
+    ip_values = ips.take(pa.array(zipf_sample(rng, ip_cdf, rows)))
+    user_values = usernames.take(pa.array(zipf_sample(rng, username_cdf, rows)))
+    event_ids = np.minimum(np.searchsorted(event_cdf, rng.random(rows), side='right'), len(event_cdf) - 1)
+    sports = pc.cast(pa.array(rng.integers(1024, 65536, rows)), pa.string())
+    
+    table = pa.table({
+        'Date': pa.array(np.full(rows, int(day.strftime('%Y%m%d')), dtype=np.int32)),
+        'Time': pa.array(times),
+        'IP': ip_values,
+        'Node': pa.repeat(pa.scalar(node), rows),
+        'Port': pa.array(np.full(rows, 22, dtype=np.int64)),
+        'PID': pc.cast(pa.array(rng.integers(1000, 65536, rows)), pa.string()),
+        'Username': user_values,
+        'Tag': pa.repeat(pa.scalar('sshd'), rows),
+        'Message': build_messages(event_ids, user_values, ip_values, sports),
+    }, schema=CSV_SCHEMA)
+    
+    # Overlapping exports: a contiguous run of lines written twice (see the converter's dedup)
+    if duplicate_rate > 0:
+        repeat = int(rows * duplicate_rate)
+        if repeat:
+            start = int(rng.integers(0, rows - repeat + 1))
+            table = pa.concat_tables([table, table.slice(start, repeat)])
+            table = table.take(pa.array(np.argsort(table['Time'].to_numpy(), kind='stable')))
+    
+    return table
+
+
+def _init_worker(catalog):
+    """Pool initializer: Arrow arrays and CDFs built once per process"""
+    global _catalog
+    event_cdf = np.cumsum([share for _, share, _ in EVENT_TEMPLATES])
+    _catalog = (
+        zipf_cdf(len(catalog['ips']), IP_EXPONENT),
+        zipf_cdf(len(catalog['usernames']), USERNAME_EXPONENT),
+        pa.array(catalog['ips'], pa.string()),
+        pa.array(catalog['usernames'], pa.string()),
+        event_cdf / event_cdf[-1],
+    )
+
+
+def generate_file(job):
+    """Write one node/day CSV in time-ordered blocks; returns (path, rows written)"""
+    path, node_index, node, day_index, day, rows, seed, duplicate_rate, compression = job
+    
+    day_start = int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+    blocks = max(1, -(-rows // BLOCK_ROWS))
+    # One seed per block, derived from the file's position - identical output for any worker count
+    block_seeds = np.random.SeedSequence([seed, 3, node_index, day_index]).spawn(blocks)
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_options = pacsv.WriteOptions(quoting_style='needed')
+    written = 0
+    
+    sink = pa.OSFile(str(path), 'wb') if compression == 'none' else pa.CompressedOutputStream(str(path), compression)
+    with sink, pacsv.CSVWriter(sink, CSV_SCHEMA, write_options=write_options) as writer:
+        for block, block_seed in enumerate(block_seeds):
+            block_rows = rows * (block + 1) // blocks - rows * block // blocks
+            if block_rows == 0:
+                continue
+            table = generate_block(
+                np.random.default_rng(block_seed), _catalog, day, node, block_rows,
+                day_start + 86400 * block // blocks, day_start + 86400 * (block + 1) // blocks,
+                duplicate_rate,
+            )
+            writer.write_table(table)
+            written += table.num_rows
+    
+    return path, written
+
+
+def write_config(output_dir):
+    """config.ini next to the data so the pipeline can run from inside output_dir"""
+    config_path = output_dir / 'config.ini'
+    if config_path.exists():
+        return False
+    config_path.write_text(
+        "# Generated by generate_synthetic_data.py - run the pipeline from this folder\n"
+        f"# e.g. python {CONVERTER_SCRIPT}\n\n"
+        "[paths]\n"
+        "json_file = ./ipinfo.json\n"
+        "ip_lookup = ./ipinfo.lookup.arrow\n"
+        "csv_directory = ./csv_files/\n"
+        "output_directory = ./parquet_output\n"
+        "duckdb_path = ./attack_data.db\n"
+        "run_log = ./ingest_runs.jsonl\n\n"
+        "[processing]\n"
+        "chunk_size = 100000\n"
+        "compression = snappy\n"
+        "target_file_size_mb = 256\n"
+        "layout = standard\n"
+        "partitioning = month\n"
+    )
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic honeypot CSVs and ipinfo.json for scale testing")
+    parser.add_argument('--rows', type=lambda v: int(float(v)), default=1_000_000,
+                        help="Total rows across all files, e.g. 1e6 or 213e6 (default: 1,000,000)")
+    parser.add_argument('--days', type=int, default=30, help="Days of logs (default: 30)")
+    parser.add_argument('--start-date', type=date.fromisoformat, default=date(2022, 11, 1),
+                        help="First day, YYYY-MM-DD (default: 2022-11-01)")
+    parser.add_argument('--nodes', default='clem,utah,wisc', help="Comma-separated honeypot nodes")
+    parser.add_argument('--ips', type=int, help="Distinct attacker IPs (default: rows/100, 1,000 to 5,000,000)")
+    parser.add_argument('--usernames', type=int, help="Distinct usernames (default: rows/2000, 100 to 200,000)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help="Share of rows written twice, as overlapping exports would (default: 0)")
+    parser.add_argument('--compression', choices=sorted(COMPRESSION_SUFFIXES), default='none',
+                        help="Write .csv, .csv.gz or .csv.zst files (default: none)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument('--workers', type=int, default=1, help="Files generated in parallel (default: 1)")
+    parser.add_argument('--output', type=Path, default=Path('./synthetic_data'),
+                        help="Output folder for csv_files/, ipinfo.json and config.ini (default: ./synthetic_data)")
+    args = parser.parse_args()
+    
+    nodes = [node.strip() for node in args.nodes.split(',') if node.strip()]
+    days = [args.start_date + timedelta(days=i) for i in range(args.days)]
+    num_ips = args.ips or min(max(args.rows // 100, 1000), 5_000_000)
+    num_usernames = args.usernames or min(max(args.rows // 2000, 100), 200_000)
+    
+    if args.rows <= 0 or not days or not nodes:
+        print("❌ Need positive --rows, --days and at least one node")
+        return
+    
+    print("="*70)
+    print("Synthetic Honeypot Data Generator")
+    print("="*70)
+    print(f"\n📂 Output: {args.output}")
+    print(f"📊 {args.rows:,} rows over {len(nodes)} nodes x {len(days)} days "
+          f"({days[0]} to {days[-1]}), seed {args.seed}")
+    print(f"🌐 {num_ips:,} IPs, {num_usernames:,} usernames, {len(KNOWN_ASNS) + GENERATED_ASNS} ASNs, "
+          f"{len(COUNTRIES)} countries")
+    
+    overall_start = time.time()
+    args.output.mkdir(parents=True, exist_ok=True)
+    
+    start = time.time()
+    catalog = build_catalog(args.seed, num_ips, num_usernames)
+    known = write_ipinfo(catalog, args.output / 'ipinfo.json', args.seed)
+    print(f"\n✅ ipinfo.json: {known:,} IPs ({num_ips - known:,} left unknown) in {time.time() - start:.1f}s")
+    if write_config(args.output):
+        print(f"✅ config.ini written")
+    
+    counts = file_row_counts(args.rows, nodes, days, args.seed)
+    suffix = COMPRESSION_SUFFIXES[args.compression]
+    jobs = [
+        (args.output / 'csv_files' / node / f"{day:%Y%m%d}{suffix}", node_index, node, day_index, day,
+         int(counts[node_index, day_index]), args.seed, args.duplicate_rate, args.compression)
+        for node_index, node in enumerate(nodes)
+        for day_index, day in enumerate(days)
+    ]
+    
+    print(f"\n🔄 Writing {len(jobs)} files with {args.workers} worker(s)...")
+    start = time.time()
+    total_rows = 0
+    
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(catalog,)) as pool:
+            results = pool.map(generate_file, jobs)
+            for done, (path, rows) in enumerate(results, 1):
+                total_rows += rows
+                if done % max(1, len(jobs) // 10) == 0 or done == len(jobs):
+                    print(f"   {done}/{len(jobs)} files, {total_rows:,} rows")
+    else:
+        _init_worker(catalog)
+        for done, job in enumerate(jobs, 1):
+            path, rows = generate_file(job)
+            total_rows += rows
+            if done % max(1, len(jobs) // 10) == 0 or done == len(jobs):
+                print(f"   {done}/{len(jobs)} files, {total_rows:,} rows")
+    
+    elapsed = time.time() - start
+    size = sum(job[0].stat().st_size for job in jobs)
+    
+    print(f"\n✅ {total_rows:,} rows, {size / 1024**3:.2f} GB in {elapsed:.1f}s "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"   Total time: {time.time() - overall_start:.1f}s")
+    print(f"\n💡 Next: cd {args.output} && python {CONVERTER_SCRIPT}")
+    print("\n" + "="*70)
+
+
+if __name__ == "__main__":
+    main()
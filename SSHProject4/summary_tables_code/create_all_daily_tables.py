@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Create All daily_* Tables in One Pass
+Reads each Parquet scan once into per-(date, IP, username, country, ASN) attack counts,
+then rolls those up into daily_stats, daily_country_attacks, daily_asn_attacks,
+daily_username_attacks, daily_ip_attacks, daily_ip_username_attacks and daily_sketches
+(plus daily_heavy_hitters, the per-day top entities derived from them)
+Replaces 02_setup_duckdb's daily_stats plus the country/ASN/username/IP builders' passes
+
+--incremental redoes only the dates whose Parquet files were added, changed or removed
+since the last build, and the volatile_* rows of the entities seen on those dates
+"""
+
+import argparse
+import duckdb
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.daily_tables import (DAILY_TABLES, create_event_counts, date_list_sql, insert_event_counts,
+                                rollup_daily_tables)
+from utils.heavy_hitters import HEAVY_HITTERS_TABLE, refresh_heavy_hitters
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+from utils.summary_sources import changed_dates, files_for_dates, load_snapshot, save_snapshot, scan_parquet_files
+from utils.volatile_tables import collect_volatile_keys, existing_volatile_tables, refresh_volatile_keys
+
+DB_PATH = './attack_data.db'
+PARQUET_DIR = Path('./parquet_output')
+
+def count_scans(conn, file_groups, dates=None):
+    """Pass 1: every scan read once, aggregated to the finest grain any table needs"""
+    print(f"\n🔄 Processing {len(file_groups)} scans...")
+    
+    start_time = time.time()
+    success_count = 0
+    date_filter = f" WHERE datetime::DATE IN ({date_list_sql(dates)})" if dates else ""
+    layout = output_layout(PARQUET_DIR)
+    
+    create_event_counts(conn)
+    
+    for i, (partition, files) in enumerate(file_groups, 1):
+        
+        if i == 1 or i % 100 == 0 or i == len(file_groups):
+            elapsed = time.time() - start_time
+            rate = i / elapsed if elapsed > 0 else 0
+            remaining = (len(file_groups) - i) / rate if rate > 0 else 0
+            print(f"   [{i}/{len(file_groups)}] Processing... ({rate:.1f} scans/sec, ~{remaining/60:.1f}min left)")
+        
+        try:
+            source = standard_source_sql(files, PARQUET_DIR, layout)
+            if date_filter:
+                # A month file also holds days that did not change
+                source = f"(SELECT * FROM {source}{date_filter}) day_rows"
+            insert_event_counts(conn, source)
+            success_count += 1
+        except Exception as e:
+            print(f"   ❌ Error on {partition}: {e}")
+            continue
+    
+    count_rows = conn.execute("SELECT COUNT(*) FROM event_counts").fetchone()[0]
+    print(f"\n✅ Processed {success_count}/{len(file_groups)} scans ({(time.time() - start_time)/60:.1f} minutes)")
+    print(f"   {count_rows:,} (date, IP, username, country, ASN) counts")
+    return success_count == len(file_groups)
+
+
+def rollup(conn, dates=None):
+    """Pass 2: roll the counts up into every table (distinct counts are exact - all scans are in)"""
+    print(f"\n🔄 Rolling up tables" + (f" for {len(dates)} dates..." if dates else "..."))
+    for name in DAILY_TABLES:
+        start = time.time()
+        rollup_daily_tables(conn, tables=[name], dates=dates)
+        rows = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+        print(f"   - {name}: {rows:,} rows ({time.time() - start:.1f}s)")
+    conn.execute("DROP TABLE event_counts")
+    
+    # Per-day top entities for the chart endpoints' top-K (derived from the tables above)
+    start = time.time()
+    refresh_heavy_hitters(conn, dates)
+    rows = conn.execute(f"SELECT COUNT(*) FROM {HEAVY_HITTERS_TABLE}").fetchone()[0]
+    print(f"   - {HEAVY_HITTERS_TABLE}: {rows:,} rows ({time.time() - start:.1f}s)")
+
+
+def update_changed_dates(conn, settings, files, dates, ranges):
+    """Replace the rows of dates in every daily_* and volatile_* table; False if a scan failed"""
+    changed_files = files_for_dates(ranges, dates)
+    # Named like partition_file_groups(): the date= partition, else the file
+    file_groups = batch_file_groups(
+        [(path.parent.name if path.parent.name.startswith('date=') else path.name, [path]) for path in changed_files],
+        settings.batch_files)
+    print(f"📅 {len(dates)} dates to redo ({min(dates)} to {max(dates)}) from {len(changed_files)} files")
+    
+    volatile = existing_volatile_tables(conn)
+    
+    # One transaction: a failed scan or a crash leaves the tables as they were
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        # Entities on these dates before the replace (they may vanish)...
+        for name in volatile:
+            collect_volatile_keys(conn, name, dates)
+        
+        if not count_scans(conn, file_groups, dates):
+            conn.execute("ROLLBACK")
+            return False
+        rollup(conn, dates)
+        
+        # ...and after it (they may be new)
+        if volatile:
+            print(f"\n🔄 Refreshing volatile tables...")
+        for name in volatile:
+            start = time.time()
+            collect_volatile_keys(conn, name, dates)
+            entities = refresh_volatile_keys(conn, name)
+            print(f"   - {name}: {entities:,} entities recomputed ({time.time() - start:.1f}s)")
+        
+        save_snapshot(conn, files, ranges)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every daily_* table from one pass over the Parquet files")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only redo the dates whose Parquet files changed since the last build")
+    args = parser.parse_args()
+    
+    print("="*70)
+    print("Creating All daily_* Tables - " + ("Incremental" if args.incremental else "Single Pass"))
+    print("="*70)
+    
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
+    # Listed before reading: a file that changes during the build is picked up next time
+    files = scan_parquet_files(PARQUET_DIR)
+    
+    conn = duckdb.connect(DB_PATH)
+    configure_connection(conn, settings)
+    
+    incremental = False
+    if args.incremental:
+        snapshot = load_snapshot(conn)
+        if snapshot is None:
+            print("\n⚠️  No previous build recorded - rebuilding all dates")
+        else:
+            incremental = True
+            dates, ranges, counts = changed_dates(snapshot, files)
+            print(f"\n📂 {len(files)} Parquet files: {counts['new']} new, {counts['changed']} changed, "
+                  f"{counts['removed']} removed since the last build")
+            if not dates:
+                save_snapshot(conn, files, ranges)
+                conn.close()
+                print("✅ All daily_* tables are up to date")
+                return
+    
+    if not incremental:
+        # All files - day partitions (date=) or files (year=/month=), batched per read_parquet()
+        file_groups = batch_file_groups(partition_file_groups(PARQUET_DIR), settings.batch_files)
+        print(f"\n📂 Found {len(files)} Parquet files ({len(file_groups)} scans)")
+        print(f"🔨 Tables: {', '.join(DAILY_TABLES)}")
+        estimated_mins = (len(file_groups) * 0.15) / 60
+        print(f"⏱️  Estimated time: ~{estimated_mins:.0f} minutes")
+    print(f"⚙️  {settings.describe()}")
+    
+    response = input("\nProceed? (y/n): ").strip().lower()
+    if response != 'y':
+        print("Cancelled")
+        conn.close()
+        return
+    
+    overall_start = time.time()
+    
+    if incremental:
+        if not update_changed_dates(conn, settings, files, dates, ranges):
+            conn.close()
+            print("\n❌ Scans failed - no tables changed")
+            return
+    else:
+        complete = count_scans(conn, file_groups)
+        rollup(conn)
+        
+        # Record what the tables were built from; after a failed scan --incremental rebuilds everything
+        if complete:
+            save_snapshot(conn, files, changed_dates({}, files)[1])
+        else:
+            conn.execute("DROP TABLE IF EXISTS summary_sources")
+    
+    overall_elapsed = time.time() - overall_start
+    
+    # Every table counts the same attacks, apart from rows its WHERE leaves out
+    print(f"\n{'='*70}")
+    print("FINAL SUMMARY")
+    print(f"{'='*70}")
+    
+    expected_total = conn.execute("SELECT SUM(total_attacks) FROM daily_stats").fetchone()[0] or 0
+    print(f"\n✅ Tables {'updated' if incremental else 'created'} successfully!")
+    print(f"   Total attacks: {expected_total:,}")
+    print(f"   Time taken: {overall_elapsed/60:.1f} minutes")
+    
+    print(f"\n🔍 Verification (attacks per table vs daily_stats):")
+    for name in DAILY_TABLES:
+        if name in ('daily_stats', 'daily_sketches'):
+            continue
+        total = conn.execute(f"SELECT SUM(attacks) FROM {name}").fetchone()[0] or 0
+        pct = total / expected_total * 100 if expected_total else 0
+        print(f"   {name:<28} {total:>14,} ({pct:.2f}%)")
+    
+    conn.close()
+    
+    print(f"\n{'='*70}")
+    if incremental:
+        print("✅ Done! daily_* and volatile_* tables updated - restart API")
+    else:
+        print("✅ Done! Next: volatile summaries, then restart API")
+    print(f"{'='*70}")
+
+
+if __name__ == "__main__":
+    main()
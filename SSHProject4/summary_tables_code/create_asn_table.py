@@ -5,9 +5,16 @@ Updated version of your existing script
 """
 
 import duckdb
+import sys
 import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.daily_tables import create_daily_tables, insert_rows
+from utils.heavy_hitters import refresh_heavy_hitters
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+
 DB_PATH = './attack_data.db'
 PARQUET_DIR = Path('./parquet_output')
 
@@ -16,11 +23,20 @@ def main():
     print("Creating daily_asn_attacks Table - REAL DATA WITH COUNTRY")
     print("="*70)
     
-    # Find all Parquet files
-    all_files = sorted(PARQUET_DIR.glob("year=*/month=*/*.parquet"))
-    print(f"\n📂 Found {len(all_files)} Parquet files")
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
+    # Find all Parquet files - day partitions (date=) or files (year=/month=), batched per read_parquet()
+    file_groups = batch_file_groups(partition_file_groups(PARQUET_DIR), settings.batch_files)
+    layout = output_layout(PARQUET_DIR)
+    file_count = sum(len(files) for _, files in file_groups)
+    print(f"\n📂 Found {file_count} Parquet files ({len(file_groups)} scans)")
+    print(f"⚙️  {settings.describe()}")
     
-    estimated_mins = (len(all_files) * 0.5) / 60
+    estimated_mins = (len(file_groups) * 0.5) / 60
     print(f"⏱️  Estimated time: ~{estimated_mins:.0f} minutes")
     
     response = input("\nProceed? (y/n): ").strip().lower()
@@ -30,15 +46,16 @@ def main():
     
     # Connect to database
     conn = duckdb.connect(DB_PATH)
+    configure_connection(conn, settings)
     
-    # Drop existing table if it exists
-    print(f"\n🗑️  Dropping old table (if exists)...")
-    conn.execute("DROP TABLE IF EXISTS daily_asn_attacks")
+    # Drop existing staging table if it exists
+    print(f"\n🗑️  Dropping old staging table (if exists)...")
+    conn.execute("DROP TABLE IF EXISTS daily_asn_attacks_temp")
     
-    # Create empty table WITH COUNTRY
-    print(f"🔨 Creating empty table...")
+    # Create empty staging table WITH COUNTRY (names - ids are assigned once at the end)
+    print(f"🔨 Creating empty staging table...")
     conn.execute("""
-        CREATE TABLE daily_asn_attacks (
+        CREATE TABLE daily_asn_attacks_temp (
             date DATE,
             asn VARCHAR,
             asn_name VARCHAR,
@@ -48,33 +65,33 @@ def main():
     """)
     print("✅ Table created")
     
-    # Process files one by one
-    print(f"\n🔄 Processing {len(all_files)} files...")
+    # Process scans one by one
+    print(f"\n🔄 Processing {len(file_groups)} scans...")
     
     overall_start = time.time()
     success_count = 0
     
-    for i, parquet_file in enumerate(all_files, 1):
+    for i, (partition, files) in enumerate(file_groups, 1):
         
-        if i == 1 or i % 100 == 0 or i == len(all_files):
+        if i == 1 or i % 100 == 0 or i == len(file_groups):
             elapsed = time.time() - overall_start
             rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(all_files) - i) / rate if rate > 0 else 0
-            print(f"   [{i}/{len(all_files)}] Processing... ({rate:.1f} files/sec, ~{remaining/60:.1f}min left)")
+            remaining = (len(file_groups) - i) / rate if rate > 0 else 0
+            print(f"   [{i}/{len(file_groups)}] Processing... ({rate:.1f} scans/sec, ~{remaining/60:.1f}min left)")
         
         try:
-            file_str = str(parquet_file)
+            source = standard_source_sql(files, PARQUET_DIR, layout)
             
             # ADD COUNTRY TO SELECT AND GROUP BY
             conn.execute(f"""
-                INSERT INTO daily_asn_attacks
+                INSERT INTO daily_asn_attacks_temp
                 SELECT 
                     DATE_TRUNC('day', datetime)::DATE as date,
                     asn,
                     asn_name,
                     country,
                     COUNT(*) as attacks
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 WHERE asn_name IS NOT NULL AND asn_name != 'Unknown'
                   AND country IS NOT NULL AND country != ''
                 GROUP BY date, asn, asn_name, country
@@ -83,35 +100,37 @@ def main():
             success_count += 1
             
         except Exception as e:
-            print(f"   ❌ Error on {parquet_file.name}: {e}")
+            print(f"   ❌ Error on {partition}: {e}")
             continue
     
     overall_elapsed = time.time() - overall_start
-    print(f"\n✅ Processed {success_count}/{len(all_files)} files ({overall_elapsed/60:.1f} minutes)")
+    print(f"\n✅ Processed {success_count}/{len(file_groups)} scans ({overall_elapsed/60:.1f} minutes)")
     
     # Aggregate duplicates (in case same date/asn/country appears in multiple files)
+    # into the final table, which stores dim_asn / dim_country ids
     print(f"\n🔄 Aggregating duplicate entries...")
-    conn.execute("""
-        CREATE TABLE daily_asn_attacks_final AS
+    create_daily_tables(conn, ['daily_asn_attacks'])
+    insert_rows(conn, 'daily_asn_attacks', """
         SELECT 
             date,
             asn,
             asn_name,
             country,
             SUM(attacks) as attacks
-        FROM daily_asn_attacks
+        FROM daily_asn_attacks_temp
         GROUP BY date, asn, asn_name, country
-        ORDER BY date, asn_name, country
     """)
-    conn.execute("DROP TABLE daily_asn_attacks")
-    conn.execute("ALTER TABLE daily_asn_attacks_final RENAME TO daily_asn_attacks")
+    conn.execute("DROP TABLE daily_asn_attacks_temp")
     print(f"   ✅ Aggregation complete")
     
+    # Keep the chart endpoints' per-day top entities in step with the rebuilt table
+    refresh_heavy_hitters(conn, dimensions=['asn'])
+    
     # Get final stats
     total_rows = conn.execute("SELECT COUNT(*) FROM daily_asn_attacks").fetchone()[0]
     total_attacks = conn.execute("SELECT SUM(attacks) FROM daily_asn_attacks").fetchone()[0]
-    total_asns = conn.execute("SELECT COUNT(DISTINCT asn_name) FROM daily_asn_attacks").fetchone()[0]
-    total_countries = conn.execute("SELECT COUNT(DISTINCT country) FROM daily_asn_attacks").fetchone()[0]
+    total_asns = conn.execute("SELECT COUNT(DISTINCT asn_id) FROM daily_asn_attacks").fetchone()[0]
+    total_countries = conn.execute("SELECT COUNT(DISTINCT country_id) FROM daily_asn_attacks").fetchone()[0]
     
     print(f"\n{'='*70}")
     print("FINAL SUMMARY")
@@ -126,9 +145,11 @@ def main():
     # Show sample - DigitalOcean on Nov 1 BY COUNTRY
     print(f"\n📊 Sample (DigitalOcean on Nov 1, 2022 by country):")
     sample = conn.execute("""
-        SELECT date, asn_name, country, attacks
+        SELECT date, a.asn_name, c.country, attacks
         FROM daily_asn_attacks
-        WHERE asn_name LIKE '%DigitalOcean%' AND date = '2022-11-01'
+        JOIN dim_asn a USING (asn_id)
+        JOIN dim_country c USING (country_id)
+        WHERE a.asn_name LIKE '%DigitalOcean%' AND date = '2022-11-01'
         ORDER BY attacks DESC
     """).fetchall()
     
@@ -141,10 +162,11 @@ def main():
     # Show top 5 ASNs on Nov 1 (aggregated across countries)
     print(f"\n📊 Top 5 ASNs on Nov 1, 2022 (total across all countries):")
     top = conn.execute("""
-        SELECT asn_name, SUM(attacks) as total_attacks
+        SELECT a.asn_name, SUM(attacks) as total_attacks
         FROM daily_asn_attacks
+        JOIN dim_asn a USING (asn_id)
         WHERE date = '2022-11-01'
-        GROUP BY asn_name
+        GROUP BY a.asn_name
         ORDER BY total_attacks DESC
         LIMIT 5
     """).fetchall()
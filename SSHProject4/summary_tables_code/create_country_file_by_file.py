@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 """
-Create daily_country_attacks by Processing Individual Files One-by-One
-Completely avoids file limit issues - never opens more than 1 file at once
+Create daily_country_attacks by Processing Files in Batches
+Each read_parquet() covers up to scan_batch_files files ([summary] in config.ini),
+kept under the open-file limit while DuckDB parallelizes across them
 """
 
 import duckdb
+import sys
 import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+
 DB_PATH = './attack_data.db'
 PARQUET_DIR = Path('./parquet_output')
 
-def process_single_file(conn, parquet_file):
-    """Process a single Parquet file and insert into table"""
+def process_single_file(conn, files, layout):
+    """Process one batch of Parquet files and insert into table"""
     
     try:
         # Read this one file and aggregate
@@ -22,7 +28,7 @@ def process_single_file(conn, parquet_file):
                 DATE_TRUNC('day', datetime)::DATE as date,
                 country,
                 COUNT(*) as attacks
-            FROM read_parquet('{parquet_file}')
+            FROM {standard_source_sql(files, PARQUET_DIR, layout)}
             WHERE country IS NOT NULL
             GROUP BY date, country
         """)
@@ -32,41 +38,34 @@ def process_single_file(conn, parquet_file):
         return False
 
 
-def process_partition(conn, partition_path, partition_name):
-    """Process all files in a partition one-by-one"""
+def process_partition(conn, scans, partition_name, layout):
+    """Process all files in a partition, one batch of files at a time"""
     
     print(f"\n{'='*70}")
     print(f"Processing: {partition_name}")
     print(f"{'='*70}")
     
-    # Get all Parquet files in this partition
-    parquet_files = list(partition_path.glob("*.parquet"))
-    
-    print(f"📁 Found {len(parquet_files)} files")
-    
-    if len(parquet_files) == 0:
-        print("⚠️  No files found, skipping")
-        return
+    print(f"📁 Found {sum(len(files) for files in scans)} files")
     
     # Process each file individually
-    print(f"\n🔄 Processing files one-by-one...")
+    print(f"\n🔄 Processing {len(scans)} batches...")
     
     success_count = 0
     start_time = time.time()
     
-    for i, parquet_file in enumerate(parquet_files, 1):
+    for i, files in enumerate(scans, 1):
         # Show progress
-        if i == 1 or i % 50 == 0 or i == len(parquet_files):
+        if i == 1 or i % 50 == 0 or i == len(scans):
             elapsed = time.time() - start_time
             rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(parquet_files) - i) / rate if rate > 0 else 0
-            print(f"   [{i}/{len(parquet_files)}] Processing... ({rate:.1f} files/sec, ~{remaining/60:.1f}min left)")
+            remaining = (len(scans) - i) / rate if rate > 0 else 0
+            print(f"   [{i}/{len(scans)}] Processing... ({rate:.1f} scans/sec, ~{remaining/60:.1f}min left)")
         
-        if process_single_file(conn, str(parquet_file)):
+        if process_single_file(conn, files, layout):
             success_count += 1
     
     elapsed = time.time() - start_time
-    print(f"\n✅ Partition complete: {success_count}/{len(parquet_files)} files ({elapsed/60:.1f} minutes)")
+    print(f"\n✅ Partition complete: {success_count}/{len(scans)} scans ({elapsed/60:.1f} minutes)")
 
 
 def main():
@@ -74,21 +73,33 @@ def main():
     
     print("="*70)
     print("Create daily_country_attacks - File-by-File Processing")
-    print("Never opens more than 1 file at once - Avoids all limits!")
+    print("Opens at most scan_batch_files files at once - stays under the open-file limit")
     print("="*70)
     
-    # Find partitions
-    partitions = []
-    for year_dir in sorted(PARQUET_DIR.glob("year=*")):
-        for month_dir in sorted(year_dir.glob("month=*")):
-            file_count = len(list(month_dir.glob("*.parquet")))
-            partitions.append((month_dir, month_dir.relative_to(PARQUET_DIR), file_count))
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
+    # Find partitions (year=/month= or date=) and the scans inside each
+    partitions = {}
+    for name, files in partition_file_groups(PARQUET_DIR):
+        partition = files[0].parent.relative_to(PARQUET_DIR).as_posix()
+        partitions.setdefault(partition, []).append((name, files))
+    
+    # Files of a partition are read in batches, one read_parquet() per batch
+    partitions = {
+        partition: [files for _, files in batch_file_groups(groups, settings.batch_files)]
+        for partition, groups in partitions.items()
+    }
     
-    total_files = sum(fc for _, _, fc in partitions)
+    total_files = sum(len(files) for scans in partitions.values() for files in scans)
     
     print(f"\nFound {len(partitions)} partitions, {total_files} total files:")
-    for _, name, file_count in partitions:
-        print(f"  - {name}: {file_count} files")
+    for name, scans in partitions.items():
+        print(f"  - {name}: {sum(len(files) for files in scans)} files")
+    print(f"⚙️  {settings.describe()}")
     
     # Estimate time (roughly 0.1-0.2 seconds per file)
     estimated_mins = (total_files * 0.15) / 60
@@ -101,6 +112,7 @@ def main():
     
     # Connect to database
     conn = duckdb.connect(DB_PATH)
+    configure_connection(conn, settings)
     
     # Drop and recreate table
     print(f"\n📋 Creating table structure...")
@@ -115,9 +127,10 @@ def main():
     
     # Process each partition
     overall_start = time.time()
+    layout = output_layout(PARQUET_DIR)
     
-    for partition_path, partition_name, _ in partitions:
-        process_partition(conn, partition_path, str(partition_name))
+    for partition_name, scans in partitions.items():
+        process_partition(conn, scans, partition_name, layout)
     
     overall_elapsed = time.time() - overall_start
     
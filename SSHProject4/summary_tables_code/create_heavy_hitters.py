@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Create Heavy Hitters Table
+Keeps each day's busiest IPs / usernames / ASNs so the chart endpoints can answer
+wide-range top 10 queries without grouping the whole daily_* tables
+(create_all_daily_tables.py refreshes it itself - run this after the separate builders)
+"""
+import duckdb
+import configparser
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.heavy_hitters import HEAVY_HITTERS, HEAVY_HITTERS_PER_DAY, HEAVY_HITTERS_TABLE, refresh_heavy_hitters
+
+# Load configuration
+config = configparser.ConfigParser()
+config.read('config.ini')
+DB_PATH = config['paths']['duckdb_path']
+
+def main():
+    print("="*70)
+    print("Creating Heavy Hitters Table")
+    print("="*70)
+    
+    conn = duckdb.connect(DB_PATH)
+    
+    print(f"\n1. Creating {HEAVY_HITTERS_TABLE} table...")
+    print(f"   (Top {HEAVY_HITTERS_PER_DAY:,} entities per day for: {', '.join(HEAVY_HITTERS)})")
+    
+    start = time.time()
+    refresh_heavy_hitters(conn)
+    
+    # Per dimension: rows kept and how many days list every entity (day_floor = 0)
+    print(f"2. Created table in {time.time() - start:.1f}s")
+    print(f"\n{'Dimension':<12} {'Rows':>10} {'Days':>6} {'Complete days':>14}")
+    print("="*45)
+    
+    stats = conn.execute(f"""
+        SELECT dimension, COUNT(*), COUNT(DISTINCT date), COUNT(DISTINCT date) FILTER (WHERE day_floor = 0)
+        FROM {HEAVY_HITTERS_TABLE}
+        GROUP BY dimension
+        ORDER BY dimension
+    """).fetchall()
+    
+    for dimension, rows, days, complete in stats:
+        print(f"{dimension:<12} {rows:>10,} {days:>6} {complete:>14}")
+    
+    conn.close()
+    
+    print("\n" + "="*70)
+    print("✅ Heavy hitters table created successfully!")
+    print("="*70)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,35 @@
 #!/usr/bin/env python3
 """
-Finalize daily_ip_username_attacks Table - CHUNK-BY-CHUNK AGGREGATION
-Processes ALL records but in small chunks to avoid memory issues
-This is slow but thorough and safe
+Finalize daily_ip_username_attacks Table - SET-BASED AGGREGATION
+Collapses the per-scan rows of daily_ip_username_attacks_temp in one GROUP BY over all dates
+DuckDB spreads it over every thread and spills to disk above memory_limit, so no per-date loop
+Each output row also counts the rows it merged - the duplicate statistics come from the same pass
+Rows are keyed by dimension ids (dim_ip, dim_username, dim_country, dim_asn), so the GROUP BY is on integers
 """
 
 import duckdb
+import sys
 import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.scan_settings import configure_connection, load_scan_settings
 
 DB_PATH = './attack_data.db'
 
 def main():
     print("="*70)
-    print("Finalizing daily_ip_username_attacks - CHUNK AGGREGATION")
+    print("Finalizing daily_ip_username_attacks - SET-BASED AGGREGATION")
     print("="*70)
     
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
     conn = duckdb.connect(DB_PATH)
+    configure_connection(conn, settings)
     
     # Check if temp table exists
     tables = conn.execute("SHOW TABLES").fetchall()
@@ -26,37 +40,19 @@ def main():
         conn.close()
         return
     
-    # Get date range
-    date_range = conn.execute("""
-        SELECT MIN(date) as min_date, MAX(date) as max_date
+    # Source stats in one scan
+    total_rows, min_date, max_date, date_count = conn.execute("""
+        SELECT COUNT(*), MIN(date), MAX(date), COUNT(DISTINCT date)
         FROM daily_ip_username_attacks_temp
     """).fetchone()
     
-    min_date = date_range[0]
-    max_date = date_range[1]
-    
-    # Get total row count
-    total_rows = conn.execute("SELECT COUNT(*) FROM daily_ip_username_attacks_temp").fetchone()[0]
-    
     print(f"\n📊 Source table stats:")
     print(f"   Total rows: {total_rows:,}")
     print(f"   Date range: {min_date} to {max_date}")
+    print(f"   Unique dates: {date_count}")
     
-    # Get all unique dates
-    dates = conn.execute("""
-        SELECT DISTINCT date 
-        FROM daily_ip_username_attacks_temp 
-        ORDER BY date
-    """).fetchall()
-    
-    dates = [d[0] for d in dates]
-    print(f"   Unique dates: {len(dates)}")
-    
-    print(f"\n💡 Strategy: Process one date at a time, aggregate duplicates")
-    print(f"   This processes ALL records but uses minimal memory")
-    
-    estimated_time = len(dates) * 1.5  # ~1.5 seconds per date
-    print(f"   Estimated time: ~{estimated_time/60:.1f} minutes")
+    print(f"\n💡 Strategy: Aggregate all dates in one statement, counting merged duplicates")
+    print(f"⚙️  {settings.threads} threads, memory limit {settings.memory_limit}")
     
     response = input("\nProceed? (y/n): ").strip().lower()
     if response != 'y':
@@ -67,73 +63,43 @@ def main():
     # Drop final table if exists
     conn.execute("DROP TABLE IF EXISTS daily_ip_username_attacks")
     
-    # Create final table
-    print(f"\n🔨 Creating final table...")
+    # One aggregation; merged_rows = source rows behind each output row
+    # Ordered by date like the per-date inserts were, so date filters still skip row groups
+    print(f"\n🔄 Aggregating {total_rows:,} rows over {date_count} dates...")
+    start_time = time.time()
     conn.execute("""
-        CREATE TABLE daily_ip_username_attacks (
-            date DATE,
-            IP VARCHAR,
-            username VARCHAR,
-            country VARCHAR,
-            asn_name VARCHAR,
-            attacks BIGINT
-        )
+        CREATE TABLE daily_ip_username_attacks AS
+        SELECT 
+            date,
+            ip_id,
+            username_id,
+            country_id,
+            asn_id,
+            SUM(attacks)::BIGINT as attacks,
+            COUNT(*) as merged_rows
+        FROM daily_ip_username_attacks_temp
+        GROUP BY date, ip_id, username_id, country_id, asn_id
+        ORDER BY date
     """)
     
-    # Process each date
-    print(f"\n🔄 Processing {len(dates)} dates...")
-    start_time = time.time()
-    processed_rows = 0
-    total_duplicates_found = 0
-    
-    for i, date in enumerate(dates, 1):
-        date_start = time.time()
-        
-        # Get row count for this date BEFORE aggregation
-        before_count = conn.execute(f"""
-            SELECT COUNT(*) 
-            FROM daily_ip_username_attacks_temp 
-            WHERE date = '{date}'
-        """).fetchone()[0]
-        
-        # Aggregate this date and insert into final table
-        conn.execute(f"""
-            INSERT INTO daily_ip_username_attacks
-            SELECT 
-                date,
-                IP,
-                username,
-                country,
-                asn_name,
-                SUM(attacks) as attacks
-            FROM daily_ip_username_attacks_temp
-            WHERE date = '{date}'
-            GROUP BY date, IP, username, country, asn_name
-        """)
-        
-        # Get row count AFTER aggregation
-        after_count = conn.execute(f"""
-            SELECT COUNT(*) 
-            FROM daily_ip_username_attacks 
-            WHERE date = '{date}'
-        """).fetchone()[0]
-        
-        duplicates_removed = before_count - after_count
-        total_duplicates_found += duplicates_removed
-        processed_rows += after_count
-        
-        date_elapsed = time.time() - date_start
-        
-        # Show progress every 5 dates or on first/last
-        if i == 1 or i % 5 == 0 or i == len(dates):
-            elapsed = time.time() - start_time
-            rate = i / elapsed
-            remaining = (len(dates) - i) / rate if rate > 0 else 0
-            
-            dup_str = f" ({duplicates_removed:,} dups removed)" if duplicates_removed > 0 else ""
-            print(f"   [{i}/{len(dates)}] {date}: {after_count:,} rows{dup_str} (~{remaining/60:.1f}min left)")
+    # Duplicates removed per date, from the aggregated rows
+    per_date = conn.execute("""
+        SELECT date, COUNT(*) as rows, SUM(merged_rows) - COUNT(*) as duplicates_removed
+        FROM daily_ip_username_attacks
+        GROUP BY date
+        ORDER BY date
+    """).fetchall()
+    conn.execute("ALTER TABLE daily_ip_username_attacks DROP COLUMN merged_rows")
     
     total_elapsed = time.time() - start_time
+    processed_rows = sum(rows for _, rows, _ in per_date)
+    total_duplicates_found = sum(duplicates for _, _, duplicates in per_date)
+    
+    # Show every 5th date plus first/last
+    for i, (date, rows, duplicates_removed) in enumerate(per_date, 1):
+        if i == 1 or i % 5 == 0 or i == len(per_date):
+            dup_str = f" ({duplicates_removed:,} dups removed)" if duplicates_removed > 0 else ""
+            print(f"   [{i}/{len(per_date)}] {date}: {rows:,} rows{dup_str}")
     
     print(f"\n✅ Processing complete in {total_elapsed/60:.1f} minutes")
     print(f"   Total duplicates removed: {total_duplicates_found:,}")
@@ -148,8 +114,8 @@ def main():
     
     final_count = conn.execute("SELECT COUNT(*) FROM daily_ip_username_attacks").fetchone()[0]
     total_attacks = conn.execute("SELECT SUM(attacks) FROM daily_ip_username_attacks").fetchone()[0]
-    total_ips = conn.execute("SELECT COUNT(DISTINCT IP) FROM daily_ip_username_attacks").fetchone()[0]
-    total_usernames = conn.execute("SELECT COUNT(DISTINCT username) FROM daily_ip_username_attacks").fetchone()[0]
+    total_ips = conn.execute("SELECT COUNT(DISTINCT ip_id) FROM daily_ip_username_attacks").fetchone()[0]
+    total_usernames = conn.execute("SELECT COUNT(DISTINCT username_id) FROM daily_ip_username_attacks").fetchone()[0]
     
     print(f"\n{'='*70}")
     print("FINAL SUMMARY")
@@ -165,8 +131,12 @@ def main():
     # Show sample
     print(f"\n📊 Sample data from Nov 1:")
     sample = conn.execute("""
-        SELECT IP, username, country, asn_name, attacks
+        SELECT i.IP, u.username, c.country, a.asn_name, attacks
         FROM daily_ip_username_attacks
+        JOIN dim_ip i USING (ip_id)
+        JOIN dim_username u USING (username_id)
+        JOIN dim_country c USING (country_id)
+        JOIN dim_asn a USING (asn_id)
         WHERE date = '2022-11-01'
         ORDER BY attacks DESC
         LIMIT 5
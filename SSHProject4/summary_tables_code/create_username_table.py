@@ -5,9 +5,16 @@ Updated version of your working script with country column added
 """
 
 import duckdb
+import sys
 import time
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.daily_tables import create_daily_tables, insert_rows
+from utils.heavy_hitters import refresh_heavy_hitters
+from utils.parquet_layout import batch_file_groups, output_layout, partition_file_groups, standard_source_sql
+from utils.scan_settings import configure_connection, load_scan_settings
+
 DB_PATH = './attack_data.db'
 PARQUET_DIR = Path('./parquet_output')
 
@@ -16,11 +23,20 @@ def main():
     print("Creating daily_username_attacks Table WITH COUNTRY")
     print("="*70)
     
-    # Find all Parquet files
-    all_files = sorted(PARQUET_DIR.glob("year=*/month=*/*.parquet"))
-    print(f"\n📂 Found {len(all_files)} Parquet files")
+    try:
+        settings = load_scan_settings()
+    except ValueError as e:
+        print(f"❌ Invalid [summary] setting: {e}")
+        return
+    
+    # Find all Parquet files - day partitions (date=) or files (year=/month=), batched per read_parquet()
+    file_groups = batch_file_groups(partition_file_groups(PARQUET_DIR), settings.batch_files)
+    layout = output_layout(PARQUET_DIR)
+    file_count = sum(len(files) for _, files in file_groups)
+    print(f"\n📂 Found {file_count} Parquet files ({len(file_groups)} scans)")
+    print(f"⚙️  {settings.describe()}")
     
-    estimated_mins = (len(all_files) * 0.5) / 60
+    estimated_mins = (len(file_groups) * 0.5) / 60
     print(f"⏱️  Estimated time: ~{estimated_mins:.0f} minutes")
     
     response = input("\nProceed? (y/n): ").strip().lower()
@@ -30,15 +46,16 @@ def main():
     
     # Connect to database
     conn = duckdb.connect(DB_PATH)
+    configure_connection(conn, settings)
     
-    # Drop existing table if it exists
-    print(f"\n🗑️  Dropping old table (if exists)...")
-    conn.execute("DROP TABLE IF EXISTS daily_username_attacks")
+    # Drop existing staging table if it exists
+    print(f"\n🗑️  Dropping old staging table (if exists)...")
+    conn.execute("DROP TABLE IF EXISTS daily_username_attacks_temp")
     
-    # Create empty table WITH COUNTRY COLUMN
-    print(f"🔨 Creating empty table...")
+    # Create empty staging table WITH COUNTRY COLUMN (names - ids are assigned once at the end)
+    print(f"🔨 Creating empty staging table...")
     conn.execute("""
-        CREATE TABLE daily_username_attacks (
+        CREATE TABLE daily_username_attacks_temp (
             date DATE,
             username VARCHAR,
             country VARCHAR,
@@ -48,33 +65,33 @@ def main():
     """)
     print("✅ Table created")
     
-    # Process files one by one
-    print(f"\n🔄 Processing {len(all_files)} files...")
+    # Process scans one by one
+    print(f"\n🔄 Processing {len(file_groups)} scans...")
     
     overall_start = time.time()
     success_count = 0
     
-    for i, parquet_file in enumerate(all_files, 1):
+    for i, (partition, files) in enumerate(file_groups, 1):
         
-        if i == 1 or i % 100 == 0 or i == len(all_files):
+        if i == 1 or i % 100 == 0 or i == len(file_groups):
             elapsed = time.time() - overall_start
             rate = i / elapsed if elapsed > 0 else 0
-            remaining = (len(all_files) - i) / rate if rate > 0 else 0
-            print(f"   [{i}/{len(all_files)}] Processing... ({rate:.1f} files/sec, ~{remaining/60:.1f}min left)")
+            remaining = (len(file_groups) - i) / rate if rate > 0 else 0
+            print(f"   [{i}/{len(file_groups)}] Processing... ({rate:.1f} scans/sec, ~{remaining/60:.1f}min left)")
         
         try:
-            file_str = str(parquet_file)
+            source = standard_source_sql(files, PARQUET_DIR, layout)
             
             # ADD COUNTRY TO THE SELECT
             conn.execute(f"""
-                INSERT INTO daily_username_attacks
+                INSERT INTO daily_username_attacks_temp
                 SELECT 
                     DATE_TRUNC('day', datetime)::DATE as date,
                     Username as username,
                     country,
                     asn_name,
                     COUNT(*) as attacks
-                FROM read_parquet('{file_str}')
+                FROM {source}
                 WHERE country IS NOT NULL AND country != ''
                 AND asn_name IS NOT NULL AND asn_name != ''
                 GROUP BY date, username, country, asn_name
@@ -83,35 +100,36 @@ def main():
             success_count += 1
             
         except Exception as e:
-            print(f"   ❌ Error on {parquet_file.name}: {e}")
+            print(f"   ❌ Error on {partition}: {e}")
             continue
     
     overall_elapsed = time.time() - overall_start
-    print(f"\n✅ Processed {success_count}/{len(all_files)} files ({overall_elapsed/60:.1f} minutes)")
+    print(f"\n✅ Processed {success_count}/{len(file_groups)} scans ({overall_elapsed/60:.1f} minutes)")
     
-    # Aggregate duplicates - NOW INCLUDES COUNTRY
+    # Aggregate duplicates - NOW INCLUDES COUNTRY - into the final table, which stores dimension ids
     print(f"\n🔄 Aggregating duplicate entries...")
-    conn.execute("""
-        CREATE TABLE daily_username_attacks_final AS
+    create_daily_tables(conn, ['daily_username_attacks'])
+    insert_rows(conn, 'daily_username_attacks', """
         SELECT 
             date,
             username,
             country,
             asn_name,
             SUM(attacks) as attacks
-        FROM daily_username_attacks
+        FROM daily_username_attacks_temp
         GROUP BY date, username, country, asn_name
-        ORDER BY date, username, country, asn_name
     """)
-    conn.execute("DROP TABLE daily_username_attacks")
-    conn.execute("ALTER TABLE daily_username_attacks_final RENAME TO daily_username_attacks")
+    conn.execute("DROP TABLE daily_username_attacks_temp")
     print(f"   ✅ Aggregation complete")
     
+    # Keep the chart endpoints' per-day top entities in step with the rebuilt table
+    refresh_heavy_hitters(conn, dimensions=['username'])
+    
     # Get final stats
     total_rows = conn.execute("SELECT COUNT(*) FROM daily_username_attacks").fetchone()[0]
     total_attacks = conn.execute("SELECT SUM(attacks) FROM daily_username_attacks").fetchone()[0]
-    total_usernames = conn.execute("SELECT COUNT(DISTINCT username) FROM daily_username_attacks").fetchone()[0]
-    total_countries = conn.execute("SELECT COUNT(DISTINCT country) FROM daily_username_attacks").fetchone()[0]
+    total_usernames = conn.execute("SELECT COUNT(DISTINCT username_id) FROM daily_username_attacks").fetchone()[0]
+    total_countries = conn.execute("SELECT COUNT(DISTINCT country_id) FROM daily_username_attacks").fetchone()[0]
     
     print(f"\n{'='*70}")
     print("FINAL SUMMARY")
@@ -126,9 +144,11 @@ def main():
     # Show sample - 'root' on Nov 1 BY COUNTRY
     print(f"\n📊 Sample (root on Nov 1, 2022 by country):")
     sample = conn.execute("""
-        SELECT date, username, country, attacks
+        SELECT date, u.username, c.country, attacks
         FROM daily_username_attacks
-        WHERE username = 'root' AND date = '2022-11-01'
+        JOIN dim_username u USING (username_id)
+        JOIN dim_country c USING (country_id)
+        WHERE u.username = 'root' AND date = '2022-11-01'
         ORDER BY attacks DESC
         LIMIT 5
     """).fetchall()
@@ -0,0 +1,45 @@
+"""
+classify_messages (converter) and event_columns_sql (--direct) must write the same event columns
+Run from SSHProject4: python -m pytest tests
+"""
+
+import duckdb
+import pyarrow as pa
+
+from utils.events import classify_messages, event_columns_sql
+
+MESSAGES = [
+    'Failed password for root from 1.2.3.4 port 22 ssh2',
+    'Failed password for invalid user admin from 1.2.3.4 port 22 ssh2',
+    'Failed none for invalid user guest from 1.2.3.4 port 22 ssh2',
+    'Accepted publickey for ubuntu from 1.2.3.4 port 22 ssh2',
+    'Accepted keyboard-interactive/pam for invalid user test from 1.2.3.4 port 22 ssh2',
+    'Invalid user admin from 1.2.3.4 port 22',
+    'input_userauth_request: invalid user admin [preauth]',
+    'error: maximum authentication attempts exceeded for invalid user admin from 1.2.3.4 port 22 ssh2 [preauth]',
+    'error: maximum authentication attempts exceeded for root from 1.2.3.4 port 22 ssh2 [preauth]',
+    'Postponed keyboard-interactive for invalid user admin from 1.2.3.4 port 22 ssh2 [preauth]',
+    'Disconnecting invalid user admin 1.2.3.4 port 22: Too many authentication failures [preauth]',
+    'Disconnected from invalid user admin 1.2.3.4 port 22 [preauth]',
+    'Connection closed by invalid user admin 1.2.3.4 port 22 [preauth]',
+    'pam_unix(sshd:auth): authentication failure; logname= uid=0 euid=0 tty=ssh ruser= rhost=1.2.3.4',
+    'Did not receive identification string from 1.2.3.4 port 22',
+    'Server listening on 0.0.0.0 port 22.',
+    "Failed password for it's from 1.2.3.4 port 22 ssh2",
+    '',
+    None,
+]
+
+
+def test_sql_matches_python():
+    messages = pa.array(MESSAGES, pa.string())
+    event_type, auth_method, invalid_user = classify_messages(messages)
+    expected = list(zip(event_type.cast(pa.string()).to_pylist(), auth_method.to_pylist(), invalid_user.to_pylist()))
+
+    conn = duckdb.connect()
+    conn.register('messages', pa.table({'row': list(range(len(MESSAGES))), 'Message': messages}))
+    actual = conn.execute(f"SELECT {event_columns_sql('Message')} FROM messages ORDER BY row").fetchall()
+
+    for message, python_row, sql_row in zip(MESSAGES, expected, actual):
+        assert sql_row == python_row, message
+
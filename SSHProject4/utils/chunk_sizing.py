@@ -0,0 +1,57 @@
+"""
+Rows per conversion chunk: a fixed count, or adaptive from a memory budget
+The adaptive sizer measures what each chunk actually occupied (parsed CSV plus enriched output)
+and aims the next one at the budget - shrinking at once, growing at most 2x per chunk
+"""
+
+# Adaptive mode starts here until the first chunk has been measured
+INITIAL_ADAPTIVE_ROWS = 50_000
+
+# Hard limits for adaptive chunks
+MIN_CHUNK_ROWS = 10_000
+MAX_CHUNK_ROWS = 5_000_000
+
+# Peak RSS grows ~2x a chunk's parsed + output nbytes (intermediate copies from filtering and
+# appending columns, Parquet encode buffers) - measured on synthetic honeypot CSVs
+WORKING_SET_FACTOR = 2
+
+# Weight of the newest measurement in the bytes-per-row moving average
+SMOOTHING = 0.3
+
+
+def parse_chunk_size(value):
+    """config/CLI value -> 'auto' or a positive row count"""
+    value = str(value).strip().lower()
+    if value == 'auto':
+        return 'auto'
+    rows = int(value.replace('_', '').replace(',', ''))
+    if rows <= 0:
+        raise ValueError(f"chunk_size must be positive or 'auto', got {value}")
+    return rows
+
+
+class ChunkSizer:
+    """Current target rows per chunk; observe() feeds back the memory each finished chunk used"""
+
+    def __init__(self, chunk_size=100000, memory_mb=256):
+        self.adaptive = chunk_size == 'auto'
+        self.rows = INITIAL_ADAPTIVE_ROWS if self.adaptive else chunk_size
+        self.budget = memory_mb * 1024 * 1024
+        self.bytes_per_row = None
+
+    def observe(self, rows, nbytes):
+        """Record that a chunk of rows measured nbytes (parsed + output tables) and retarget"""
+        if not self.adaptive or rows == 0:
+            return
+
+        sample = nbytes * WORKING_SET_FACTOR / rows
+        if self.bytes_per_row is None:
+            self.bytes_per_row = sample
+        else:
+            self.bytes_per_row = (1 - SMOOTHING) * self.bytes_per_row + SMOOTHING * sample
+
+        # Wider rows than expected shrink the next chunk immediately; narrower ones grow it gradually
+        target = self.budget / max(self.bytes_per_row, sample)
+        if target > self.rows:
+            target = min(target, self.rows * 2)
+        self.rows = int(min(max(target, MIN_CHUNK_ROWS), MAX_CHUNK_ROWS))
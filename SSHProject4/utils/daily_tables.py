@@ -0,0 +1,411 @@
+"""
+Definitions of the daily_* fact tables the API reads
+Every SELECT aggregates {source} - any FROM-able relation with the standard Parquet columns -
+so the per-file builders and the direct CSV ingest produce the same rows
+Each table also has a rollup of EVENT_COUNTS - attacks per (date, IP, Username, country, asn) -
+so one scan of the Parquet files can feed every table (see create_all_daily_tables.py)
+daily_sketches holds HyperLogLog registers of each day's IPs, usernames and countries,
+so distinct counts over any date range merge without re-reading the daily tables
+The ENCODED_TABLES store dimension ids: their select and rollup produce names, which
+insert_named_rows() translates; their columns are ids, and their merge groups by id but keeps
+the rows in name order like the other inserts
+"""
+
+from .dimensions import ENCODED_TABLES, create_dimension_tables, insert_named_rows
+from .hll import hll_estimate_sql, hll_registers_sql
+
+# dimension -> column whose distinct values daily_sketches counts
+SKETCH_DIMENSIONS = {'ip': 'IP', 'username': 'Username', 'country': 'country'}
+
+# Finest grain every daily_* table can be rolled up from
+EVENT_COUNTS_COLUMNS = """
+    date DATE,
+    IP VARCHAR,
+    Username VARCHAR,
+    country VARCHAR,
+    asn VARCHAR,
+    asn_name VARCHAR,
+    attacks BIGINT
+"""
+
+EVENT_COUNTS_SELECT = """
+    SELECT
+        datetime::DATE as date,
+        IP,
+        Username,
+        country,
+        asn,
+        asn_name,
+        COUNT(*) as attacks
+    FROM {source}
+    GROUP BY date, IP, Username, country, asn, asn_name
+"""
+
+
+def sketch_select(source):
+    """daily_sketches rows of source (which has a date column)"""
+    return '\n        UNION ALL\n'.join(
+        f"SELECT date, '{dimension}' as dimension, bucket, rho "
+        f"FROM ({hll_registers_sql(source, column, keys=['date'])}) {dimension}_registers"
+        for dimension, column in SKETCH_DIMENSIONS.items()
+    )
+
+
+def sketch_estimates_sql(where):
+    """SELECT date, unique_ips, unique_countries, unique_usernames estimated from daily_sketches rows"""
+    estimates = hll_estimate_sql(f"(SELECT * FROM daily_sketches WHERE {where}) s", keys=['date', 'dimension'])
+    return f"""
+        SELECT
+            date,
+            MAX(estimate) FILTER (WHERE dimension = 'ip') as unique_ips,
+            MAX(estimate) FILTER (WHERE dimension = 'country') as unique_countries,
+            MAX(estimate) FILTER (WHERE dimension = 'username') as unique_usernames
+        FROM ({estimates}) estimates
+        GROUP BY date
+    """
+
+
+def sketch_count_sql(dimension, start, end):
+    """SELECT estimate: distinct values of one dimension between two dates, from daily_sketches"""
+    return hll_estimate_sql(f"""(
+        SELECT bucket, rho FROM daily_sketches
+        WHERE dimension = '{dimension}' AND date BETWEEN '{start}' AND '{end}'
+    ) s""")
+
+
+# name -> columns, per-batch aggregation, the merge that collapses rows from several batches,
+# and the rollup of event counts (see ENCODED_TABLES for the tables whose columns are ids)
+# daily_sketches comes first: daily_stats distinct counts of a date aggregated in several batches
+# merge from its sketches (the rollup sees every batch's counts at once, so its counts are exact)
+DAILY_TABLES = {
+    'daily_sketches': {
+        'columns': """
+            date DATE,
+            dimension VARCHAR,
+            bucket SMALLINT,
+            rho TINYINT
+        """,
+        'select': sketch_select(
+            f"(SELECT datetime::DATE as date, {', '.join(SKETCH_DIMENSIONS.values())} FROM {{source}}) day_rows"),
+        'merge': """
+            SELECT date, dimension, bucket, MAX(rho) as rho
+            FROM {table}
+            GROUP BY date, dimension, bucket
+            ORDER BY date, dimension, bucket
+        """,
+        'rollup': sketch_select('{counts}'),
+    },
+    'daily_stats': {
+        'columns': """
+            date DATE,
+            total_attacks BIGINT,
+            unique_ips BIGINT,
+            unique_countries BIGINT,
+            unique_usernames BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                COUNT(*) as total_attacks,
+                COUNT(DISTINCT IP) as unique_ips,
+                COUNT(DISTINCT country) as unique_countries,
+                COUNT(DISTINCT Username) as unique_usernames
+            FROM {source}
+            GROUP BY date
+        """,
+        'merge': f"""
+            WITH batches AS (
+                SELECT
+                    date,
+                    COUNT(*) as batch_count,
+                    SUM(total_attacks) as total_attacks,
+                    MAX(unique_ips) as unique_ips,
+                    MAX(unique_countries) as unique_countries,
+                    MAX(unique_usernames) as unique_usernames
+                FROM {{table}}
+                GROUP BY date
+            ),
+            estimates AS ({sketch_estimates_sql("date IN (SELECT date FROM batches WHERE batch_count > 1)")})
+            SELECT
+                b.date,
+                b.total_attacks,
+                COALESCE(e.unique_ips, b.unique_ips) as unique_ips,
+                COALESCE(e.unique_countries, b.unique_countries) as unique_countries,
+                COALESCE(e.unique_usernames, b.unique_usernames) as unique_usernames
+            FROM batches b
+            LEFT JOIN estimates e ON e.date = b.date AND b.batch_count > 1
+            ORDER BY b.date
+        """,
+        'rollup': """
+            SELECT
+                date,
+                SUM(attacks) as total_attacks,
+                COUNT(DISTINCT IP) as unique_ips,
+                COUNT(DISTINCT country) as unique_countries,
+                COUNT(DISTINCT Username) as unique_usernames
+            FROM {counts}
+            GROUP BY date
+            ORDER BY date
+        """,
+    },
+    'daily_country_attacks': {
+        'columns': """
+            date DATE,
+            country VARCHAR,
+            attacks BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                country,
+                COUNT(*) as attacks
+            FROM {source}
+            WHERE country IS NOT NULL
+            GROUP BY date, country
+        """,
+        'merge': """
+            SELECT date, country, SUM(attacks) as attacks
+            FROM {table}
+            GROUP BY date, country
+            ORDER BY date, country
+        """,
+        'rollup': """
+            SELECT date, country, SUM(attacks) as attacks
+            FROM {counts}
+            WHERE country IS NOT NULL
+            GROUP BY date, country
+            ORDER BY date, country
+        """,
+    },
+    'daily_asn_attacks': {
+        'columns': """
+            date DATE,
+            asn VARCHAR,
+            asn_id INTEGER,
+            country_id INTEGER,
+            attacks BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                asn,
+                asn_name,
+                country,
+                COUNT(*) as attacks
+            FROM {source}
+            WHERE asn_name IS NOT NULL AND asn_name != 'Unknown'
+              AND country IS NOT NULL AND country != ''
+            GROUP BY date, asn, asn_name, country
+        """,
+        'merge': """
+            SELECT m.*
+            FROM (
+                SELECT date, asn, asn_id, country_id, SUM(attacks) as attacks
+                FROM {table}
+                GROUP BY date, asn, asn_id, country_id
+            ) m
+            LEFT JOIN dim_asn a ON a.asn_id = m.asn_id
+            LEFT JOIN dim_country c ON c.country_id = m.country_id
+            ORDER BY m.date, a.asn_name, c.country
+        """,
+        'rollup': """
+            SELECT date, asn, asn_name, country, SUM(attacks) as attacks
+            FROM {counts}
+            WHERE asn_name IS NOT NULL AND asn_name != 'Unknown'
+              AND country IS NOT NULL AND country != ''
+            GROUP BY date, asn, asn_name, country
+        """,
+    },
+    'daily_username_attacks': {
+        'columns': """
+            date DATE,
+            username_id INTEGER,
+            country_id INTEGER,
+            asn_id INTEGER,
+            attacks BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                Username as username,
+                country,
+                asn_name,
+                COUNT(*) as attacks
+            FROM {source}
+            WHERE country IS NOT NULL AND country != ''
+              AND asn_name IS NOT NULL AND asn_name != ''
+            GROUP BY date, username, country, asn_name
+        """,
+        'merge': """
+            SELECT m.*
+            FROM (
+                SELECT date, username_id, country_id, asn_id, SUM(attacks) as attacks
+                FROM {table}
+                GROUP BY date, username_id, country_id, asn_id
+            ) m
+            LEFT JOIN dim_username u ON u.username_id = m.username_id
+            LEFT JOIN dim_country c ON c.country_id = m.country_id
+            ORDER BY m.date, u.username, c.country
+        """,
+        'rollup': """
+            SELECT date, Username as username, country, asn_name, SUM(attacks) as attacks
+            FROM {counts}
+            WHERE country IS NOT NULL AND country != ''
+              AND asn_name IS NOT NULL AND asn_name != ''
+            GROUP BY date, username, country, asn_name
+        """,
+    },
+    'daily_ip_attacks': {
+        'columns': """
+            date DATE,
+            ip_id INTEGER,
+            country_id INTEGER,
+            asn_id INTEGER,
+            attacks BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                IP,
+                country,
+                asn_name,
+                COUNT(*) as attacks
+            FROM {source}
+            GROUP BY date, IP, country, asn_name
+        """,
+        'merge': """
+            SELECT m.*
+            FROM (
+                SELECT date, ip_id, country_id, asn_id, SUM(attacks) as attacks
+                FROM {table}
+                GROUP BY date, ip_id, country_id, asn_id
+            ) m
+            LEFT JOIN dim_ip i ON i.ip_id = m.ip_id
+            ORDER BY m.date, i.IP
+        """,
+        'rollup': """
+            SELECT date, IP, country, asn_name, SUM(attacks) as attacks
+            FROM {counts}
+            GROUP BY date, IP, country, asn_name
+        """,
+    },
+    'daily_ip_username_attacks': {
+        'columns': """
+            date DATE,
+            ip_id INTEGER,
+            username_id INTEGER,
+            country_id INTEGER,
+            asn_id INTEGER,
+            attacks BIGINT
+        """,
+        'select': """
+            SELECT
+                datetime::DATE as date,
+                IP,
+                Username as username,
+                country,
+                asn_name,
+                COUNT(*) as attacks
+            FROM {source}
+            GROUP BY date, IP, username, country, asn_name
+        """,
+        'merge': """
+            SELECT m.*
+            FROM (
+                SELECT date, ip_id, username_id, country_id, asn_id, SUM(attacks) as attacks
+                FROM {table}
+                GROUP BY date, ip_id, username_id, country_id, asn_id
+            ) m
+            LEFT JOIN dim_ip i ON i.ip_id = m.ip_id
+            LEFT JOIN dim_username u ON u.username_id = m.username_id
+            ORDER BY m.date, i.IP, u.username
+        """,
+        'rollup': """
+            SELECT date, IP, Username as username, country, asn_name, SUM(attacks) as attacks
+            FROM {counts}
+            GROUP BY date, IP, username, country, asn_name
+        """,
+    },
+}
+
+
+def date_list_sql(dates):
+    """SQL list of DATE literals for an IN (...) filter"""
+    return ', '.join(f"DATE '{day.isoformat()}'" for day in sorted(dates))
+
+
+def insert_rows(conn, name, select):
+    """INSERT a select's rows into one daily_* table (names become ids for the ENCODED_TABLES)"""
+    if name in ENCODED_TABLES:
+        insert_named_rows(conn, name, select)
+    else:
+        conn.execute(f"INSERT INTO {name} {select}")
+
+
+def create_daily_tables(conn, tables=None):
+    """Drop and recreate empty daily_* tables (the dimension tables are created if missing)"""
+    create_dimension_tables(conn)
+    for name in tables or DAILY_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        conn.execute(f"CREATE TABLE {name} ({DAILY_TABLES[name]['columns']})")
+
+
+def insert_daily_rows(conn, source, tables=None):
+    """Aggregate one batch of rows from source into every daily_* table"""
+    for name in tables or DAILY_TABLES:
+        insert_rows(conn, name, DAILY_TABLES[name]['select'].format(source=source))
+
+
+def merge_daily_tables(conn, tables=None):
+    """Collapse rows that several batches wrote for the same key"""
+    for name in tables or DAILY_TABLES:
+        conn.execute(f"CREATE TABLE {name}_final AS {DAILY_TABLES[name]['merge'].format(table=name)}")
+        conn.execute(f"DROP TABLE {name}")
+        conn.execute(f"ALTER TABLE {name}_final RENAME TO {name}")
+
+
+def create_event_counts(conn, table='event_counts'):
+    """Empty temp table for insert_event_counts()"""
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE {table} ({EVENT_COUNTS_COLUMNS})")
+
+
+def insert_event_counts(conn, source, table='event_counts'):
+    """Aggregate one batch of rows from source into the event counts (a date may span batches)"""
+    conn.execute(f"INSERT INTO {table} {EVENT_COUNTS_SELECT.format(source=source)}")
+
+
+def rollup_daily_tables(conn, counts='event_counts', tables=None, dates=None):
+    """
+    Rebuild daily_* tables from accumulated event counts
+    With dates, only those dates' rows are replaced - counts must hold every row of those dates
+    (missing tables are created, empty apart from these dates)
+    """
+    if dates is None:
+        create_daily_tables(conn, tables)
+    else:
+        date_list = date_list_sql(dates)
+        existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+
+    for name in tables or DAILY_TABLES:
+        if dates is not None:
+            if name not in existing:
+                conn.execute(f"CREATE TABLE {name} ({DAILY_TABLES[name]['columns']})")
+            conn.execute(f"DELETE FROM {name} WHERE date IN ({date_list})")
+        insert_rows(conn, name, DAILY_TABLES[name]['rollup'].format(counts=counts))
+
+
+def replace_daily_dates(conn, source, dates, tables=None):
+    """
+    Re-aggregate whole days: delete the dates' rows and insert them again from source
+    source must hold every row of those dates, so distinct counts stay exact
+    Missing daily_* tables are created (empty apart from these dates)
+    """
+    date_list = date_list_sql(dates)
+    existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+
+    for name in tables or DAILY_TABLES:
+        if name not in existing:
+            conn.execute(f"CREATE TABLE {name} ({DAILY_TABLES[name]['columns']})")
+        conn.execute(f"DELETE FROM {name} WHERE date IN ({date_list})")
+        insert_rows(conn, name, DAILY_TABLES[name]['select'].format(
+            source=f"(SELECT * FROM {source} WHERE datetime::DATE IN ({date_list})) day_rows"))
@@ -0,0 +1,111 @@
+"""
+Ingest-time removal of repeated events (overlapping CSV exports)
+An event is a 64-bit hash of its key columns; hashes are kept per day as sorted numpy runs,
+and the least recently used days are dropped once the memory budget is reached
+The converter keeps one filter for the CSV being converted and one holding every event of the
+node's previous CSV, so what a file loses to dedup depends on those two files only
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+# Columns that identify one event - a row repeating all of them on the same day is a duplicate
+DEDUP_KEY_COLUMNS = ['Node', 'Date', 'Time', 'PID', 'IP', 'Username', 'Message']
+
+# Sorted hash runs a day may hold before they are merged into one (bounds the binary searches per chunk)
+MAX_RUNS_PER_DAY = 8
+
+
+class DuplicateFilter:
+    """
+    Remembers the event hashes of recent days and flags rows already seen
+    Probabilistic: only hashes are compared, never the key columns, so two different events with the
+    same 64-bit hash on the same day count as one and the later is dropped
+    For n events per day the chance of any such collision is about n^2 / 2^65: ~1 in 10^7 for 2M
+    """
+
+    def __init__(self, memory_mb=256):
+        self.max_hashes = memory_mb * 1024 * 1024 // 8
+        self.days = OrderedDict()  # Date -> sorted uint64 runs, least recently used first
+        self.held = 0
+        self.evicted_days = 0
+
+    def __len__(self):
+        return self.held
+
+    def duplicate_mask(self, days, hashes):
+        """
+        Boolean mask over rows: True where (day, hash) was seen before, in this call or an earlier one
+        The first occurrence of every new event is kept and remembered
+        """
+        duplicate = np.zeros(len(hashes), dtype=bool)
+
+        # A chunk almost always holds a single day - skip sorting the day column then
+        single_day = len(days) > 0 and days.min() == days.max()
+
+        for day in (days[:1] if single_day else np.unique(days)):
+            rows = np.arange(len(days)) if single_day else np.flatnonzero(days == day)
+
+            # Repeats inside this chunk: everything after a hash's first occurrence
+            unique_hashes, first = self._first_occurrences(hashes[rows])
+            repeated = np.ones(len(rows), dtype=bool)
+            repeated[first] = False
+
+            # Repeats of earlier chunks: every occurrence
+            runs = self.days.pop(day, [])
+            seen = np.zeros(len(unique_hashes), dtype=bool)
+            for run in runs:
+                positions = np.minimum(np.searchsorted(run, unique_hashes), len(run) - 1)
+                seen |= run[positions] == unique_hashes
+            repeated[first[seen]] = True
+            duplicate[rows] = repeated
+
+            new_hashes = unique_hashes[~seen]
+            if len(new_hashes):
+                runs.append(new_hashes)
+                self.held += len(new_hashes)
+            if len(runs) > MAX_RUNS_PER_DAY:
+                runs = [np.sort(np.concatenate(runs))]
+            self.days[day] = runs
+
+        self._evict()
+        return duplicate
+
+    def seen_mask(self, days, hashes):
+        """Boolean mask over rows: True where (day, hash) is remembered; nothing is added"""
+        seen = np.zeros(len(hashes), dtype=bool)
+
+        for day in np.unique(days):
+            runs = self.days.get(day)
+            if not runs:
+                continue
+            rows = np.flatnonzero(days == day)
+            for run in runs:
+                positions = np.minimum(np.searchsorted(run, hashes[rows]), len(run) - 1)
+                seen[rows] |= run[positions] == hashes[rows]
+
+        return seen
+
+    @staticmethod
+    def _first_occurrences(hashes):
+        """Sorted distinct hashes and the row of each one's first occurrence (np.unique, ~5x faster)"""
+        order = np.argsort(hashes)
+        sorted_hashes = hashes[order]
+        repeat = sorted_hashes[1:] == sorted_hashes[:-1]
+
+        if repeat.any():
+            # Only a stable sort guarantees the first row leads each run of equal hashes
+            order = np.argsort(hashes, kind='stable')
+            sorted_hashes = hashes[order]
+            repeat = sorted_hashes[1:] == sorted_hashes[:-1]
+
+        is_first = np.concatenate(([True], ~repeat))
+        return sorted_hashes[is_first], order[is_first]
+
+    def _evict(self):
+        """Drop least recently used days until within budget (the most recent day always stays)"""
+        while self.held > self.max_hashes and len(self.days) > 1:
+            _, runs = self.days.popitem(last=False)
+            self.held -= sum(len(run) for run in runs)
+            self.evicted_days += 1
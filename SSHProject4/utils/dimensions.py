@@ -0,0 +1,118 @@
+"""
+Dimension tables and integer surrogate keys for the entity columns of the daily_* fact tables
+dim_ip, dim_username, dim_country and dim_asn give each name a compact INTEGER id; the fact tables
+in ENCODED_TABLES store those ids instead of repeating the strings on every row, so they are
+smaller and group and join on integers
+Ids are only ever added - a name keeps its id across rebuilds and incremental updates
+A NULL name has a NULL id and no dimension row
+"""
+
+# dimension -> table, name column (as in the named rows and the API), id column
+DIMENSIONS = {
+    'ip': {'table': 'dim_ip', 'name': 'IP', 'id': 'ip_id'},
+    'username': {'table': 'dim_username', 'name': 'username', 'id': 'username_id'},
+    'country': {'table': 'dim_country', 'name': 'country', 'id': 'country_id'},
+    'asn': {'table': 'dim_asn', 'name': 'asn_name', 'id': 'asn_id'},
+}
+
+DIMENSION_TABLES = [spec['table'] for spec in DIMENSIONS.values()]
+
+# Name column (lower case) -> dimension
+NAME_COLUMNS = {spec['name'].lower(): dimension for dimension, spec in DIMENSIONS.items()}
+
+# Fact tables stored with ids: each name column of their rows becomes the dimension's id column
+ENCODED_TABLES = ['daily_asn_attacks', 'daily_username_attacks', 'daily_ip_attacks', 'daily_ip_username_attacks']
+
+
+def create_dimension_tables(conn):
+    """Create the dimension tables that do not exist yet (existing ids are kept)"""
+    for spec in DIMENSIONS.values():
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {spec['table']} ({spec['id']} INTEGER, {spec['name']} VARCHAR)")
+
+
+def add_dimension_names(conn, rows, dimensions):
+    """Give the names in rows (a table with the dimensions' name columns) that have no id yet the next ids"""
+    create_dimension_tables(conn)
+    for dimension in dimensions:
+        spec = DIMENSIONS[dimension]
+        conn.execute(f"""
+            INSERT INTO {spec['table']}
+            SELECT
+                (SELECT COALESCE(MAX({spec['id']}), 0) FROM {spec['table']}) + ROW_NUMBER() OVER (ORDER BY name),
+                name
+            FROM (SELECT DISTINCT {spec['name']} as name FROM {rows} WHERE {spec['name']} IS NOT NULL) names
+            WHERE NOT EXISTS (SELECT 1 FROM {spec['table']} d WHERE d.{spec['name']} = names.name)
+        """)
+
+
+def insert_named_rows(conn, table, select):
+    """
+    INSERT the rows of select - with names where table has ids - into an ENCODED_TABLES table
+    New names are added to their dimensions first; rows go in ordered by date and their names, the
+    order the string-keyed tables had (row order still decides the summaries' day-over-day LAG)
+    """
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE named_rows AS {select}")
+    columns = [row[0] for row in conn.execute("DESCRIBE named_rows").fetchall()]
+    dimensions = [NAME_COLUMNS[column.lower()] for column in columns if column.lower() in NAME_COLUMNS]
+    add_dimension_names(conn, 'named_rows', dimensions)
+
+    targets, values, joins, names = [], [], [], []
+    for column in columns:
+        dimension = NAME_COLUMNS.get(column.lower())
+        if dimension is None:
+            targets.append(column)
+            values.append(f"r.{column}")
+            continue
+        spec = DIMENSIONS[dimension]
+        targets.append(spec['id'])
+        names.append(f"r.{column}")
+        values.append(f"{dimension}.{spec['id']}")
+        joins.append(f"LEFT JOIN {spec['table']} {dimension} ON {dimension}.{spec['name']} = r.{column}")
+
+    conn.execute(f"""
+        INSERT INTO {table} ({', '.join(targets)})
+        SELECT {', '.join(values)}
+        FROM named_rows r
+        {' '.join(joins)}
+        ORDER BY {', '.join(['r.date', *names])}
+    """)
+    conn.execute("DROP TABLE named_rows")
+
+
+def dimension_ids(conn, **names):
+    """
+    Translate API filter values to ids in one query: dimension=name or dimension=[names]
+    Returns {dimension: id} (None for an unknown name) or {dimension: [ids of the known names]}
+    """
+    lookups, params = [], []
+    for dimension, value in names.items():
+        values = value if isinstance(value, list) else [value]
+        if value is None or not values:
+            continue
+        spec = DIMENSIONS[dimension]
+        lookups.append(f"""
+            SELECT '{dimension}' as dimension, {spec['name']} as name, {spec['id']} as id
+            FROM {spec['table']}
+            WHERE {spec['name']} IN ({', '.join('?' for _ in values)})
+        """)
+        params.extend(values)
+
+    found = {}
+    if lookups:
+        for dimension, name, id_ in conn.execute(' UNION ALL '.join(lookups), params).fetchall():
+            found[(dimension, name)] = id_
+
+    ids = {}
+    for dimension, value in names.items():
+        if isinstance(value, list):
+            ids[dimension] = [found[(dimension, name)] for name in value if (dimension, name) in found]
+        else:
+            ids[dimension] = found.get((dimension, value))
+    return ids
+
+
+def id_sql(ids):
+    """SQL for an id (NULL when the name was unknown, so nothing matches) or an IN list of ids"""
+    if isinstance(ids, list):
+        return ', '.join(str(int(id_)) for id_ in ids) or 'NULL'
+    return 'NULL' if ids is None else str(int(ids))
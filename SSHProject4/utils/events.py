@@ -0,0 +1,104 @@
+"""
+Classification of sshd log messages into structured event columns
+Runs once at ingest with Arrow string kernels (prefix tests, one RE2 extract), so builders can
+group by outcome instead of re-reading Message text
+"""
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# event_type -> Message prefixes; the first matching rule wins, anything else is 'other'
+EVENT_RULES = [
+    ('failed_auth', ['Failed ']),
+    ('invalid_user', ['Invalid user ', 'input_userauth_request: invalid user ']),
+    ('accepted', ['Accepted ']),
+    ('auth_failure', ['pam_unix(sshd:auth): authentication failure', 'PAM ', 'error: PAM: Authentication failure']),
+    ('max_attempts', ['error: maximum authentication attempts exceeded', 'Disconnecting authenticating user ',
+                      'Disconnecting invalid user ']),
+    ('disconnect', ['Disconnected from ', 'Received disconnect from ']),
+    ('connection_closed', ['Connection closed by ', 'Connection reset by ']),
+    ('negotiation_failed', ['Unable to negotiate with ', 'Did not receive identification string',
+                            'kex_exchange_identification', 'Bad protocol version', 'banner exchange']),
+]
+
+# Dictionary of the event_type column (index 0 is 'other'); fixed, so every file shares it
+EVENT_TYPES = ['other'] + [name for name, _ in EVENT_RULES]
+EVENT_TYPE_DICTIONARY = pa.array(EVENT_TYPES, pa.string())
+
+# "Failed password for ..." / "Accepted publickey for ..." -> password / publickey / keyboard-interactive/pam / none
+AUTH_METHOD_PATTERN = r'^(?:Failed|Accepted) (?P<auth_method>\S+) for '
+
+# Failed attempts against a user that does not exist say so mid-message
+INVALID_USER_MARKER = ' for invalid user '
+
+EVENT_COLUMNS = ['event_type', 'auth_method', 'invalid_user']
+
+
+def classify_messages(messages):
+    """
+    Vectorized Message -> (event_type, auth_method, invalid_user)
+    event_type is dictionary<int8, string> over EVENT_TYPES, auth_method is null outside Failed/Accepted
+    """
+    if isinstance(messages, pa.ChunkedArray):
+        messages = messages.combine_chunks()
+    if pa.types.is_dictionary(messages.type):
+        messages = pc.cast(messages, pa.string())
+
+    # Apply rules last to first so the earliest matching rule is the one left standing
+    codes = np.zeros(len(messages), dtype=np.int8)
+    for code in range(len(EVENT_RULES), 0, -1):
+        _, prefixes = EVENT_RULES[code - 1]
+        matched = pc.starts_with(messages, prefixes[0])
+        for prefix in prefixes[1:]:
+            matched = pc.or_(matched, pc.starts_with(messages, prefix))
+        codes[pc.fill_null(matched, False).to_numpy(zero_copy_only=False)] = code
+
+    event_type = pa.DictionaryArray.from_arrays(pa.array(codes, pa.int8()), EVENT_TYPE_DICTIONARY)
+
+    # The regex and substring search only run over Failed/Accepted rows, then scatter back by position
+    auth_rows = np.flatnonzero((codes == EVENT_TYPES.index('failed_auth')) | (codes == EVENT_TYPES.index('accepted')))
+    auth_messages = messages.take(pa.array(auth_rows))
+
+    # flatten() carries the struct's nulls (no match) into the field
+    methods = pc.extract_regex(auth_messages, AUTH_METHOD_PATTERN).flatten()[0]
+    positions = np.full(len(messages), -1, dtype=np.int64)
+    positions[auth_rows] = np.arange(len(auth_rows))
+    auth_method = methods.take(pa.array(positions, mask=positions < 0))
+
+    invalid_user = codes == EVENT_TYPES.index('invalid_user')
+    marked = pc.fill_null(pc.match_substring(auth_messages, INVALID_USER_MARKER), False)
+    invalid_user[auth_rows[marked.to_numpy(zero_copy_only=False)]] = True
+
+    return event_type, auth_method, pa.array(invalid_user, pa.bool_())
+
+
+def count_event_types(event_type):
+    """{event_type: rows} for a classified chunk"""
+    counts = np.bincount(event_type.indices.to_numpy(zero_copy_only=False), minlength=len(EVENT_TYPES))
+    return {name: int(count) for name, count in zip(EVENT_TYPES, counts) if count}
+
+
+def event_columns_sql(column='Message'):
+    """SQL twin of classify_messages: the three event column expressions for a SELECT list"""
+    def quoted(text):
+        return "'" + text.replace("'", "''") + "'"
+
+    cases = ' '.join(
+        f"WHEN {' OR '.join(f'starts_with({column}, {quoted(prefix)})' for prefix in prefixes)} THEN {quoted(name)}"
+        for name, prefixes in EVENT_RULES
+    )
+    # Like classify_messages, the marker only counts on Failed/Accepted rows - sshd also writes it in
+    # max_attempts and other lines, which keep their own event_type and invalid_user = false
+    rules = dict(EVENT_RULES)
+    auth_row = ' OR '.join(f"starts_with({column}, {quoted(prefix)})"
+                           for prefix in rules['failed_auth'] + rules['accepted'])
+    invalid_user = ' OR '.join(
+        [f"(({auth_row}) AND contains({column}, {quoted(INVALID_USER_MARKER)}))"] +
+        [f"starts_with({column}, {quoted(prefix)})" for prefix in rules['invalid_user']]
+    )
+    return (
+        f"CASE {cases} ELSE 'other' END as event_type, "
+        f"NULLIF(regexp_extract({column}, {quoted(AUTH_METHOD_PATTERN)}, 1), '') as auth_method, "
+        f"COALESCE({invalid_user}, false) as invalid_user"
+    )
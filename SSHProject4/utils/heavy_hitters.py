@@ -0,0 +1,131 @@
+"""
+Per-day heavy hitters for fast range top-K
+daily_heavy_hitters keeps each day's HEAVY_HITTERS_PER_DAY busiest entities per dimension with their
+exact attacks, plus day_floor - the attacks of the busiest entity left out that day
+Summing a range gives each listed entity a lower bound (its listed days) and an upper bound (plus
+the floors of the days it is missing); an entity never listed has at most the sum of the floors
+When the K-th lower bound reaches every other upper bound, the top K is certain without touching the
+daily_* tables - otherwise the caller falls back to the exact GROUP BY
+Entities are the dimension ids the daily_* tables store (see utils/dimensions.py)
+"""
+
+import duckdb
+
+from .daily_tables import date_list_sql
+from .dimensions import DIMENSIONS
+
+HEAVY_HITTERS_TABLE = 'daily_heavy_hitters'
+HEAVY_HITTERS_PER_DAY = 2000
+
+# dimension -> daily_* table and its entity (id) column
+HEAVY_HITTERS = {
+    'ip': {'source': 'daily_ip_attacks', 'key': DIMENSIONS['ip']['id']},
+    'username': {'source': 'daily_username_attacks', 'key': DIMENSIONS['username']['id']},
+    'asn': {'source': 'daily_asn_attacks', 'key': DIMENSIONS['asn']['id']},
+}
+
+
+def heavy_hitters_select(dimension, dates=None):
+    """SELECT producing the dimension's daily_heavy_hitters rows (all dates, or only dates)"""
+    spec = HEAVY_HITTERS[dimension]
+    where = f"WHERE date IN ({date_list_sql(dates)})" if dates else ""
+    return f"""
+        WITH totals AS (
+            SELECT date, {spec['key']} as entity_id, SUM(attacks) as attacks
+            FROM {spec['source']}
+            {where}
+            GROUP BY date, entity_id
+        ),
+        ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY date ORDER BY attacks DESC, entity_id) as day_rank
+            FROM totals
+        ),
+        floors AS (
+            SELECT date, COALESCE(MAX(attacks) FILTER (WHERE day_rank > {HEAVY_HITTERS_PER_DAY}), 0) as day_floor
+            FROM ranked
+            GROUP BY date
+        )
+        SELECT r.date, '{dimension}' as dimension, r.entity_id, r.attacks, f.day_floor
+        FROM ranked r
+        JOIN floors f ON f.date = r.date
+        WHERE r.day_rank <= {HEAVY_HITTERS_PER_DAY}
+        ORDER BY r.date, r.attacks DESC
+    """
+
+
+def refresh_heavy_hitters(conn, dates=None, dimensions=None):
+    """
+    Rebuild dimensions' daily_heavy_hitters rows from the daily_* tables; with dates, only those dates
+    A dimension whose daily_* table does not exist is left out; a full refresh recreates the table
+    """
+    existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    create = "CREATE OR REPLACE TABLE" if dates is None and dimensions is None else "CREATE TABLE IF NOT EXISTS"
+    conn.execute(f"""
+        {create} {HEAVY_HITTERS_TABLE} (
+            date DATE,
+            dimension VARCHAR,
+            entity_id INTEGER,
+            attacks BIGINT,
+            day_floor BIGINT
+        )
+    """)
+
+    date_filter = f" AND date IN ({date_list_sql(dates)})" if dates else ""
+    for dimension in dimensions or HEAVY_HITTERS:
+        conn.execute(f"DELETE FROM {HEAVY_HITTERS_TABLE} WHERE dimension = '{dimension}'{date_filter}")
+        if HEAVY_HITTERS[dimension]['source'] in existing:
+            conn.execute(f"INSERT INTO {HEAVY_HITTERS_TABLE} {heavy_hitters_select(dimension, dates)}")
+
+
+def top_entities_sql(conn, dimension, start, end, limit, column):
+    """
+    SELECT of the dimension's top `limit` entity ids in [start, end] as `column`, from the heavy hitters
+    None when they cannot prove the answer (missing days, or a bound too close) - use the exact query
+    """
+    try:
+        row = conn.execute(f"""
+            WITH in_range AS (
+                SELECT * FROM {HEAVY_HITTERS_TABLE}
+                WHERE dimension = '{dimension}' AND date BETWEEN '{start}' AND '{end}'
+            ),
+            days AS (
+                SELECT COUNT(*) as day_count, COALESCE(SUM(day_floor), 0) as total_floor
+                FROM (SELECT date, ANY_VALUE(day_floor) as day_floor FROM in_range GROUP BY date)
+            ),
+            bounds AS (
+                SELECT
+                    entity_id,
+                    SUM(attacks) as lower_bound,
+                    SUM(attacks) + ANY_VALUE(days.total_floor) - SUM(day_floor) as upper_bound,
+                    ROW_NUMBER() OVER (ORDER BY SUM(attacks) DESC, entity_id) as range_rank
+                FROM in_range, days
+                GROUP BY entity_id
+            )
+            SELECT
+                LIST(entity_id ORDER BY range_rank) FILTER (WHERE range_rank <= {limit}) as top_entities,
+                MIN(lower_bound) FILTER (WHERE range_rank <= {limit}) as kth_lower,
+                MAX(upper_bound) FILTER (WHERE range_rank > {limit}) as next_upper,
+                ANY_VALUE(days.day_count) as day_count,
+                ANY_VALUE(days.total_floor) as total_floor,
+                (SELECT COUNT(*) FROM daily_stats WHERE date BETWEEN '{start}' AND '{end}') as data_days
+            FROM bounds, days
+        """).fetchone()
+    except duckdb.CatalogException:
+        return None  # heavy hitters not built
+
+    top, kth_lower, next_upper, day_count, total_floor, data_days = row
+    # Every day with data must be summarized, or its attacks are unaccounted for
+    if day_count != data_days:
+        return None
+    top = top or []
+    if len(top) < limit:
+        certain = total_floor == 0  # every entity of the range is listed
+    else:
+        certain = kth_lower >= max(next_upper or 0, total_floor)
+    if not certain:
+        return None
+
+    if not top:
+        return f"SELECT NULL::INTEGER as {column} WHERE false"
+    ids = ', '.join('NULL' if entity is None else str(entity) for entity in top)
+    return f"SELECT UNNEST([{ids}]::INTEGER[]) as {column}"
@@ -0,0 +1,70 @@
+"""
+HyperLogLog distinct-count sketches in plain SQL
+A sketch is a set of (bucket, rho) register rows; sketches merge by taking MAX(rho) per bucket,
+so per-day or per-batch sketches can be combined into distinct counts for any range or union
+Sketches are built with DuckDB's hash(), so they only merge with sketches from the same DuckDB version
+"""
+
+import math
+
+HLL_PRECISION = 14
+HLL_BUCKETS = 1 << HLL_PRECISION
+
+# Relative standard error of an estimate (about 0.8%); small counts are nearly exact (linear counting)
+HLL_ERROR = 1.04 / math.sqrt(HLL_BUCKETS)
+
+_ALPHA = 0.7213 / (1 + 1.079 / HLL_BUCKETS)
+_VALUE_BITS = 64 - HLL_PRECISION
+
+
+def hll_registers_sql(source, column, keys=(), where=None):
+    """
+    SELECT keys..., bucket, rho: the sketch of column's non-NULL values in source per keys
+    A value's bucket is the low HLL_PRECISION bits of its hash; rho is the position of the lowest set bit
+    of the rest. w & ~(w - 1) isolates that bit - the largest per bucket gives the largest rho, and
+    its log2 is exact because it is a power of two (the sentinel bit stands in for an all-zero rest)
+    """
+    key_list = ''.join(f"{key}, " for key in keys)
+    conditions = [f"{column} IS NOT NULL"] + ([where] if where else [])
+    return f"""
+        SELECT {key_list}bucket, (log2(MAX(w & ~(w - 1))::DOUBLE) + 1)::TINYINT as rho
+        FROM (
+            SELECT
+                {key_list}(hash({column}) & {HLL_BUCKETS - 1})::SMALLINT as bucket,
+                (hash({column}) >> {HLL_PRECISION}) | (1::UBIGINT << {_VALUE_BITS}) as w
+            FROM {source}
+            WHERE {' AND '.join(conditions)}
+        ) hashed
+        GROUP BY {key_list}bucket
+    """
+
+
+def hll_estimate_sql(registers, keys=(), alias='estimate'):
+    """
+    SELECT keys..., estimate from register rows (keys..., bucket, rho), merging duplicates first
+    Registers missing from the rows are empty; for small counts linear counting is used
+    """
+    key_list = ''.join(f"{key}, " for key in keys)
+    group_by = f"GROUP BY {', '.join(keys)}" if keys else ""
+    return f"""
+        WITH merged AS (
+            SELECT {key_list}bucket, MAX(rho) as rho
+            FROM {registers}
+            GROUP BY {key_list}bucket
+        ),
+        harmonic AS (
+            SELECT
+                {key_list}{HLL_BUCKETS} - COUNT(*) as empty_buckets,
+                {_ALPHA * HLL_BUCKETS * HLL_BUCKETS}
+                    / ({HLL_BUCKETS} - COUNT(*) + COALESCE(SUM(pow(2.0, -rho)), 0)) as raw_estimate
+            FROM merged
+            {group_by}
+        )
+        SELECT
+            {key_list}ROUND(CASE
+                WHEN raw_estimate <= {2.5 * HLL_BUCKETS} AND empty_buckets > 0
+                THEN {HLL_BUCKETS} * ln({HLL_BUCKETS}.0 / empty_buckets)
+                ELSE raw_estimate
+            END)::BIGINT as {alias}
+        FROM harmonic
+    """
@@ -0,0 +1,187 @@
+"""
+Memory-mapped IP lookup store compiled from ipinfo.json
+One Arrow IPC file: IPv4 keys sorted as uint32 (binary-searched), a short tail of
+non-IPv4 keys, fixed-width id columns and the string tables behind them
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from .parquet_layout import ipv4_to_uint32, split_ip_column
+
+# Columns served by the lookup (same names/meaning as the converter's enrichment columns)
+LOOKUP_COLUMNS = [
+    'continent', 'country_code', 'country', 'latitude', 'longitude',
+    'asn', 'asn_name', 'asn_domain', 'asn_type'
+]
+
+# String columns stored as dictionary ids + string table
+DICTIONARY_COLUMNS = ['continent', 'country_code', 'country', 'asn', 'asn_name', 'asn_domain', 'asn_type']
+
+
+def default_lookup_path(json_path):
+    """ipinfo.json -> ipinfo.lookup.arrow"""
+    return Path(json_path).with_suffix('.lookup.arrow')
+
+
+def safe_float(value):
+    """Safely convert to float"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if value.lower() in ('nan', 'none', '', 'null'):
+            return None
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+def compile_ip_lookup(json_path, lookup_path):
+    """
+    One-time compile of ipinfo.json into the lookup file
+    Returns the number of IPs written
+    """
+    json_path = Path(json_path)
+    lookup_path = Path(lookup_path)
+
+    with open(json_path, 'r') as f:
+        ip_data = json.load(f)
+
+    ips = list(ip_data.keys())
+    columns = {col: [] for col in LOOKUP_COLUMNS}
+
+    for ip in ips:
+        ip_info = ip_data[ip]
+        asn_info = ip_info.get('asn', {})
+
+        columns['continent'].append(ip_info.get('cntn', None))
+        columns['country_code'].append(ip_info.get('cc', None))
+        columns['country'].append(ip_info.get('cn', None))
+        columns['latitude'].append(safe_float(ip_info.get('lat')))
+        columns['longitude'].append(safe_float(ip_info.get('lng')))
+        columns['asn'].append(asn_info.get('asn', None))
+        columns['asn_name'].append(asn_info.get('name', None))
+        columns['asn_domain'].append(asn_info.get('domain', None))
+        columns['asn_type'].append(asn_info.get('type', None))
+
+    del ip_data
+
+    ip_v4, ip_text = split_ip_column(pa.array(ips, pa.string()))
+    table = pa.table({
+        'ip_v4': ip_v4,
+        'ip_text': ip_text,
+        **{
+            col: pa.array(values, pa.float64() if col in ('latitude', 'longitude') else pa.string())
+            for col, values in columns.items()
+        }
+    })
+
+    # IPv4 keys first in ascending order (nulls, i.e. non-IPv4 keys, sort last)
+    table = table.sort_by([('ip_v4', 'ascending')])
+    num_ipv4 = len(table) - table['ip_v4'].null_count
+
+    # Drop duplicate IPv4 keys (e.g. "1.2.3.4" and "01.2.3.4"), keeping the first
+    keys = table['ip_v4'].slice(0, num_ipv4).to_numpy()
+    keep = np.ones(len(table), dtype=bool)
+    keep[1:num_ipv4] = keys[1:] != keys[:-1]
+    table = table.filter(pa.array(keep))
+    num_ipv4 = int(keep[:num_ipv4].sum())
+
+    for col in DICTIONARY_COLUMNS:
+        index = table.schema.get_field_index(col)
+        table = table.set_column(index, col, pc.dictionary_encode(table[col]))
+
+    source = json_path.stat()
+    table = table.combine_chunks().replace_schema_metadata({
+        'num_ipv4': str(num_ipv4),
+        'source_size': str(source.st_size),
+        'source_mtime_ns': str(source.st_mtime_ns),
+    })
+
+    # Uncompressed IPC so readers can memory-map it without copying
+    temp_path = lookup_path.with_suffix('.arrow.tmp')
+    with pa.OSFile(str(temp_path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    temp_path.replace(lookup_path)
+
+    return len(table)
+
+
+def lookup_is_current(json_path, lookup_path):
+    """True if the lookup file exists and was compiled from the current ipinfo.json"""
+    lookup_path = Path(lookup_path)
+    if not lookup_path.exists():
+        return False
+    if not Path(json_path).exists():
+        return True
+
+    metadata = pa.ipc.open_file(pa.memory_map(str(lookup_path), 'r')).schema.metadata or {}
+    source = Path(json_path).stat()
+    return (metadata.get(b'source_size') == str(source.st_size).encode()
+            and metadata.get(b'source_mtime_ns') == str(source.st_mtime_ns).encode())
+
+
+class IPLookup:
+    """Memory-mapped view of a compiled lookup file with vectorized IP -> row lookups"""
+
+    def __init__(self, lookup_path):
+        self.path = Path(lookup_path)
+
+        # Zero-copy: every column's buffers point into the shared page cache
+        self.table = pa.ipc.open_file(pa.memory_map(str(self.path), 'r')).read_all()
+        self.num_ipv4 = int(self.table.schema.metadata[b'num_ipv4'])
+
+        # View the sorted keys straight out of the mapped buffer (no copy, no pandas import)
+        keys = self.table['ip_v4'].chunk(0)
+        self.ipv4_keys = np.frombuffer(keys.buffers()[1], dtype=np.uint32, count=self.num_ipv4,
+                                       offset=keys.offset * 4)
+        self.text_keys = self.table['ip_text'].chunk(0).slice(self.num_ipv4)
+
+    def __len__(self):
+        return len(self.table)
+
+    def find(self, ips):
+        """Row position of every IP in the lookup table (null where the IP is unknown)"""
+        if isinstance(ips, pa.ChunkedArray):
+            ips = ips.combine_chunks()
+
+        # Attack logs repeat the same IPs heavily - search each distinct value once
+        encoded = pc.dictionary_encode(ips)
+        return self.find_unique(encoded.dictionary).take(encoded.indices)
+
+    def find_unique(self, ips):
+        """Row position of each (distinct, non-null) IP in the lookup table"""
+        ip_v4 = ipv4_to_uint32(ips)
+        is_v4 = ip_v4.is_valid().to_numpy(zero_copy_only=False)
+        queries = ip_v4.fill_null(0).to_numpy()
+
+        # Vectorized binary search over the sorted IPv4 keys
+        positions = np.searchsorted(self.ipv4_keys, queries).astype(np.int64)
+        found = np.zeros(len(ips), dtype=bool)
+        if self.num_ipv4 > 0:
+            clipped = np.minimum(positions, self.num_ipv4 - 1)
+            found = is_v4 & (self.ipv4_keys[clipped] == queries)
+
+        # Non-IPv4 values (IPv6, junk) fall back to a hash lookup over the small text tail
+        if len(self.text_keys) > 0 and not is_v4.all():
+            text_rows = np.flatnonzero(~is_v4)
+            text_index = pc.index_in(ips.take(pa.array(text_rows)), value_set=self.text_keys)
+            text_found = text_index.is_valid().to_numpy(zero_copy_only=False)
+            positions[text_rows[text_found]] = text_index.drop_null().to_numpy() + self.num_ipv4
+            found[text_rows[text_found]] = True
+
+        return pa.array(positions, type=pa.int64(), mask=~found)
+
+    def take(self, column, positions):
+        """Values of one lookup column for the given row positions"""
+        return self.table[column].take(positions)
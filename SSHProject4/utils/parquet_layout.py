@@ -0,0 +1,218 @@
+"""
+Parquet layout helpers shared by the converter and the DuckDB builders
+The compact layout stores IPv4 as uint32, small ints and dictionary-encoded dimensions,
+and keeps the rest of the IP enrichment in a separate dimension file
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Conversion manifest kept under the output directory (see the converter's ConversionManifest)
+MANIFEST_NAME = '_manifest.json'
+
+# Dimension file written next to the year=/month= partitions in the compact layout
+IP_DIMENSION_FILE = 'ip_dimension.parquet'
+
+# Partition directory patterns, relative to the output directory
+#   month: year=2022/month=11 (rows in CSV order)
+#   day:   date=2022-11-30    (rows sorted by IP, Time so row-group min/max statistics prune lookups)
+PARTITION_GLOBS = {
+    'month': 'year=*/month=*',
+    'day': 'date=*',
+}
+
+# Sort order of day-partitioned files, per layout
+SORT_KEYS = {
+    'standard': [('IP', 'ascending'), ('Time', 'ascending')],
+    'compact': [('ip_v4', 'ascending'), ('ip_text', 'ascending'), ('Time', 'ascending')],
+}
+
+# Enrichment columns kept on every compact fact row (everything else is joined back from the dimension)
+COMPACT_ENRICHMENT_COLUMNS = ['country', 'asn_name']
+
+# Column order of compact Parquet files
+COMPACT_COLUMNS = [
+    'datetime', 'year', 'month', 'ip_v4', 'ip_text', 'Time',
+    'country', 'asn_name',
+    'Node', 'Port', 'PID', 'Username', 'Tag', 'Message',
+    'event_type', 'auth_method', 'invalid_user'
+]
+
+IPV4_PATTERN = r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$'
+
+
+def ipv4_to_uint32(ips):
+    """Vectorized dotted-quad -> uint32; null where the value is not a valid IPv4 address"""
+    if isinstance(ips, pa.ChunkedArray):
+        ips = ips.combine_chunks()
+
+    looks_v4 = pc.fill_null(pc.match_substring_regex(ips, IPV4_PATTERN), False)
+    octets = pc.list_flatten(pc.split_pattern(pc.filter(ips, looks_v4), '.'))
+    octets = pc.cast(octets, pa.uint32()).to_numpy().reshape(-1, 4)
+
+    values = np.zeros(len(ips), dtype=np.uint32)
+    valid = np.zeros(len(ips), dtype=bool)
+
+    positions = np.flatnonzero(looks_v4.to_numpy(zero_copy_only=False))
+    values[positions] = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    valid[positions] = (octets <= 255).all(axis=1)
+
+    return pa.array(values, type=pa.uint32(), mask=~valid)
+
+
+def split_ip_column(ips):
+    """Return (ip_v4, ip_text): uint32 for IPv4, original text only where that fails (IPv6 etc.)"""
+    ip_v4 = ipv4_to_uint32(ips)
+    ip_text = pc.if_else(pc.is_null(ip_v4), ips, pa.scalar(None, pa.string()))
+    return ip_v4, ip_text
+
+
+def ipv4_to_uint32_sql(column):
+    """SQL twin of ipv4_to_uint32: dotted-quad -> UINTEGER, NULL where the value is not a valid IPv4 address"""
+    octets = [f"TRY_CAST(split_part({column}, '.', {i}) AS UBIGINT)" for i in range(1, 5)]
+    return (
+        f"CASE WHEN regexp_matches({column}, '{IPV4_PATTERN}') "
+        f"AND {' AND '.join(f'{octet} <= 255' for octet in octets)} "
+        f"THEN (({octets[0]} << 24) | ({octets[1]} << 16) | ({octets[2]} << 8) | {octets[3]})::UINTEGER END"
+    )
+
+
+def ip_text_sql(alias):
+    """SQL expression rebuilding the dotted IP string from a compact row"""
+    return (
+        f"COALESCE({alias}.ip_text, "
+        f"CAST(({alias}.ip_v4 >> 24) & 255 AS VARCHAR) || '.' || "
+        f"CAST(({alias}.ip_v4 >> 16) & 255 AS VARCHAR) || '.' || "
+        f"CAST(({alias}.ip_v4 >> 8) & 255 AS VARCHAR) || '.' || "
+        f"CAST({alias}.ip_v4 & 255 AS VARCHAR))"
+    )
+
+
+def standard_columns_sql(fact_source, dimension_path):
+    """
+    SELECT over compact Parquet that exposes the standard column set
+    fact_source is a FROM-able expression such as read_parquet([...])
+    """
+    return f"""
+        SELECT
+            f.datetime,
+            f.year,
+            f.month,
+            {ip_text_sql('f')} as IP,
+            f.Time,
+            d.continent,
+            d.country_code,
+            f.country,
+            d.latitude,
+            d.longitude,
+            d.asn,
+            f.asn_name,
+            d.asn_domain,
+            d.asn_type,
+            f.Node,
+            f.Port,
+            f.PID,
+            f.Username,
+            f.Tag,
+            f.Message,
+            f.event_type,
+            f.auth_method,
+            f.invalid_user
+        FROM {fact_source} f
+        LEFT JOIN read_parquet('{dimension_path}') d
+            ON f.ip_v4 IS NOT DISTINCT FROM d.ip_v4
+           AND f.ip_text IS NOT DISTINCT FROM d.ip_text
+    """
+
+
+def partition_file_groups(parquet_dir):
+    """
+    Parquet files of a converter output directory grouped for scanning, as (name, [files])
+    date= partitions give one group per day, so a scan only opens that day's files;
+    year=/month= partitions give one group per file (months can hold thousands of files)
+    """
+    parquet_dir = Path(parquet_dir)
+    groups = []
+
+    for partition_dir in sorted(parquet_dir.glob(PARTITION_GLOBS['day'])):
+        files = sorted(partition_dir.glob('*.parquet'))
+        if files:
+            groups.append((partition_dir.name, files))
+
+    for parquet_file in sorted(parquet_dir.glob(f"{PARTITION_GLOBS['month']}/*.parquet")):
+        groups.append((parquet_file.name, [parquet_file]))
+
+    return groups
+
+
+def batch_file_groups(groups, max_files):
+    """
+    Merge consecutive (name, [files]) scan groups into batches of at most max_files files,
+    so one read_parquet() covers many files (DuckDB parallelizes across them) without
+    opening more than max_files at once; a group larger than max_files is split
+    """
+    batches = []
+    names, files = [], []
+
+    for name, group_files in groups:
+        for start in range(0, len(group_files), max_files):
+            part = group_files[start:start + max_files]
+            if files and len(files) + len(part) > max_files:
+                batches.append((names[0] if len(names) == 1 else f"{names[0]} .. {names[-1]}", files))
+                names, files = [], []
+            names.append(name)
+            files = files + part
+
+    if files:
+        batches.append((names[0] if len(names) == 1 else f"{names[0]} .. {names[-1]}", files))
+    return batches
+
+
+def parquet_source_sql(files):
+    """
+    read_parquet() over a list of files
+    Hive partitioning is off so a date= directory never shadows a column or the date alias
+    """
+    file_list = ', '.join(f"'{f}'" for f in files)
+    return f"read_parquet([{file_list}], hive_partitioning = false)"
+
+
+def output_layout(parquet_dir):
+    """Layout a converter output directory was written in, from its manifest ('standard' without one)"""
+    manifest_path = Path(parquet_dir) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return 'standard'
+    with open(manifest_path, 'r') as f:
+        return json.load(f).get('layout', 'standard')
+
+
+def standard_source_sql(files, parquet_dir, layout):
+    """
+    parquet_source_sql(files) with the standard column set whatever the layout:
+    compact files are joined back to parquet_dir's IP dimension file
+    """
+    source = parquet_source_sql(files)
+    if layout == 'compact':
+        source = f"({standard_columns_sql(source, Path(parquet_dir) / IP_DIMENSION_FILE)})"
+    return source
+
+
+def partition_files_for_dates(parquet_dir, dates):
+    """
+    Parquet files that can hold rows for any of the given dates
+    Their date= directories, or the whole year=/month= directories they fall in
+    """
+    parquet_dir = Path(parquet_dir)
+    files = []
+
+    for day in sorted(set(dates)):
+        files.extend(sorted((parquet_dir / f"date={day.isoformat()}").glob('*.parquet')))
+
+    for year, month in sorted({(day.year, day.month) for day in dates}):
+        files.extend(sorted((parquet_dir / f"year={year}" / f"month={month}").glob('*.parquet')))
+
+    return files
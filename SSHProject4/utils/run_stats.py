@@ -0,0 +1,125 @@
+"""
+Ingest instrumentation: per-stage wall time, counters, peak RSS and a JSON-lines run log
+Stage timers wrap whole chunks (never rows), so they cost nothing measurable in the hot loop
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Print levels, quietest first
+#   quiet: final summary only
+#   file:  one line per CSV file (default)
+#   chunk: per-chunk enrichment lines as well
+LOG_LEVELS = ['quiet', 'file', 'chunk']
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or of its finished children) in MB"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class IngestStats:
+    """Accumulated stage seconds and counters for one file or a whole run"""
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work and add it to the named stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other):
+        """Add another IngestStats (or its to_dict() form, e.g. from a pool worker)"""
+        if isinstance(other, IngestStats):
+            other = other.to_dict()
+        for name, seconds in other['stages'].items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, value in other['counters'].items():
+            self.count(name, value)
+
+    def to_dict(self):
+        return {
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+        }
+
+    def hit_rate(self):
+        """Share of enriched rows (after dedup) whose IP was found in the lookup"""
+        rows = self.counters.get('rows_enriched', 0)
+        return self.counters.get('ip_hits', 0) / rows if rows else None
+
+    def print_summary(self, elapsed, workers=False):
+        """Stage breakdown and throughput table (workers=True also reports the pool's peak RSS)"""
+        rows = self.counters.get('rows_written', 0)
+        stage_total = sum(self.stages.values())
+
+        print(f"\n⏱️  Stage breakdown (wall seconds summed across files and workers, run took {elapsed:.1f}s):")
+        print(f"   {'Stage':<12} {'Seconds':>9} {'Share':>7} {'Rows/sec':>12}")
+        for name, seconds in sorted(self.stages.items(), key=lambda item: -item[1]):
+            share = seconds / stage_total * 100 if stage_total else 0
+            rate = f"{rows / seconds:,.0f}" if seconds >= 0.01 else "-"
+            print(f"   {name:<12} {seconds:>9.2f} {share:>6.1f}% {rate:>12}")
+
+        print(f"\n📊 Counters:")
+        print(f"   Rows read / written: {self.counters.get('rows_read', 0):,} / {rows:,}")
+        print(f"   Bytes read / written: {self.counters.get('bytes_read', 0) / 1024**2:,.1f} MB / "
+              f"{self.counters.get('bytes_written', 0) / 1024**2:,.1f} MB")
+        chunks = self.counters.get('chunks', 0)
+        if chunks:
+            print(f"   Chunks: {chunks:,} (avg {self.counters.get('rows_read', 0) / chunks:,.0f} rows)")
+        if 'duplicates' in self.counters:
+            evicted = self.counters.get('dedup_evicted_days', 0)
+            window = f" ({evicted:,} days left the dedup window early)" if evicted else ""
+            print(f"   Duplicate events dropped: {self.counters['duplicates']:,}{window}")
+        events = {name[len('event_'):]: value for name, value in self.counters.items() if name.startswith('event_')}
+        if events:
+            total = sum(events.values())
+            shares = ', '.join(f"{name} {value / total * 100:.1f}%"
+                               for name, value in sorted(events.items(), key=lambda item: -item[1]))
+            print(f"   Event types: {shares}")
+        hit_rate = self.hit_rate()
+        if hit_rate is not None:
+            print(f"   Enrichment hit rate: {hit_rate * 100:.2f}%")
+        rss = peak_rss_mb()
+        if rss is not None:
+            worker_rss = f" (largest worker {peak_rss_mb(children=True):,.0f} MB)" if workers else ""
+            print(f"   Peak RSS: {rss:,.0f} MB{worker_rss}")
+
+
+class RunLog:
+    """Append-only JSON-lines log: one record per converted file plus one per run"""
+
+    def __init__(self, path):
+        self.path = Path(path) if path else None
+        self.run_id = datetime.now().strftime('%Y%m%dT%H%M%S') + f"-{os.getpid()}"
+
+    def write(self, event, **fields):
+        if self.path is None:
+            return
+        record = {'run_id': self.run_id, 'event': event, 'at': datetime.now().isoformat(timespec='seconds'), **fields}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
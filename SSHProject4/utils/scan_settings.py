@@ -0,0 +1,87 @@
+"""
+Scan batching and DuckDB resources for the summary builders ([summary] in config.ini)
+Builders pass a batch of Parquet files to each read_parquet() instead of one file per INSERT,
+which saves planning/startup per file and lets DuckDB spread one scan over every thread
+"""
+
+import configparser
+import os
+import re
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Share of the soft open-file limit one batch may use (DuckDB, the database and Python need the rest)
+OPEN_FILE_SHARE = 0.5
+
+# Upper bound for auto batches - beyond this the per-batch overhead is already negligible
+MAX_BATCH_FILES = 512
+
+# Without getrlimit (Windows: the C runtime allows 512 open files)
+FALLBACK_BATCH_FILES = 128
+
+# DuckDB memory_limit units -> MB
+MEMORY_UNITS_MB = {'': 1, 'kb': 1 / 1000, 'mb': 1, 'gb': 1000, 'tb': 1000 ** 2,
+                   'kib': 1 / 1024, 'mib': 1, 'gib': 1024, 'tib': 1024 ** 2}
+
+
+def open_file_batch_limit():
+    """Most files one scan may hold open, from the process's soft RLIMIT_NOFILE"""
+    if resource is None:
+        return FALLBACK_BATCH_FILES
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return MAX_BATCH_FILES
+    return max(1, min(MAX_BATCH_FILES, int(soft * OPEN_FILE_SHARE)))
+
+
+class ScanSettings:
+    """Files per read_parquet() batch, DuckDB threads and memory limit"""
+
+    def __init__(self, batch_files='auto', threads='auto', memory_limit='4GB'):
+        limit = open_file_batch_limit()
+        self.batch_files = limit if str(batch_files).strip().lower() == 'auto' else min(int(batch_files), limit)
+        if self.batch_files <= 0:
+            raise ValueError(f"scan_batch_files must be positive or 'auto', got {batch_files}")
+        self.threads = (os.cpu_count() or 1) if str(threads).strip().lower() == 'auto' else int(threads)
+        if self.threads <= 0:
+            raise ValueError(f"threads must be positive or 'auto', got {threads}")
+        self.memory_limit = str(memory_limit).strip()
+
+    def describe(self):
+        return f"{self.batch_files} files per scan, {self.threads} threads, memory limit {self.memory_limit}"
+
+    def split(self, workers):
+        """Settings for one of `workers` builders running at once: threads and memory divided between them"""
+        memory_limit = self.memory_limit
+        if memory_limit.lower() != 'auto':
+            memory_limit = f"{max(1, int(memory_limit_mb(memory_limit) / workers))}MB"
+        return ScanSettings(self.batch_files, max(1, self.threads // workers), memory_limit)
+
+
+def memory_limit_mb(value):
+    """'4GB' / '512 MiB' / '2000' (MB) -> MB"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([a-zA-Z]*)\s*', value)
+    if not match or match.group(2).lower() not in MEMORY_UNITS_MB:
+        raise ValueError(f"memory_limit must be like 4GB or 'auto', got {value}")
+    return float(match.group(1)) * MEMORY_UNITS_MB[match.group(2).lower()]
+
+
+def load_scan_settings(config_path='config.ini'):
+    """ScanSettings from the [summary] section (defaults when the file or keys are missing)"""
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    return ScanSettings(
+        batch_files=config.get('summary', 'scan_batch_files', fallback='auto'),
+        threads=config.get('summary', 'threads', fallback='auto'),
+        memory_limit=config.get('summary', 'memory_limit', fallback='4GB'),
+    )
+
+
+def configure_connection(conn, settings):
+    """Apply the thread count and memory limit to a builder's DuckDB connection"""
+    conn.execute(f"SET threads TO {settings.threads}")
+    if settings.memory_limit.lower() != 'auto':
+        conn.execute(f"SET memory_limit = '{settings.memory_limit}'")
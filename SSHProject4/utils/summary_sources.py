@@ -0,0 +1,124 @@
+"""
+Snapshot of the Parquet files the daily_* tables were built from, kept in the database
+Comparing it with the files on disk (size, mtime) gives the dates an incremental build must redo;
+each file's date range comes from its Parquet statistics, so no data is read to find it
+"""
+
+from datetime import date
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .parquet_layout import partition_file_groups
+
+SOURCES_TABLE = 'summary_sources'
+
+
+def file_date_range(path):
+    """(first, last) date a converter output file can hold: its date= directory, else datetime statistics"""
+    path = Path(path)
+    if path.parent.name.startswith('date='):
+        day = date.fromisoformat(path.parent.name[len('date='):])
+        return day, day
+
+    parquet_file = pq.ParquetFile(path)
+    metadata = parquet_file.metadata
+    column = parquet_file.schema_arrow.get_field_index('datetime')
+    first = last = None
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max:
+            # Written without statistics: read the column instead
+            days = pc.cast(parquet_file.read(columns=['datetime'])['datetime'], pa.date32())
+            bounds = pc.min_max(days).as_py()
+            return bounds['min'], bounds['max']
+        first = stats.min.date() if first is None else min(first, stats.min.date())
+        last = stats.max.date() if last is None else max(last, stats.max.date())
+    return first, last
+
+
+def scan_parquet_files(parquet_dir):
+    """{path: (size, mtime_ns)} for every converter output file"""
+    files = {}
+    for _, group in partition_file_groups(parquet_dir):
+        for path in group:
+            stat = path.stat()
+            files[str(path)] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def load_snapshot(conn):
+    """{path: (size, mtime_ns, first_date, last_date)} from the last build, or None if there was none"""
+    existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    if SOURCES_TABLE not in existing:
+        return None
+    rows = conn.execute(f"SELECT path, size, mtime_ns, first_date, last_date FROM {SOURCES_TABLE}").fetchall()
+    return {path: (size, mtime_ns, first, last) for path, size, mtime_ns, first, last in rows}
+
+
+def save_snapshot(conn, files, ranges):
+    """Replace the stored snapshot with files ({path: (size, mtime_ns)}) and their date ranges"""
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE {SOURCES_TABLE} (
+            path VARCHAR,
+            size BIGINT,
+            mtime_ns BIGINT,
+            first_date DATE,
+            last_date DATE
+        )
+    """)
+    paths = list(files)
+    snapshot_rows = pa.table({
+        'path': pa.array(paths, pa.string()),
+        'size': pa.array([files[path][0] for path in paths], pa.int64()),
+        'mtime_ns': pa.array([files[path][1] for path in paths], pa.int64()),
+        'first_date': pa.array([ranges[path][0] for path in paths], pa.date32()),
+        'last_date': pa.array([ranges[path][1] for path in paths], pa.date32()),
+    })
+    conn.register('snapshot_rows', snapshot_rows)
+    conn.execute(f"INSERT INTO {SOURCES_TABLE} SELECT * FROM snapshot_rows")
+    conn.unregister('snapshot_rows')
+
+
+def changed_dates(snapshot, files):
+    """
+    Compare the stored snapshot with the files on disk
+    Returns (dates to redo, {path: (first, last)} for every current file, {'new'|'changed'|'removed': count})
+    """
+    dates = set()
+    ranges = {}
+    counts = {'new': 0, 'changed': 0, 'removed': 0}
+
+    def add(first, last):
+        if first is None:
+            return  # empty file
+        dates.update(date.fromordinal(day) for day in range(first.toordinal(), last.toordinal() + 1))
+
+    for path, (size, mtime_ns) in files.items():
+        old = snapshot.get(path)
+        if old and old[:2] == (size, mtime_ns):
+            ranges[path] = old[2:]
+            continue
+
+        counts['changed' if old else 'new'] += 1
+        ranges[path] = file_date_range(path)
+        add(*ranges[path])
+        if old:
+            add(*old[2:])
+
+    for path, (_, _, first, last) in snapshot.items():
+        if path not in files:
+            counts['removed'] += 1
+            add(first, last)
+
+    return dates, ranges, counts
+
+
+def files_for_dates(ranges, dates):
+    """Files whose date range holds any of dates"""
+    return sorted(
+        Path(path) for path, (first, last) in ranges.items()
+        if first is not None and any(first <= day <= last for day in dates)
+    )
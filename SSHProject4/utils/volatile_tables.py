@@ -0,0 +1,146 @@
+"""
+Definitions of the volatile_* summary tables: each entity's largest day-over-day change in attacks
+An entity's row depends only on its own daily series, so changed dates only require recomputing
+the entities that had attacks on them
+Entities of an encoded daily_* table are grouped by id and named from the dimension at the end
+"""
+
+from .daily_tables import date_list_sql
+from .dimensions import DIMENSIONS
+
+# name -> entity column, daily_* table it is derived from, rows left out, and the dimension
+# whose id the daily_* table stores instead of the entity (None: it stores the entity)
+VOLATILE_TABLES = {
+    'volatile_country_summary': {'key': 'country', 'source': 'daily_country_attacks',
+                                 'where': "country != 'Unknown'", 'dimension': None},
+    'volatile_ip_summary': {'key': 'IP', 'source': 'daily_ip_attacks', 'where': None, 'dimension': 'ip'},
+    'volatile_asn_summary': {'key': 'asn_name', 'source': 'daily_asn_attacks', 'where': None,
+                             'dimension': 'asn'},
+    'volatile_username_summary': {'key': 'username', 'source': 'daily_username_attacks', 'where': None,
+                                  'dimension': 'username'},
+}
+
+
+def source_key(name):
+    """Column identifying the table's entities in its daily_* table (the id for encoded tables)"""
+    spec = VOLATILE_TABLES[name]
+    return DIMENSIONS[spec['dimension']]['id'] if spec['dimension'] else spec['key']
+
+
+def volatile_select(name, keys=None):
+    """
+    SELECT producing the table's rows; keys (a table with the source_key() column) limits it to those
+    entities. They are matched with IS NOT DISTINCT FROM, so a NULL entity is refreshed like any other
+    """
+    spec = VOLATILE_TABLES[name]
+    key, source = source_key(name), spec['source']
+
+    conditions = [spec['where']] if spec['where'] else []
+    if keys:
+        conditions.append(f"EXISTS (SELECT 1 FROM {keys} k WHERE k.{key} IS NOT DISTINCT FROM s.{key})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return f"""
+        WITH daily_data AS (
+            SELECT
+                {key},
+                date,
+                SUM(attacks) as attacks,
+                LAG(SUM(attacks)) OVER (PARTITION BY {key} ORDER BY date) as prev_attacks
+            FROM {source} s
+            {where}
+            GROUP BY {key}, date
+        ),
+        pct_changes AS (
+            SELECT
+                {key},
+                date,
+                attacks,
+                prev_attacks,
+                CASE
+                    WHEN prev_attacks > 0 THEN ((attacks - prev_attacks) * 100.0 / prev_attacks)
+                    ELSE 0
+                END as pct_change
+            FROM daily_data
+            WHERE prev_attacks IS NOT NULL
+        ),
+        max_changes AS (
+            SELECT
+                {key},
+                MAX(ABS(pct_change)) as max_volatility,
+                FIRST(date ORDER BY ABS(pct_change) DESC) as max_change_date,
+                FIRST(attacks ORDER BY ABS(pct_change) DESC) as attacks_on_max,
+                FIRST(prev_attacks ORDER BY ABS(pct_change) DESC) as prev_attacks_on_max
+            FROM pct_changes
+            GROUP BY {key}
+        )
+        {named_entities_sql(name)}
+        ORDER BY max_volatility DESC
+    """
+
+
+def named_entities_sql(name):
+    """SELECT of max_changes with the entity column named like the table's (joined from its dimension)"""
+    spec = VOLATILE_TABLES[name]
+    if not spec['dimension']:
+        return "SELECT * FROM max_changes"
+    dimension = DIMENSIONS[spec['dimension']]
+    return f"""
+        SELECT
+            d.{dimension['name']} as {spec['key']},
+            m.max_volatility,
+            m.max_change_date,
+            m.attacks_on_max,
+            m.prev_attacks_on_max
+        FROM max_changes m
+        LEFT JOIN {dimension['table']} d ON d.{dimension['id']} = m.{dimension['id']}
+    """
+
+
+def create_volatile_table(conn, name):
+    """Drop and rebuild one volatile_* table from its daily_* table"""
+    conn.execute(f"DROP TABLE IF EXISTS {name}")
+    conn.execute(f"CREATE TABLE {name} AS {volatile_select(name)}")
+
+
+def existing_volatile_tables(conn):
+    """Names of the volatile_* tables built in this database whose daily_* source exists too"""
+    existing = {row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    return [name for name, spec in VOLATILE_TABLES.items() if name in existing and spec['source'] in existing]
+
+
+def collect_volatile_keys(conn, name, dates):
+    """
+    Remember the entities with attacks on dates in temp table {name}_keys
+    Call before and after the daily_* rows of those dates are replaced (entities can appear or vanish)
+    """
+    key, source = source_key(name), VOLATILE_TABLES[name]['source']
+    date_list = date_list_sql(dates)
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS {name}_keys AS SELECT {key} FROM {source} LIMIT 0")
+    conn.execute(f"""
+        INSERT INTO {name}_keys
+        SELECT DISTINCT {key} FROM {source} s
+        WHERE date IN ({date_list})
+          AND NOT EXISTS (SELECT 1 FROM {name}_keys k WHERE k.{key} IS NOT DISTINCT FROM s.{key})
+    """)
+
+
+def refresh_volatile_keys(conn, name):
+    """Recompute the rows of the entities collected by collect_volatile_keys(); returns how many"""
+    spec = VOLATILE_TABLES[name]
+    key = spec['key']
+    keys = f"{name}_keys"
+    if spec['dimension']:
+        # The table holds names: the collected ids' names
+        dimension = DIMENSIONS[spec['dimension']]
+        names = f"""(
+            SELECT d.{dimension['name']} as {key} FROM {keys} k
+            LEFT JOIN {dimension['table']} d ON d.{dimension['id']} = k.{dimension['id']}
+        )"""
+    else:
+        names = keys
+    conn.execute(f"DELETE FROM {name} WHERE EXISTS (SELECT 1 FROM {names} k WHERE k.{key} IS NOT DISTINCT FROM {name}.{key})")
+    conn.execute(f"INSERT INTO {name} {volatile_select(name, keys)}")
+    count = conn.execute(f"SELECT COUNT(*) FROM {keys}").fetchone()[0]
+    conn.execute(f"DROP TABLE {keys}")
+    return count